@@ -1,12 +1,36 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
-from fpdf import FPDF
-import base64
+import io
 import os
+from functools import partial, wraps
+from urllib.parse import urljoin
+
+from hemosim.tiempos import registro_tiempos
+
+# Tiempos por sección (panel de rendimiento para administradores al final de la página)
+registro = registro_tiempos()
+cronometro = registro.iniciar()
+# Cada ejecución completa del guion incrementa `corrida` y, al llegar al final, la marca como terminada:
+# un fragmento que se ejecuta con la corrida ya terminada es un rerun parcial (el resto no se re-ejecuta).
+# Así un mismo fragmento llamado varias veces en una corrida (p. ej. dos reproductores) no cuenta como parcial.
+st.session_state["corrida"] = st.session_state.get("corrida", 0) + 1
+
+
+def fragmento(funcion):
+    """`st.fragment` que registra sus reruns parciales como "Fragmento <nombre>" en el panel de tiempos."""
+    nombre = funcion.__name__
+
+    @wraps(funcion)
+    def envoltura(*args, **kwargs):
+        parcial = st.session_state.get("corrida_terminada") == st.session_state["corrida"]
+        if not parcial:
+            registro.registrar_fragmento(st.session_state["corrida"], nombre, args, kwargs)
+            return funcion(*args, **kwargs)
+        with registro.medir(f"Fragmento {nombre}"):
+            return funcion(*args, **kwargs)
+    return st.fragment(envoltura)
 
 # --- 1. CONFIGURACIÓN Y ESTILOS ---
+cronometro.marcar("1. CONFIGURACIÓN Y ESTILOS")
 st.set_page_config(
     page_title="HemoSim: Docencia en Falla Cardíaca",
     page_icon="🫀",
@@ -27,11 +51,13 @@ st.markdown("""
     """, unsafe_allow_html=True)
 
 # --- 2. AUTENTICACIÓN ---
+cronometro.marcar("2. AUTENTICACIÓN")
 def check_password():
     def password_entered():
         if (st.session_state["username"] == st.secrets["credentials"]["username"] and 
             st.session_state["password"] == st.secrets["credentials"]["password"]):
             st.session_state["password_correct"] = True
+            st.session_state["usuario"] = st.session_state["username"]
             del st.session_state["password"]
             del st.session_state["username"]
         else:
@@ -59,86 +85,102 @@ def check_password():
 if not check_password():
     st.stop()
 
+# Dependencias pesadas (numpy, plotly y los módulos de hemosim) se importan después del login:
+# la pantalla de acceso no las espera. pandas se carga con la primera tabla o cohorte y fpdf
+# con el primer PDF descargado.
+cronometro.marcar("Importaciones diferidas")
+from hemosim.auscultacion import CacheSonidos, cuantizar
+from hemosim.calculos import CAMPOS, evaluar_caso, unir_sintomas
+from hemosim.caso import Caso
+from hemosim.clinica import calcular_fenotipo_fevi, describir_iy, estimar_pvc, inferir_valvulopatia, mensaje_tratamiento
+from hemosim.cohorte import puntuar_cohorte
+from hemosim.compartido import CacheCompartido, clave_canonica, huella
+from hemosim.estaticos import manifiesto_montado
+from hemosim.explorador import explorar
+from hemosim.farmacologia import MEDS_AGUDOS
+from hemosim.geografia import cargar_geografia
+from hemosim.graficos import (
+    PUNTOS_NUBE, TIPOS_COHORTE, agregar_nube, agregar_respuesta_dosis, agregar_trayectoria, agregar_tratamiento,
+    figura_cohorte, figura_sensibilidad, figura_stevenson,
+)
+from hemosim.imagenes import DerivadasImagen
+from hemosim.incertidumbre import ERRORES_MEDICION, simular
+from hemosim.memoria import memoria_sesion
+from hemosim.recursos import IndiceRecursos
+from hemosim.reglas import firma as firma_reglas, recargar as recargar_reglas, tablas as tablas_reglas
+from hemosim.reportes import generar_reporte
+from hemosim.ritmos import cuantizar as cuantizar_ritmo, html_monitor
+from hemosim.sensibilidad import EJES, clave_mapa, fraccion_limites, mapa_sensibilidad, posicion, rotulos
+from hemosim.serializacion import a_json, a_texto, codificar, desde_caso, desde_texto, escribir_lote, leer_lote
+from hemosim.terapia import ESCALAS_DOSIS, INTERVENCIONES, respuesta_dosis, trayectoria
+
 # --- 3. GENERADOR PDF ---
-class PDF(FPDF):
-    def header(self):
-        self.set_font('Arial', 'B', 14)
-        self.cell(0, 10, 'HemoSim - Reporte de Caso Clínico', 0, 1, 'C')
-        self.ln(5)
-
-    def chapter_title(self, title):
-        self.set_font('Arial', 'B', 12)
-        self.set_fill_color(200, 220, 255)
-        self.cell(0, 6, title, 0, 1, 'L', 1)
-        self.ln(4)
-
-    def chapter_body(self, body):
-        self.set_font('Arial', '', 10)
-        self.multi_cell(0, 5, body)
-        self.ln()
-
-def create_download_link(val, filename):
-    b64 = base64.b64encode(val)
-    return f'<a href="data:application/octet-stream;base64,{b64.decode()}" download="{filename}.pdf">📥 Descargar Reporte PDF</a>'
-
-# --- FUNCIÓN DE VIDEO MEJORADA (PANORÁMICA) ---
-def mostrar_video_ritmo(url, titulo_ritmo):
-    """Incrusta video ancho en el panel principal con opción de nueva pestaña."""
-    if url.startswith("http"):
-        # Iframe con ancho 100% para ocupar toda la columna principal
-        html_code = f"""
-        <div style="background-color: #000; border-radius: 10px; padding: 5px; margin-bottom: 10px;">
-            <iframe src="{url}" width="100%" height="350" frameborder="0" allow="autoplay; fullscreen" allowfullscreen></iframe>
-        </div>
-        """
-        st.markdown(html_code, unsafe_allow_html=True)
-        # Botón para abrir en nueva pestaña
-        st.markdown(f'''
-            <a href="{url}" target="_blank" style="text-decoration: none;">
-                <button style="background-color: #4CAF50; border: none; color: white; padding: 8px 16px; 
-                text-align: center; text-decoration: none; display: inline-block; font-size: 14px; 
-                margin: 4px 2px; cursor: pointer; border-radius: 4px;">
-                🔗 Abrir {titulo_ritmo} en Nueva Pestaña (Pantalla Completa)
-                </button>
-            </a>
-            ''', unsafe_allow_html=True)
-    else:
-        st.info("⚠️ Enlace de video no configurado.")
+cronometro.marcar("3. GENERADOR PDF")
+# Clase PDF en hemosim/reportes.py; los reportes se guardan en el caché compartido
+@st.cache_resource
+def cargar_cache_compartido():
+    """Resultados por caso (cálculo, figuras, incertidumbre, sensibilidad, PDF, monitor DII) compartidos entre sesiones: modo aula."""
+    return CacheCompartido()
+
+cache_compartido = cargar_cache_compartido()
 
 # --- 4. RECURSOS Y DATA ---
+cronometro.marcar("4. RECURSOS Y DATA")
 # --- FUNCIÓN ROBUSTA (Maneja Tildes y Errores) ---
-def reproducir_multimedia(ruta):
+def reproducir_multimedia(clave):
     """
-    Intenta reproducir el archivo. Si falla por tildes, busca alternativas.
+    Reproduce el recurso `clave`. El índice ignora tildes y sirve los bytes desde memoria.
     """
+    ruta = recursos.get(clave)
+    if ruta is None:
+        st.error(f"⚠️ Recurso no configurado: {clave}")
+        return
+
     # 1. Si es URL web
     if ruta.startswith("http"):
         st.audio(ruta)
         return
 
-    # 2. Si el archivo existe tal cual
-    if os.path.exists(ruta):
-        try:
-            if ruta.endswith(".mp4"):
-                st.video(ruta, format="video/mp4", start_time=0) 
-            else:
-                st.audio(ruta)
-            return
-        except:
-            pass
-
-    # 3. INTENTO DE RECUPERACIÓN (Problema de Tildes)
-    # Si dice "Estenosis aórtica.mp3" pero no lo halla, intenta "Estenosis aortica.mp3"
-    ruta_sin_tildes = ruta.replace("ó", "o").replace("á", "a").replace("é", "e").replace("í", "i").replace("ú", "u")
-    if os.path.exists(ruta_sin_tildes):
-        st.audio(ruta_sin_tildes)
+    # 2. Con servidor.py: URL con hash de la ruta de estáticos (Range, ETag y caché del navegador)
+    entrada = recursos_estaticos.get(clave)
+    if entrada and st.context.url:
+        url = urljoin(st.context.url, entrada.url)
+        if entrada.mime.startswith("video"): st.video(url, format=entrada.mime)
+        else: st.audio(url, format=entrada.mime)
         return
-        
-    st.error(f"⚠️ Archivo no encontrado: {ruta} (Revise tildes en el nombre)")
 
-def mostrar_imagen(ruta):
-    if os.path.exists(ruta):
-        st.image(ruta)
+    # 3. Archivo local enviado por la sesión (leído del disco una sola vez por proceso)
+    archivo = indice_recursos.leer(ruta)
+    if archivo is None:
+        st.error(f"⚠️ Archivo no encontrado: {ruta} (Revise tildes en el nombre)")
+        return
+    datos, mime = archivo
+    if mime.startswith("video"):
+        st.video(datos, format=mime, start_time=0)
+    else:
+        st.audio(datos, format=mime)
+
+def reproducir_sintesis(fc, ritmo, ruidos, soplo=None):
+    """Ruidos sintetizados a la FC y con el ritmo del caso (un WAV por clave cuantizada y proceso)."""
+    st.audio(cache_sonidos.obtener(fc, ritmo, ruidos, soplo), format="audio/wav")
+    fc_sonido, ritmo_sonido, _, _ = cuantizar(fc, ritmo, ruidos, soplo)
+    st.caption(f"Sintetizado a {fc_sonido} lpm · {ritmo_sonido}")
+
+# Alternar síntesis/grabación o la resolución de una imagen no cambia el caso: sólo se re-ejecuta el reproductor
+@fragmento
+def escuchar(clave_toggle, grabacion, fc, ritmo, ruidos, soplo=None):
+    """Ruidos sintetizados o, con el interruptor, la grabación real `grabacion` (si la hay)."""
+    if not st.toggle("🎙️ Grabación real", key=clave_toggle): reproducir_sintesis(fc, ritmo, ruidos, soplo)
+    elif grabacion: reproducir_multimedia(grabacion)
+
+@fragmento
+def mostrar_imagen(clave):
+    """Miniatura en la barra lateral; la resolución completa se genera sólo si se pide."""
+    ruta = recursos[clave]
+    completa = st.toggle("🔍 Resolución completa", key=f"img_completa_{clave}")
+    imagen = derivadas_imagen.obtener(ruta, "completa" if completa else "miniatura")
+    if imagen:
+        st.image(imagen)
     else:
         st.warning(f"⚠️ Imagen no encontrada: {ruta}")
 
@@ -151,11 +193,11 @@ recursos = {
     "rx_congest": "assets/Rx de tórax con congestion basal.jpg",
     "rx_edema": "assets/Rx de tórax con edema pulmonar.jpg",
     
-    # RITMOS (VIDEOS EN LA NUBE - SCREENPAL)
-    "ritmo_sinusal": "https://go.screenpal.com/watch/cTVFFNnf1p2",
-    "ritmo_fa": "https://go.screenpal.com/watch/cTXDFZnFWGz",
-    "ritmo_flutter": "https://go.screenpal.com/watch/cTVFFNnf1pV",
-    "ritmo_mcp": "https://go.screenpal.com/watch/cTVFFNnf1pj",
+    # RITMOS (Locales .mp4; el monitor los genera con hemosim/ritmos.py y estos son la alternativa grabada)
+    "ritmo_sinusal": "assets/Ritmo Sinusal.mp4",
+    "ritmo_fa": "assets/Fibrilacion auricular.mp4",
+    "ritmo_flutter": "assets/Aleteo atrial.mp4",
+    "ritmo_mcp": "assets/MCP ventricular.mp4",
 
     # RUIDOS CARDIACOS (Locales .mp3)
     "r_normales": "assets/Ruidos cardiacos normales.mp3",
@@ -176,113 +218,55 @@ recursos = {
     "pulm_sibilancias": "assets/Sibilancias.mp4",
     "pulm_roncus": "assets/Roncus.mp4"
 }
-
-municipios_base = sorted(list(set([
-    "Abejorral", "Abriaquí", "Acacías", "Acandí", "Acevedo", "Achí", "Agrado", "Agua de Dios", "Aguachica", "Aguada", "Aguadas", "Aguazul", 
-    "Alejandría", "Algarrobo", "Algeciras", "Almaguer", "Almeida", "Alpujarra", "Altamira", "Alto Baudó", "Amagá", "Amalfi", "Ambalema", 
-    "Anapoima", "Ancuya", "Andalucía", "Andes", "Angelópolis", "Angostura", "Anolaima", "Anorí", "Anserma", "Ansermanuevo", "Anzoátegui", 
-    "Apartadó", "Apía", "Apulo", "Aquitania", "Aracataca", "Aranzazu", "Aratoca", "Arauca", "Arauquita", "Arbeláez", "Arboleda", "Arboledas", 
-    "Arboletes", "Arcabuco", "Arenal", "Argelia", "Ariguaní", "Arjona", "Armenia", "Armero", "Arroyohondo", "Astrea", "Ataco", "Atrato", 
-    "Ayapel", "Bagadó", "Bahía Solano", "Bajo Baudó", "Balboa", "Baranoa", "Baraya", "Barbacoas", "Barbosa", "Barichara", "Barranca de Upía", 
-    "Barrancabermeja", "Barranquilla", "Becerril", "Belalcázar", "Belén", "Belén de Umbría", "Bello", "Belmira", "Beltrán", "Berbeo", 
-    "Betania", "Betéitiva", "Betulia", "Bituima", "Boavita", "Bochalema", "Bogotá D.C.", "Bojacá", "Bojayá", "Bolívar", "Bosconia", "Boyacá", 
-    "Briceño", "Bucaramanga", "Buenaventura", "Buenavista", "Buenos Aires", "Buesaco", "Bugalagrande", "Buriticá", "Busbanzá", "Cabrera", 
-    "Cabuyaro", "Cáceres", "Cachipay", "Caicedo", "Caicedonia", "Caimito", "Cajamarca", "Cajibío", "Cajicá", "Calamar", "Calarcá", "Caldas", 
-    "Caldono", "Cali", "Calima", "Caloto", "Campamento", "Campo de la Cruz", "Campoalegre", "Campohermoso", "Canalete", "Candelaria", 
-    "Cantagallo", "Caparrapí", "Capitanejo", "Cáqueza", "Caracolí", "Caramanta", "Carcasí", "Carepa", "Carmen de Apicalá", "Carmen de Carupa", 
-    "Carmen de Viboral", "Carolina", "Cartagena", "Cartago", "Carurú", "Casabianca", "Castilla la Nueva", "Caucasia", "Célimo", "Cepitá", 
-    "Cereté", "Cerinza", "Cerrito", "Cerro San Antonio", "Chachagüí", "Chaguaní", "Chalán", "Chameza", "Chapa", "Chaparral", "Charalá", 
-    "Charta", "Chía", "Chigorodó", "Chima", "Chimichagua", "Chinácota", "Chinavita", "Chinchiná", "Chinú", "Chipaque", "Chipatá", "Chiquinquirá", 
-    "Chiriguaná", "Chiscas", "Chita", "Chitagá", "Chitaraque", "Chivatá", "Chivor", "Choachí", "Chocontá", "Cicuco", "Ciénaga", "Ciénaga de Oro", 
-    "Cimitarra", "Circasia", "Cisneros", "Ciudad Bolívar", "Clemencia", "Cocorná", "Coello", "Cogua", "Colombia", "Colón", "Colosó", "Cómbita", 
-    "Concepción", "Concordia", "Condoto", "Confines", "Consacá", "Contratación", "Convención", "Copacabana", "Coper", "Córdoba", "Corinto", 
-    "Coromoro", "Corozal", "Corrales", "Cota", "Cotorra", "Covarachía", "Coveñas", "Coyaima", "Cravo Norte", "Cuaspud", "Cubará", "Cubarral", 
-    "Cucaita", "Cucunubá", "Cucutilla", "Cucutilla", "Cuítiva", "Cumaral", "Cumaribo", "Cumbal", "Cumbitara", "Cunday", "Curillo", "Curití", 
-    "Curumaní", "Dabeiba", "Dagua", "Dibulla", "Distracción", "Dolores", "Don Matías", "Dosquebradas", "Duitama", "Durania", "Ebéjico", 
-    "El Águila", "El Bagre", "El Banco", "El Cairo", "El Calvario", "El Carmen", "El Carmen de Bolívar", "El Castillo", "El Cerrito", 
-    "El Charco", "El Cocuy", "El Colegio", "El Copey", "El Doncello", "El Dorado", "El Dovio", "El Encanto", "El Espino", "El Guacamayo", 
-    "El Guamo", "El Litoral del San Juan", "El Molino", "El Paso", "El Paujil", "El Peñol", "El Peñón", "El Piñon", "El Playón", "El Retén", 
-    "El Retorno", "El Roble", "El Rosal", "El Rosario", "El Santuario", "El Tablón de Gómez", "El Tambo", "El Tarra", "El Zulia", "Elías", 
-    "Encino", "Enciso", "Entrerríos", "Envigado", "Espinal", "Facatativá", "Falan", "Filadelfia", "Filandia", "Firavitoba", "Flandes", 
-    "Florencia", "Floresta", "Florián", "Florida", "Floridablanca", "Fómeque", "Fonseca", "Fortul", "Fosca", "Francisco Pizarro", "Fredonia", 
-    "Fresno", "Frontino", "Fuente de Oro", "Fundación", "Funes", "Funza", "Fúquene", "Fusagasugá", "Gachalá", "Gachancipá", "Gachantivá", 
-    "Gachetá", "Galán", "Galapa", "Galeras", "Gama", "Gamarra", "Garagoa", "Garzón", "Génova", "Gigante", "Ginebra", 
-    "Giraldo", "Girardot", "Girardota", "Girón", "Gómez Plata", "González", "Gramalote", "Granada", "Guaca", "Guacamayas", "Guacarí", 
-    "Guachucal", "Guadalupe", "Guaduas", "Guaitarilla", "Gualmatán", "Guamal", "Guamo", "Guapí", "Guapotá", "Guaranda", "Guarne", "Guasca", 
-    "Guatapé", "Guataquí", "Guatavita", "Guateque", "Guática", "Guavata", "Guayabal de Síquima", "Guayabetal", "Guayatá", "Guepsa", "Güicán", 
-    "Gutiérrez", "Hacarí", "Hatillo de Loba", "Hato", "Hato Corozal", "Hatonuevo", "Heliconia", "Herrán", "Herveo", "Hispania", "Hob", "Honda", 
-    "Ibagué", "Icononzo", "Iles", "Imués", "Inzá", "Ipiales", "Isnos", "Istmina", "Itagüí", "Ituango", "Izá", "Jambaló", "Jamundí", "Jardín", 
-    "Jenesano", "Jericó", "Jerusalén", "Jesús María", "Jordán", "Juan de Acosta", "Junín", "Juradó", "La Apartada", "La Argentina", "La Belleza", 
-    "La Calera", "La Capilla", "La Ceja", "La Celia", "La Cruz", "La Cumbre", "La Dorada", "La Esperanza", "La Estrella", "La Florida", 
-    "La Gloria", "La Jagua de Ibirico", "La Jagua del Pilar", "La Llanada", "La Macarena", "La Merced", "La Mesa", "La Montañita", "La Palma", 
-    "La Paz", "La Peña", "La Pintada", "La Plata", "La Playa", "La Primavera", "La Salina", "La Sierra", "La Tebaida", "La Tola", "La Unión", 
-    "La Uribe", "La Vega", "La Victoria", "La Virginia", "Labateca", "Labranzagrande", "Landázuri", "Lebrija", "Leíva", "Lejanías", 
-    "Lenguazaque", "Lérida", "Leticia", "Líbano", "Liborina", "Linares", "Lloró", "López", "Lorica", "Los Andes", "Los Córdobas", "Los Palmitos", 
-    "Los Patios", "Los Santos", "Luruaco", "Macanal", "Macaravita", "Maceo", "Macheta", "Madrid", "Magangué", "Magüí", "Mahates", "Maicao", 
-    "Majagual", "Málaga", "Malambo", "Mallama", "Manatí", "Manaure", "Maní", "Manizales", "Manta", "Manzanares", "Mapiripán", "Margarita", 
-    "María la Baja", "Marinilla", "Maripí", "Mariquita", "Marmato", "Marquetalia", "Marsella", "Marulanda", "Matanza", "Medellín", "Medina", 
-    "Medio Atrato", "Medio Baudó", "Medio San Juan", "Melgar", "Mercaderes", "Mesetas", "Milán", "Miraflores", "Miranda", "Mistrató", "Mitú", 
-    "Mocoa", "Mogotes", "Molagavita", "Momil", "Mompós", "Mongua", "Monguí", "Moniquirá", "Montebello", "Montecristo", "Montelíbano", 
-    "Montenegro", "Montería", "Monterrey", "Morales", "Morelia", "Morroa", "Mosquera", "Motavita", "Murillo", "Murindó", "Mutatá", "Mutiscua", 
-    "Muzo", "Nariño", "Nátaga", "Natagaima", "Nechí", "Necoclí", "Neira", "Neiva", "Nemocón", "Nilo", "Nimaima", "Nobsa", "Nocaima", "Norcasia", 
-    "Nóvita", "Nuevo Colón", "Nunchía", "Nuquí", "Obando", "Ocamonte", "Ocaña", "Oiba", "Oicatá", "Olaya", "Olaya Herrera", "Onzaga", "Oporapa", 
-    "Orito", "Orocué", "Ortega", "Ospina", "Otanche", "Ovejas", "Pachavita", "Pacho", "Padilla", "Páez", "Paicol", "Pailitas", "Paime", "Paipa", 
-    "Pajarito", "Palermo", "Palestina", "Palmar", "Palmar de Varela", "Palmas del Socorro", "Palmira", "Palmito", "Palocabildo", "Pamplona", 
-    "Pamplonita", "Paniagua", "Pantoja", "Páramo", "Paratebueno", "Pasca", "Pasto", "Patía", "Pauna", "Paya", "Paz de Ariporo", "Paz de Río", 
-    "Pedraza", "Pelaya", "Pensilvania", "Peñol", "Peque", "Pereira", "Pesca", "Piamonte", "Pie de Cuesta", "Piedras", "Piendamó", "ijao", "Pijiño del Carmen", 
-    "Pinchote", "Pinillos", "Piojó", "Pisba", "Pital", "Pitalito", "Pivijay", "Planadas", "Planeta Rica", "Plato", "Policarpa", "Polonuevo", 
-    "Ponedera", "Popayán", "Pore", "Potosí", "Pradera", "Prado", "Providencia", "Pueblo Bello", "Pueblo Nuevo", "Pueblo Rico", "Pueblorrico", 
-    "Puebloviejo", "Puente Nacional", "Puerres", "Puerto Asís", "Puerto Berrío", "Puerto Boyacá", "Puerto Caicedo", "Puerto Carreño", 
-    "Puerto Colombia", "Puerto Concordia", "Puerto Escondido", "Puerto Gaitán", "Puerto Guzmán", "Puerto Leguízamo", "Puerto Libertador", 
-    "Puerto Lleras", "Puerto López", "Puerto Nare", "Puerto Nariño", "Puerto Parra", "Puerto Rico", "Puerto Rondón", "Puerto Salgar", 
-    "Puerto Santander", "Puerto Tejada", "Puerto Triunfo", "Puerto Wilches", "Pulí", "Pupiales", "Puracé", "Purificación", "Purísima", 
-    "Quebradanegra", "Quetame", "Quibdó", "Quimbaya", "Quinchía", "Quípama", "Quipile", "Ragonvalia", "Ramiriquí", "Ráquira", "Recetor", 
-    "Regidor", "Remedios", "Remolino", "Repelón", "Restrepo", "Retiro", "Ricaurte", "Rio de Oro", "Rio Iro", "Rio Quito", "Rio Viejo", 
-    "Rioblanco", "Riofrío", "Riohacha", "Rionegro", "Riosucio", "Risaralda", "Rivera", "Roberto Payán", "Roldanillo", "Roncesvalles", 
-    "Rondón", "Rosas", "Rovira", "Sáchica", "Sahagún", "Saladoblanco", "Salamina", "Salazar", "Saldaña", "Salento", "Salgar", "Samacá", "Samaniego", 
-    "Samaná", "Sampués", "San Agustín", "San Alberto", "San Andrés", "San Andrés Sotavento", "San Antero", "San Antonio", "San Antonio del Tequendama", 
-    "San Benito", "San Benito Abad", "San Bernardo", "San Bernardo del Viento", "San Calixto", "San Carlos", "San Carlos de Guaroa", "San Cayetano", 
-    "San Cristóbal", "San Diego", "San Eduardo", "San Estanislao", "San Fernando", "San Francisco", "San Gil", "San Jacinto", "San Jacinto del Cauca", 
-    "San Jerónimo", "San Joaquín", "San José", "San José de la Montaña", "San José de Miranda", "San José de Pare", "San José del Fragua", 
-    "San José del Guaviare", "San José del Palmar", "San Juan de Arama", "San Juan de Betulia", "San Juan de Rioseco", "San Juan de Urabá", 
-    "San Juan del Cesar", "San Juan Nepomuceno", "San Juanito", "San Lorenzo", "San Luis", "San Luis de Gaceno", "San Luis de Palenque", 
-    "San Marcos", "San Martín", "San Martín de Loba", "San Mateo", "San Miguel", "San Miguel de Sema", "San Onofre", "San Pablo", 
-    "San Pablo de Borbur", "San Pedro", "San Pedro de Cartago", "San Pedro de Urabá", "San Pelayo", "San Rafael", "San Roque", "San Sebastián", 
-    "San Sebastián de Buenavista", "San Vicente", "San Vicente del Caguán", "San Vicente del Chucurí", "San Zenón", "Sandoná", "Santa Ana", 
-    "Santa Bárbara", "Santa Bárbara de Pinto", "Santa Catalina", "Santa Fe de Antioquia", "Santa Genoveva de Docorodó", "Santa Helena del Opón", 
-    "Santa Isabel", "Santa Lucía", "Santa María", "Santa Marta", "Santa Rosa", "Santa Rosa de Cabal", "Santa Rosa de Osos", "Santa Rosa de Viterbo", 
-    "Santa Rosa del Sur", "Santa Rosalía", "Santa Sofía", "Santana", "Santander de Quilichao", "Santiago", "Santo Domingo", "Santo Tomás", 
-    "Santuario", "Sapuyes", "Saravena", "Sardinata", "Sasaima", "Sativanorte", "Sativasur", "Segovia", "Sesquilé", "Sevilla", "Siachoque", 
-    "Sibaté", "Sibundoy", "Silos", "Silvania", "Silvia", "Simacota", "Simijaca", "Simití", "Sincelejo", "Sincé", "Sipí", "Sitionuevo", 
-    "Soacha", "Soatá", "Socha", "Socorro", "Socotá", "Sogamoso", "Solano", "Soledad", "Solita", "Somondoco", "Sonsón", "Sopetrán", "Soplaviento", 
-    "Sopó", "Sora", "Soracá", "Sotaquirá", "Sotara", "Suaita", "Suárez", "Suaza", "Subachoque", "Sucre", "Suesca", "Supatá", "Supía", "Suratá", 
-    "Susa", "Susacón", "Sutamarchán", "Sutatausa", "Sutatenza", "Tabio", "Tadó", "Talaigua Nuevo", "Tamalameque", "Támara", "Tame", "Támesis", 
-    "Taminango", "Tangua", "Taraira", "Tarazá", "Tarqui", "Tarso", "Tasco", "Tauramena", "Tausa", "Tello", "Tena", "Tenerife", "Tenjo", "Tenza", 
-    "Teorama", "Teruel", "Tesalia", "Tibacuy", "Tibaná", "Tibasosa", "Tibirita", "Tibú", "Tierralta", "Timaná", "Timbío", "Timbiquí", "Tinjacá", 
-    "Tipacoque", "Tiquisio", "Titiribí", "Toca", "Tocaima", "Tocancipá", "Togüí", "Toledo", "Tolú", "Tolú Viejo", "Tona", "Tópaga", "Topaipí", 
-    "Toribío", "Toro", "Tota", "Totoró", "Trinidad", "Trujillo", "Tubará", "Tuchín", "Tuluá", "Tumaco", "Tunja", "Tununguá", "Túquerres", 
-    "Turbaco", "Turbaná", "Turbo", "Turmequé", "Tuta", "Tutazá", "Ubalá", "Ubaque", "Ubaté", "Ulloa", "Umbita", "Une", "Unguía", 
-    "Unión Panamericana", "Uramita", "Uribe", "Uribia", "Urrao", "Urumita", "Usiacurí", "Útica", "Valdivia", "Valencia", "Valle de San José", 
-    "Valle de San Juan", "Valledupar", "Valparaíso", "Vegachí", "Vélez", "Venadillo", "Venecia", "Ventanas", "Vergara", "Versalles", "Vetas", 
-    "Viani", "Victoria", "Vigía del Fuerte", "Vijes", "Villa Caro", "Villa de Leyva", "Villa del Rosario", "Villa Gamero", "Villa Garzón", 
-    "Villa Rica", "Villagómez", "Villahermosa", "Villamaría", "Villanueva", "Villapinzón", "Villarrica", "Villavicencio", "Villavieja", 
-    "Villeta", "Viotá", "Viracachá", "Vista Hermosa", "Viterbo", "Yacopí", "Yacuanquer", "Yaguará", "Yalí", "Yarumal", "Yavaraté", "Yolombó", 
-    "Yondó", "Yopal", "Yotoco", "Yumbo", "Zambrano", "Zapatoca", "Zapayán", "Zaragoza", "Zarzal", "Zetaquira", "Zipacón", "Zipaquirá", 
-    "Zona Bananera"
-])))
-
-# Zonas de Riesgo Chagas (Solo para validación epidemiológica)
-zonas_chagas = [
-    "Boavita", "Chiscas", "Cubará", "Güicán de la Sierra", "Labranzagrande", "Paya", "Pisba", "San Mateo", "Soatá", "Socotá", "Tipacoque",
-    "Barichara", "Capitanejo", "Encinales", "Hato", "Mogotes", "San Gil", "San José de Miranda", "San Vicente del Chucurí", "Socorro",
-    "Aguazul", "Chámeza", "Hato Corozal", "Nunchía", "Paz de Ariporo", "Recetor", "Támara", "Tauramena", "Yopal",
-    "Arauca", "Arauquita", "Saravena", "Tame",
-    "Choachí", "Fómeque", "Gachalá", "Medina", "Nilo", "Paratebueno", "Ubaque",
-    "Cáchira", "Sardinata", "Toledo",
-    "La Jagua de Ibirico", "Pueblo Bello", "Valledupar",
-    "Liborina", "Peque", "Yolombó"
+# Reemplazos por despliegue (p. ej. ritmos servidos en la red local): tabla [recursos] de los secrets
+recursos.update(st.secrets.get("recursos", {}))
+
+# Claves que usan los reproductores y visores de la barra lateral (se verifican al iniciar)
+claves_multimedia = [
+    "pvc_lewis", "rx_normal", "rx_congest", "rx_edema",
+    "ritmo_sinusal", "ritmo_fa", "ritmo_flutter", "ritmo_mcp",
+    "r_normales", "r_s3", "r_s4", "r_suma",
+    "soplo_ia", "soplo_em", "soplo_ip", "soplo_ea", "soplo_im", "soplo_it",
+    "pulm_normal", "pulm_estertores", "pulm_sibilancias", "pulm_roncus",
 ]
 
+@st.cache_resource
+def cargar_indice_recursos():
+    """Índice de assets/ construido una vez por proceso; reporta claves sin resolver."""
+    indice = IndiceRecursos(os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets"))
+    indice.reportar(recursos, claves_multimedia)
+    return indice
+
+@st.cache_resource
+def cargar_derivadas_imagen():
+    """Miniaturas y variantes completas de las Rx y Lewis (caché en disco por hash de contenido)."""
+    return DerivadasImagen(indice_recursos, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "imagenes"))
+
+@st.cache_resource
+def cargar_cache_sonidos():
+    """Ruidos cardiacos sintetizados (hemosim/auscultacion.py), compartidos entre sesiones."""
+    return CacheSonidos()
+
+@st.cache_resource
+def cargar_recursos_estaticos():
+    """Clave → URL con hash en la ruta de estáticos; vacío si el servidor no la montó (streamlit run app.py)."""
+    manifiesto = manifiesto_montado()
+    return manifiesto.para(recursos) if manifiesto else {}
+
+indice_recursos = cargar_indice_recursos()
+recursos_estaticos = cargar_recursos_estaticos()
+cache_sonidos = cargar_cache_sonidos()
+derivadas_imagen = cargar_derivadas_imagen()
+
+@st.cache_data(max_entries=4, show_spinner="Calificando cohorte...")
+def calificar_cohorte(datos, nombre, reglas):
+    """(pcp_sim, ic_sim) de cada caso del archivo subido, calificados con el motor vectorizado (`reglas`: firma de las tablas)."""
+    formato = "csv" if nombre.lower().endswith(".csv") else "jsonl"
+    return puntuar_cohorte(io.BytesIO(datos), formato)
+
+# Municipios y Zonas de Riesgo Chagas (hemosim/datos/geografia.json, cargado una vez por proceso)
+geografia = cargar_geografia()
+
 # Antecedentes (Lista Completa)
 antecedentes_lista = sorted([
     "Apnea del sueño", "Artritis reumatoide", "Cardiopatía congénita", "Diabetes Mellitus Tipo 2", "Dislipidemia", 
@@ -291,183 +275,195 @@ antecedentes_lista = sorted([
     "Obesidad", "Tabaquismo", "VIH"
 ])
 
-# Farmacología Detallada (Braunwald/Guías)
-meds_agudos = {
-    "oxigeno": {
-        "nombre": "Oxígeno / Ventilación No Invasiva (VNI)",
-        "dosis": "• **Oxígeno Suplementario:** Titular para meta de SatO2 > 90% (>95% en embarazo).\n• **Ventilación Mecánica No Invasiva (CPAP/BiPAP):** Iniciar con PEEP 5-10 cmH2O. Indicación Clase IIa si hay FR > 25 rpm, Acidosis respiratoria (pH < 7.35) o Edema Pulmonar franco para reducir precarga y trabajo respiratorio.",
-        "monitor": "• Gases arteriales (control a la 1 hora post-inicio).\n• Estado de conciencia y tolerancia a la interfaz (máscara).\n• Riesgo de hipotensión (la presión positiva intratorácica reduce el retorno venoso).",
-        "adverso": "Intolerancia, claustrofobia, broncoaspiración (contraindicado si hay deterioro del sensorio o vómito), resequedad de mucosas."
-    },
-    "liquidos": {
-        "nombre": "Líquidos Endovenosos (Cristaloides)",
-        "dosis": "• **Cristaloides Balanceados:** Lactato de Ringer o Solución Salina Normal 0.9%.\n• **Reto de Fluidos (Solo Perfil L - Seco/Frío):** Bolos de 250-500 cc en 15-30 minutos bajo vigilancia estricta.\n• **Objetivo:** Aumentar precarga para mejorar Volumen Sistólico (Mecanismo Frank-Starling).",
-        "monitor": "• Signos de congestión pulmonar (aparición de estertores).\n• Respuesta clínica (Mejoría de Presión Arterial, Gasto Urinario, aclaramiento de Lactato).",
-        "adverso": "Edema Pulmonar Agudo (iatrogénico si se administra en pacientes húmedos), Acidosis hiperclorémica (con volúmenes altos de SSN 0.9%)."
-    },
-    "diureticos": {
-        "nombre": "Furosemida (Diurético de Asa)",
-        "dosis": "• **Pacientes vírgenes de tratamiento (Naïve):** Bolo IV de 20 mg a 40 mg.\n• **Pacientes con uso crónico:** Bolo IV inicial de 1 a 2.5 veces su dosis oral total diaria.\n• **Infusión Continua:** Si hay respuesta pobre a bolos, iniciar infusión a 5 - 40 mg/hora.\n• **Bloqueo Secuencial de Nefrona:** Si hay resistencia diurética, adicionar Tiazida (Hidroclorotiazida 25mg o Metolazona).",
-        "monitor": "• Gasto urinario horario (Meta > 100-150 ml/hora primeras 6 horas).\n• Electrolitos: Potasio (K+) y Magnesio (Mg++) cada 6-12 horas.\n• Función renal: Esperar elevación transitoria de Creatinina (permisiva si hay descongestión exitosa).",
-        "adverso": "Hipokalemia, Hipomagnesemia, Ototoxicidad (riesgo en bolos rápidos > 20mg/min), Hipotensión, Alcalosis metabólica por contracción."
-    },
-    "vasodilatadores": {
-        "nombre": "Vasodilatadores (Nitroglicerina / Nitroprusiato)",
-        "dosis": "• **Nitroglicerina:** Iniciar infusión a 10-20 mcg/min. Titular aumentando 5-10 mcg/min cada 3-5 minutos según respuesta. Dosis máxima usual 200 mcg/min.\n• **Nitroprusiato de Sodio:** Iniciar a 0.3 mcg/kg/min. Titular hasta 5 mcg/kg/min. (Requiere línea arterial obligatoria y protección de la luz).",
-        "monitor": "• Presión Arterial continua (Detener o reducir si Presión Sistólica < 90 mmHg).\n• Cefalea intensa (muy común con Nitroglicerina).\n• Saturación O2 (puede caer levemente por alteración ventilación/perfusión).",
-        "adverso": "Hipotensión severa, Taquicardia refleja, Cefalea, Fenómeno de robo coronario. Nitroprusiato: Riesgo de toxicidad por cianuro/tiocianato en uso prolongado (>24-48h) o falla renal."
-    },
-    "inotropicos": {
-        "nombre": "Inotrópicos (Dobutamina / Milrinone / Levosimendán)",
-        "dosis": "• **Dobutamina:** Iniciar a 2 mcg/kg/min. Titular hasta máximo 20 mcg/kg/min (Agonista Beta-1 adrenérgico).\n• **Milrinone:** Iniciar a 0.375 mcg/kg/min. Rango 0.375 - 0.75 mcg/kg/min. (Inhibidor PDE3, inodilatador). Ajustar al 50% en falla renal. No usar bolo de carga.\n• **Levosimendán:** Infusión de 0.1 mcg/kg/min (rango 0.05 - 0.2) por 24 horas. (Sensibilizador de calcio). No usar bolo de carga rutinario.",
-        "monitor": "• Monitoría electrocardiográfica continua (Riesgo de arritmias ventriculares y auriculares).\n• Signos de isquemia miocárdica (Dobutamina aumenta consumo de O2).\n• Presión Arterial (Milrinone y Levosimendán causan hipotensión por vasodilatación periférica).",
-        "adverso": "Taquicardia sinusal, Fibrilación auricular, Complejos ventriculares prematuros/Taquicardia Ventricular, Hipotensión sostenida (Milrinone/Levosimendán), Hipokalemia."
-    },
-    "vasopresores": {
-        "nombre": "Vasopresores (Norepinefrina)",
-        "dosis": "• **Norepinefrina:** Iniciar a 0.05 mcg/kg/min. Titular cada 3-5 minutos hasta 0.5 mcg/kg/min o más según necesidad. Meta: Presión Arterial Media (PAM) > 65 mmHg.\n• (Vasopresor de elección en Shock Cardiogénico según guías ESC/AHA).",
-        "monitor": "• Signos de perfusión distal y esplácnica (Lactato sérico, llenado capilar).\n• Acceso venoso central preferido (riesgo de necrosis por extravasación).\n• Línea arterial obligatoria para titulación precisa.",
-        "adverso": "Isquemia tisular (necrosis de dedos/extremidades), Arritmias, Hipertensión severa reactiva, Aumento excesivo de la postcarga del ventrículo izquierdo (puede empeorar el gasto cardíaco si no hay inotropía adecuada)."
-    }
-}
+# Farmacología Detallada (Braunwald/Guías): hemosim/farmacologia.py
+meds_agudos = MEDS_AGUDOS
 
 # --- 5. LÓGICA CLÍNICA ---
-def inferir_valvulopatia(foco, ciclo, patron, localizacion_soplo):
-    if not localizacion_soplo: return "Sin soplos reportados."
-    dx = "Soplo no específico"
-    if foco == "Aórtico":
-        if ciclo == "Sistólico": dx = "**Posible Estenosis Aórtica** (Busca pulso parvus et tardus)."
-        elif ciclo == "Diastólico": dx = "**Posible Insuficiencia Aórtica** (Busca presión pulso amplia)."
-    elif foco == "Mitral":
-        if ciclo == "Sistólico": dx = "**Posible Insuficiencia Mitral** (Busca irradiación axila)."
-        elif ciclo == "Diastólico": dx = "**Posible Estenosis Mitral** (Busca chasquido de apertura)."
-    elif foco == "Pulmonar" and ciclo == "Diastólico":
-         dx = "**Posible Insuficiencia Pulmonar** (Soplo de Graham Steell)."
-    elif foco == "Tricúspideo" and ciclo == "Sistólico":
-        dx = "**Posible Insuficiencia Tricuspídea** (Signo Rivero-Carvallo)."
-    return dx
-
-def calcular_fenotipo_fevi(fevi):
-    if fevi < 40: return "HFrEF (FEVI Reducida < 40%)"
-    elif 40 <= fevi < 50: return "HFmrEF (FEVI Levemente Reducida 40-49%)"
-    else: return "HFpEF (FEVI Preservada ≥ 50%)"
+cronometro.marcar("5. LÓGICA CLÍNICA")
+# inferir_valvulopatia y calcular_fenotipo_fevi viven en hemosim/clinica.py; pesos, cortes y mensajes en
+# hemosim/datos/reglas/*.json. Un archivo modificado se recompila aquí solo (sin reiniciar el servidor).
+errores_reglas = {nombre: error for nombre, error in recargar_reglas().items() if error}
+
+def clave_historia(historia):
+    """Clave del caso en el caché compartido: la historia y la versión de las tablas de reglas."""
+    return huella(dict(historia, reglas=firma_reglas()))
 
 # --- 6. INTERFAZ: BARRA LATERAL ---
-with st.sidebar:
+cronometro.marcar("6. INTERFAZ: BARRA LATERAL")
+SIN_CIUDAD = "--- Seleccione ---"
+
+# Casos guardados (hemosim/serializacion.py). Cargar uno escribe todos los widgets en el estado
+# antes de dibujarlos: la página aparece con el caso completo en un solo rerun.
+def intervenciones_actuales():
+    """Intervenciones marcadas en "💊 Terapéutica" como (clave, inicio_min, dosis)."""
+    return tuple(
+        (clave, st.session_state.get(f"inicio_{clave}", 0), st.session_state.get(f"dosis_{clave}", 1.0))
+        for clave in INTERVENCIONES if st.session_state.get(f"intervencion_{clave}")
+    )
+
+
+def hidratar(datos):
+    """Escribe un caso en el estado de los widgets (barra lateral e intervenciones)."""
+    for campo, valor in datos.items():
+        if campo == "intervenciones": continue
+        # Campo oculto en el caso: el widget vuelve a su valor por defecto
+        if valor is None: st.session_state.pop(campo, None)
+        else: st.session_state[campo] = list(valor) if isinstance(valor, tuple) else valor
+    # Casos anteriores a las etiquetas guardan sólo el nombre: se resuelve si no se repite entre departamentos
+    ciudad = st.session_state["ciudad"] = geografia.etiqueta(datos["ciudad"]) or SIN_CIUDAD
+    st.session_state["busqueda_municipio"] = "" if ciudad == SIN_CIUDAD else ciudad
+    dosis = {clave: (inicio, escala) for clave, inicio, escala in datos["intervenciones"] or ()}
+    for clave in INTERVENCIONES:
+        st.session_state[f"intervencion_{clave}"] = clave in dosis
+        if clave in dosis:
+            st.session_state[f"inicio_{clave}"], st.session_state[f"dosis_{clave}"] = dosis[clave]
+        else:
+            st.session_state.pop(f"inicio_{clave}", None)
+            st.session_state.pop(f"dosis_{clave}", None)
+
+
+def elegir_municipio():
+    """Al cambiar la búsqueda, el selector pasa a la primera coincidencia (o a ninguna)."""
+    coincidencias = geografia.buscar(st.session_state["busqueda_municipio"], limite=1)
+    st.session_state["ciudad"] = coincidencias[0] if coincidencias else SIN_CIUDAD
+
+
+# Enlace compartido (?caso=...): se aplica una vez por código, antes de dibujar la barra lateral
+codigo_url = st.query_params.get("caso")
+if codigo_url and codigo_url != st.session_state.get("caso_url"):
+    st.session_state["caso_url"] = codigo_url
+    try:
+        hidratar(desde_texto(codigo_url))
+    except ValueError as error:
+        st.sidebar.error(f"No se pudo cargar el caso del enlace: {error}")
+
+# Sin fragmento: casi todo widget de la historia cambia el caso, y un rerun parcial seguido de st.rerun()
+# dibujaría la barra lateral dos veces por edición. Los reproductores e imágenes sí son fragmentos.
+def historia_clinica():
+    """Widgets de la historia clínica; devuelve sus valores (los datos del caso)."""
     st.image("https://cdn-icons-png.flaticon.com/512/3063/3063823.png", width=50)
     st.title("Historia Clínica")
     st.markdown("---")
     
     # 1. Origen
     st.subheader("1. Origen y Demografía")
-    # Usa municipios_base (la lista completa)
-    ciudad = st.selectbox("Municipio", ["--- Seleccione ---"] + municipios_base)
-    es_zona_chagas = ciudad in zonas_chagas
+    # Búsqueda indexada (acepta texto sin tildes); sólo se envían las coincidencias al selector
+    # El valor del selector vive en el estado: lo fija elegir_municipio (o hidratar, al cargar un caso)
+    busqueda_municipio = st.text_input("Buscar municipio", placeholder="Ej: Caqueza", key="busqueda_municipio",
+                                       on_change=elegir_municipio)
+    coincidencias = geografia.buscar(busqueda_municipio)
+    ciudad = st.selectbox("Municipio", [SIN_CIUDAD] + coincidencias, key="ciudad")
+    if busqueda_municipio and not coincidencias: st.caption("Sin coincidencias.")
+    es_zona_chagas = geografia.es_zona_chagas(ciudad)
     if es_zona_chagas: st.error(f"🚨 **ALERTA EPIDEMIOLÓGICA:** Riesgo de Chagas en {ciudad}.")
     
     c_d1, c_d2 = st.columns(2)
-    edad = c_d1.number_input("Edad", 18, 120, 65)
-    sexo = c_d2.selectbox("Sexo", ["M", "F", "Otro"])
+    edad = c_d1.number_input("Edad", 18, 120, 65, key="edad")
+    sexo = c_d2.selectbox("Sexo", ["M", "F", "Otro"], key="sexo")
 
     # 2. Antecedentes
     st.subheader("2. Antecedentes")
-    antecedentes = st.multiselect("Patologías:", antecedentes_lista)
+    antecedentes = st.multiselect("Patologías:", antecedentes_lista, key="antecedentes")
 
     # 3. Síntomas
     st.subheader("3. Síntomas")
-    sintomas = st.multiselect("Seleccione:", ["Disnea esfuerzo", "Disnea reposo", "Disnea Paroxística Nocturna", "Ortopnea", "Bendopnea", "Fatiga", "Angina", "Edema MsIs (Refiere)", "Vómito", "Diarrea", "Sangrado"])
+    sintomas = st.multiselect("Seleccione:", ["Disnea esfuerzo", "Disnea reposo", "Disnea Paroxística Nocturna", "Ortopnea", "Bendopnea", "Fatiga", "Angina", "Edema MsIs (Refiere)", "Vómito", "Diarrea", "Sangrado"], key="sintomas")
 
     # 4. Signos Vitales
     st.subheader("4. Signos Vitales")
     # Selector de Ritmo (SELECCIÓN AQUÍ, VISUALIZACIÓN EN PANEL PRINCIPAL)
-    ritmo = st.selectbox("Ritmo", ["Sinusal", "Fibrilación Auricular", "Flutter Atrial", "Marcapasos"])
+    ritmo = st.selectbox("Ritmo", ["Sinusal", "Fibrilación Auricular", "Flutter Atrial", "Marcapasos"], key="ritmo")
     
     c_v1, c_v2 = st.columns(2)
-    pas = c_v1.number_input("PAS (mmHg)", value=120, step=1)
-    pad = c_v2.number_input("PAD (mmHg)", value=80, step=1)
-    fc = c_v1.number_input("FC (lpm)", value=80, step=1)
-    fr = c_v2.number_input("FR (rpm)", value=18, step=1)
-    sato2 = c_v1.number_input("SatO2 (%)", value=92, step=1)
-    temp_c = c_v2.number_input("Temp (°C)", value=36.5, step=0.1)
+    # Límites de hemosim/serializacion.VALORES: todo lo que la barra lateral acepta se puede guardar
+    pas = c_v1.number_input("PAS (mmHg)", 0, 300, 120, 1, key="pas")
+    pad = c_v2.number_input("PAD (mmHg)", 0, 250, 80, 1, key="pad")
+    fc = c_v1.number_input("FC (lpm)", 0, 300, 80, 1, key="fc")
+    fr = c_v2.number_input("FR (rpm)", 0, 80, 18, 1, key="fr")
+    sato2 = c_v1.number_input("SatO2 (%)", 0, 100, 92, 1, key="sato2")
+    temp_c = c_v2.number_input("Temp (°C)", 25.0, 45.0, 36.5, 0.1, key="temp_c")
     
     # 5. Examen Físico
     st.subheader("5. Examen Físico")
     
     st.markdown("🔴 **Cabeza y Cuello**")
-    iy_presente = st.radio("Ingurgitación Yugular:", ["Ausente", "Presente"], horizontal=True)
+    iy_presente = st.radio("Ingurgitación Yugular:", ["Ausente", "Presente"], horizontal=True, key="iy_presente")
     iy_desc = "Ausente"
+    col_venosa = None
     if iy_presente == "Presente":
-        col_venosa = st.number_input("Altura columna venosa (cm) desde ángulo Louis:", 0, 20, 5)
-        pvc_cmh2o = col_venosa + 5
-        pvc_mmhg = pvc_cmh2o * 0.735
-        iy_desc = f"Presente (PVC aprox {pvc_mmhg:.1f} mmHg)"
+        col_venosa = st.number_input("Altura columna venosa (cm) desde ángulo Louis:", 0, 20, 5, key="col_venosa")
+        pvc_cmh2o, pvc_mmhg = estimar_pvc(col_venosa)
+        iy_desc = describir_iy(iy_presente, col_venosa)
         st.info(f"PVC Estimada (Lewis): {pvc_cmh2o} cmH2O ≈ {pvc_mmhg:.1f} mmHg")
-        with st.expander("Ver Método de Lewis"): mostrar_imagen(recursos["pvc_lewis"])
+        with st.expander("Ver Método de Lewis"): mostrar_imagen("pvc_lewis")
     
-    rhy = st.checkbox("Reflujo Hepato-yugular")
+    rhy = st.checkbox("Reflujo Hepato-yugular", key="rhy")
 
     st.markdown("🔴 **Cardiovascular**")
     opciones_ruidos = ["R1-R2 Normales", "S3 (Galope Ventricular)"]
     if ritmo == "Sinusal":
         opciones_ruidos.extend(["S4 (Galope Atrial)", "S3 + S4 (Suma)"])
-    ruidos_agregados = st.selectbox("Ruidos:", opciones_ruidos)
+    ruidos_agregados = st.selectbox("Ruidos:", opciones_ruidos, key="ruidos_agregados")
     
     # REPRODUCTOR INTELIGENTE (Usa la función creada arriba)
     with st.expander("🎧 Escuchar Ruidos", expanded=True):
-        if "Normales" in ruidos_agregados: reproducir_multimedia(recursos["r_normales"])
-        elif "S3" in ruidos_agregados: reproducir_multimedia(recursos["r_s3"])
-        elif "S4" in ruidos_agregados: reproducir_multimedia(recursos["r_s4"])
-        elif "Suma" in ruidos_agregados: reproducir_multimedia(recursos["r_suma"])
+        if "Normales" in ruidos_agregados: grabacion = "r_normales"
+        elif "S3" in ruidos_agregados: grabacion = "r_s3"
+        elif "S4" in ruidos_agregados: grabacion = "r_s4"
+        else: grabacion = "r_suma"
+        escuchar("grabacion_ruidos", grabacion, fc, ritmo, ruidos_agregados)
 
-    tiene_soplo = st.checkbox("¿Tiene Soplo?")
+    tiene_soplo = st.checkbox("¿Tiene Soplo?", key="tiene_soplo")
     foco, ciclo, patron = "Aórtico", "Sistólico", "Holosistólico"
     if tiene_soplo:
-        foco = st.selectbox("Foco", ["Aórtico", "Mitral", "Tricúspideo", "Pulmonar"])
-        ciclo = st.selectbox("Ciclo", ["Sistólico", "Diastólico"])
-        patron = st.selectbox("Patrón", ["Diamante", "Holosistólico", "Decrescendo", "Click", "Retumbo"])
+        foco = st.selectbox("Foco", ["Aórtico", "Mitral", "Tricúspideo", "Pulmonar"], key="foco")
+        ciclo = st.selectbox("Ciclo", ["Sistólico", "Diastólico"], key="ciclo")
+        patron = st.selectbox("Patrón", ["Diamante", "Holosistólico", "Decrescendo", "Click", "Retumbo"], key="patron")
         
         with st.expander("🎧 Escuchar Soplo"):
+            grabacion = None
             if "Aórtico" in foco and ciclo == "Diastólico": 
-                reproducir_multimedia(recursos["soplo_ia"])
+                grabacion = "soplo_ia"
             elif "Mitral" in foco and ciclo == "Diastólico": 
-                reproducir_multimedia(recursos["soplo_em"])
+                grabacion = "soplo_em"
             elif "Pulmonar" in foco and ciclo == "Diastólico": 
-                reproducir_multimedia(recursos["soplo_ip"])
+                grabacion = "soplo_ip"
             elif "Aórtico" in foco: 
-                reproducir_multimedia(recursos["soplo_ea"])
+                grabacion = "soplo_ea"
             elif "Mitral" in foco: 
-                reproducir_multimedia(recursos["soplo_im"])
+                grabacion = "soplo_im"
             elif "Tricúspideo" in foco: # <--- NUEVA LÓGICA
-                reproducir_multimedia(recursos["soplo_it"])
+                grabacion = "soplo_it"
+            escuchar("grabacion_soplo", grabacion, fc, ritmo, ruidos_agregados, (ciclo, patron))
              
     st.markdown("🔴 **Tórax: Pulmonar**")
     pulmones_opciones = ["Murmullo Vesicular", "Estertores basales", "Estertores >1/2", "Sibilancias", "Roncus"]
-    pulmones = st.selectbox("Auscultación", pulmones_opciones)
+    pulmones = st.selectbox("Auscultación", pulmones_opciones, key="pulmones")
     with st.expander("🎧 Escuchar Pulmón"):
-        if "Estertores" in pulmones: reproducir_multimedia(recursos["pulm_estertores"])
-        elif "Sibilancias" in pulmones: reproducir_multimedia(recursos["pulm_sibilancias"])
-        elif "Roncus" in pulmones: reproducir_multimedia(recursos["pulm_roncus"])
-        else: reproducir_multimedia(recursos["pulm_normal"])
+        if "Estertores" in pulmones: reproducir_multimedia("pulm_estertores")
+        elif "Sibilancias" in pulmones: reproducir_multimedia("pulm_sibilancias")
+        elif "Roncus" in pulmones: reproducir_multimedia("pulm_roncus")
+        else: reproducir_multimedia("pulm_normal")
 
     st.markdown("🔴 **Abdomen**")
-    abdomen_viscera = st.selectbox("Visceromegalias", ["Sin visceromegalias", "Hepatomegalia", "Esplenomegalia", "Hepatoesplenomegalia"])
-    ascitis = st.checkbox("Onda Ascítica Presente")
+    abdomen_viscera = st.selectbox("Visceromegalias", ["Sin visceromegalias", "Hepatomegalia", "Esplenomegalia", "Hepatoesplenomegalia"], key="abdomen_viscera")
+    ascitis = st.checkbox("Onda Ascítica Presente", key="ascitis")
 
     st.markdown("🔴 **Extremidades**")
-    edema_ex = st.selectbox("Edema", ["Ausente", "Maleolar", "Rodillas", "Muslos"])
+    edema_ex = st.selectbox("Edema", ["Ausente", "Maleolar", "Rodillas", "Muslos"], key="edema_ex")
     # Nota: Se eliminó la imagen de Godet para evitar errores si no existe
         
-    pulsos = st.selectbox("Pulsos", ["Normales", "Disminuidos", "Filiformes"])
-    frialdad = st.radio("Temp. Distal", ["Caliente", "Fría/Húmeda"], horizontal=True)
-    llenado = st.number_input("Llenado Capilar (seg)", value=2, step=1)
+    pulsos = st.selectbox("Pulsos", ["Normales", "Disminuidos", "Filiformes"], key="pulsos")
+    frialdad = st.radio("Temp. Distal", ["Caliente", "Fría/Húmeda"], horizontal=True, key="frialdad")
+    llenado = st.number_input("Llenado Capilar (seg)", 0, 20, 2, 1, key="llenado")
 
     st.markdown("🔴 **Neurológico**")
-    neuro = st.selectbox("Estado Conciencia", ["Alerta", "Somnoliento", "Estuporoso"])
+    neuro = st.selectbox("Estado Conciencia", ["Alerta", "Somnoliento", "Estuporoso"], key="neuro")
 
     # 6. AYUDAS DIAGNÓSTICAS
     st.markdown("---")
     st.subheader("6. Paraclínicos (Opcional)")
-    tiene_paraclinicos = st.checkbox("¿Habilitar Ayudas Diagnósticas?", value=False)
+    tiene_paraclinicos = st.checkbox("¿Habilitar Ayudas Diagnósticas?", value=False, key="tiene_paraclinicos")
     
     lactato = 1.0
     rx_patron = "Normal"
@@ -477,17 +473,17 @@ with st.sidebar:
     
     if tiene_paraclinicos:
         st.caption("Ingrese datos disponibles:")
-        fevi = st.number_input("FEVI (%)", 0, 100, 35)
-        lactato = st.number_input("Lactato (mmol/L)", 0.0, 20.0, 1.0, 0.1)
-        rx_patron = st.selectbox("Patrón Rx", ["Normal", "Congestión Leve/Basal", "Edema Alveolar (4 Cuadrantes)"])
+        fevi = st.number_input("FEVI (%)", 0, 100, 35, key="fevi")
+        lactato = st.number_input("Lactato (mmol/L)", 0.0, 20.0, 1.0, 0.1, key="lactato")
+        rx_patron = st.selectbox("Patrón Rx", ["Normal", "Congestión Leve/Basal", "Edema Alveolar (4 Cuadrantes)"], key="rx_patron")
         with st.expander("Ver Rx Referencia"):
-            if rx_patron == "Normal": mostrar_imagen(recursos["rx_normal"])
-            elif rx_patron == "Congestión Leve/Basal": mostrar_imagen(recursos["rx_congest"])
-            else: mostrar_imagen(recursos["rx_edema"])
+            if rx_patron == "Normal": mostrar_imagen("rx_normal")
+            elif rx_patron == "Congestión Leve/Basal": mostrar_imagen("rx_congest")
+            else: mostrar_imagen("rx_edema")
         
         c_p1, c_p2 = st.columns(2)
-        tipo_peptido = c_p1.selectbox("Tipo", ["BNP", "NT-proBNP"])
-        valor_peptido = c_p2.number_input("Valor (pg/mL)", 0, 50000, 0)
+        tipo_peptido = c_p1.selectbox("Tipo", ["BNP", "NT-proBNP"], key="tipo_peptido")
+        valor_peptido = c_p2.number_input("Valor (pg/mL)", 0, 50000, 0, key="valor_peptido")
         
         # EXPLICACIÓN PÉPTIDOS AMPLIADA (DOCENCIA)
         if tipo_peptido == "NT-proBNP":
@@ -508,207 +504,249 @@ with st.sidebar:
             * *Nota: El uso de Sacubitrilo/Valsartán eleva el BNP, no el NT-proBNP.*
             """)
 
+    historia = dict(
+        edad=edad, sexo=sexo, ciudad=ciudad, es_zona_chagas=es_zona_chagas, sintomas=sintomas,
+        antecedentes=antecedentes, ritmo=ritmo, pas=pas, pad=pad, fc=fc, fr=fr, sato2=sato2, temp_c=temp_c,
+        iy_presente=iy_presente, iy_desc=iy_desc, col_venosa=col_venosa, rhy=rhy, ruidos_agregados=ruidos_agregados,
+        tiene_soplo=tiene_soplo, foco=foco, ciclo=ciclo, patron=patron, pulmones=pulmones,
+        abdomen_viscera=abdomen_viscera, ascitis=ascitis, edema_ex=edema_ex, pulsos=pulsos, frialdad=frialdad,
+        llenado=llenado, neuro=neuro, tiene_paraclinicos=tiene_paraclinicos, lactato=lactato, rx_patron=rx_patron,
+        tipo_peptido=tipo_peptido, valor_peptido=valor_peptido, fevi=fevi,
+    )
+    return historia
+
+
+with st.sidebar:
+    historia = historia_clinica()
+
 # --- 7. CÁLCULOS Y LOGICA ---
-pam = pad + (pas - pad)/3
-pp = pas - pad
-ppp = (pp / pas) * 100 if pas > 0 else 0
-fenotipo_msg = calcular_fenotipo_fevi(fevi) if tiene_paraclinicos else "No determinado (Requiere Eco)"
-
-# Score Congestión (Eje X)
-score_congest = 0
-if "Ortopnea" in sintomas: score_congest += 3
-if "reposo" in str(sintomas): score_congest += 4
-if "Disnea Paroxística Nocturna" in sintomas: score_congest += 3
-if iy_presente == "Presente": score_congest += 4
-if rhy: score_congest += 2
-if "Estertores" in pulmones: score_congest += 3
-if edema_ex != "Ausente": score_congest += 2
-if ascitis: score_congest += 2
-if "Hepato" in abdomen_viscera: score_congest += 2
-if "S3" in ruidos_agregados: score_congest += 4
-
-if tiene_paraclinicos:
-    if rx_patron == "Congestión Leve/Basal": score_congest += 2
-    if rx_patron == "Edema Alveolar (4 Cuadrantes)": score_congest += 5
-    is_positive_np = False
-    if tipo_peptido == "BNP" and valor_peptido > 400: is_positive_np = True
-    elif tipo_peptido == "NT-proBNP":
-        if edad < 50 and valor_peptido > 450: is_positive_np = True
-        elif 50 <= edad <= 75 and valor_peptido > 900: is_positive_np = True
-        elif edad > 75 and valor_peptido > 1800: is_positive_np = True
-    if is_positive_np: score_congest += 3
-
-if "Vómito" in sintomas or "Diarrea" in sintomas or "Sangrado" in sintomas:
-    score_congest -= 3 # Pérdidas reducen congestión aparente
-
-pcp_sim = 12 + score_congest
-if pcp_sim > 38: pcp_sim = 38 
-if pcp_sim < 5: pcp_sim = 5 
-
-# Score Perfusión (Eje Y)
-score_perf = 2.8
-if ppp < 25: score_perf -= 0.6
-if frialdad != "Caliente": score_perf -= 0.6
-if llenado > 3: score_perf -= 0.4
-if pulsos == "Filiformes": score_perf -= 0.5
-if neuro != "Alerta": score_perf -= 0.5
-if tiene_paraclinicos and lactato >= 2.0: score_perf -= 0.8
-
-if pam < 65:
-    score_perf -= 1.5 # Shock
-
-ic_sim = max(1.0, score_perf) 
-
-# Clasificación Stevenson
-if pcp_sim > 18 and ic_sim > 2.2: cuadrante = "B: Húmedo y Caliente"
-elif pcp_sim > 18 and ic_sim <= 2.2: cuadrante = "C: Húmedo y Frío"
-elif pcp_sim <= 18 and ic_sim <= 2.2: cuadrante = "L: Seco y Frío"
-else: cuadrante = "A: Seco y Caliente"
+cronometro.marcar("7. CÁLCULOS Y LOGICA")
+# Motor vectorizado compartido con el modo de cohortes (lote de un paciente). Un mismo caso
+# docente cargado por toda la clase se calcula una sola vez por proceso.
+clave_caso = clave_historia(historia)
+calculo = cache_compartido.obtener("calculo", clave_caso, lambda: dict(
+    evaluar_caso(**{campo: historia[campo] for campo in CAMPOS}),
+    fenotipo_msg=(calcular_fenotipo_fevi(historia["fevi"]) if historia["tiene_paraclinicos"]
+                  else "No determinado (Requiere Eco)"),
+))
+# Lo único del caso que la sesión retiene entre reruns (hemosim/caso.py)
+caso = st.session_state["caso"] = Caso(clave_caso, **historia, **calculo)
+
+# Guardar y compartir: se recalcula con sus propios botones (toma las intervenciones actuales)
+@fragmento
+def guardar_caso(caso):
+    try:
+        datos = desde_caso(caso, intervenciones_actuales())
+    except ValueError as error:  # guardar nunca debe tumbar la página
+        st.warning(f"El caso actual no se puede guardar: {error}")
+        return
+    # Cambiar una intervención re-ejecuta sólo "💊 Terapéutica": las descargas se arman al pulsarlas con la
+    # lista que ese fragmento mantiene (Streamlit las llama fuera del guion, sin acceso a st.session_state)
+    vigentes = st.session_state.setdefault("intervenciones_vigentes", list(datos["intervenciones"]))
+    c_s1, c_s2 = st.columns(2)
+    c_s1.download_button("📄 JSON", lambda: a_json(desde_caso(caso, vigentes)), file_name="caso_hemosim.json",
+                         mime="application/json", on_click="ignore")
+    c_s2.download_button("🗜️ Binario", lambda: codificar(desde_caso(caso, vigentes)), file_name="caso_hemosim.hsc",
+                         mime="application/octet-stream", on_click="ignore")
+    if st.button("🔗 Compartir por URL"):
+        st.query_params["caso"] = st.session_state["caso_url"] = a_texto(datos)
+        st.caption("Copie la dirección del navegador: abre este mismo caso.")
+    if st.button("➕ Agregar al lote"): st.session_state.setdefault("lote_casos", []).append(datos)
+    lote = st.session_state.get("lote_casos", [])
+    if lote:
+        st.caption(f"Lote: {len(lote)} casos")
+        c_s1.download_button("📚 Lote JSONL", escribir_lote(lote), file_name="casos_hemosim.jsonl", mime="application/jsonl", on_click="ignore")
+        c_s2.download_button("📚 Lote binario", escribir_lote(lote, "binario"), file_name="casos_hemosim.hsc", mime="application/octet-stream", on_click="ignore")
+
+
+with st.sidebar, st.expander("💾 Guardar / cargar caso"):
+    guardar_caso(caso)
+    st.markdown("**Cargar**")
+    archivo_casos = st.file_uploader("Caso o lote (JSON, JSON Lines, binario)", type=["json", "jsonl", "hsc", "txt"], key="archivo_casos")
+    codigo_caso = st.text_input("…o pegue un código de caso", key="codigo_caso")
+    casos_cargados = []
+    try:
+        if archivo_casos: casos_cargados = leer_lote(archivo_casos.getvalue())
+        elif codigo_caso: casos_cargados = [desde_texto(codigo_caso)]
+    except (ValueError, KeyError) as error:
+        st.error(f"Archivo o código inválido: {error}")
+    if casos_cargados:
+        numero = 0
+        if len(casos_cargados) > 1:
+            numero = st.selectbox("Caso del lote", range(len(casos_cargados)), key="numero_caso",
+                                  format_func=lambda i: f"{i + 1}. {casos_cargados[i]['edad']} años · {casos_cargados[i]['ciudad']}")
+        st.button("📂 Cargar caso", on_click=hidratar, args=(casos_cargados[numero],))
 
 # --- 8. PANEL PRINCIPAL ---
+cronometro.marcar("8. PANEL PRINCIPAL")
 st.title("🫀 HemoSim: Simulador Clínico")
 st.markdown("**Simulación de Casos en Falla Cardíaca Aguda** | Dr. Javier Rodríguez Prada")
 
 # --- MONITOR CARDÍACO EN CABECERA (PANEL PRINCIPAL) ---
 # Se mueve aquí para que ocupe todo el ancho y se vea el DII completo
-st.markdown("### 🖥️ Monitor de Ritmo Cardíaco (DII)")
-url_ritmo_seleccionado = recursos["ritmo_sinusal"] # Default
-if ritmo == "Fibrilación Auricular": url_ritmo_seleccionado = recursos["ritmo_fa"]
-elif ritmo == "Flutter Atrial": url_ritmo_seleccionado = recursos["ritmo_flutter"]
-elif ritmo == "Marcapasos": url_ritmo_seleccionado = recursos["ritmo_mcp"]
-
-# Mostrar video ancho
-mostrar_video_ritmo(url_ritmo_seleccionado, ritmo)
+# El trazo se genera en el servidor una vez por (ritmo, FC cuantizada) y el navegador lo barre sin reruns
+VIDEOS_RITMO = {"Sinusal": "ritmo_sinusal", "Fibrilación Auricular": "ritmo_fa", "Flutter Atrial": "ritmo_flutter", "Marcapasos": "ritmo_mcp"}
+
+@fragmento
+def monitor_ritmo(ritmo, fc):
+    st.markdown("### 🖥️ Monitor de Ritmo Cardíaco (DII)")
+    if st.toggle("🎞️ Video grabado", key="monitor_video"):
+        reproducir_multimedia(VIDEOS_RITMO.get(ritmo, "ritmo_sinusal"))
+    else:
+        st.iframe(cache_compartido.obtener("monitor", cuantizar_ritmo(fc, ritmo), partial(html_monitor, fc, ritmo)), height=210)
+
+
+monitor_ritmo(caso.ritmo, caso.fc)
 st.divider()
 
-# RESUMEN
-with st.expander("📋 **Ficha de Resumen Clínico**", expanded=True):
-    r1, r2, r3 = st.columns(3)
-    with r1:
-        st.markdown(f"**Paciente:** {edad} años, {sexo}.")
-        st.markdown(f"**Procedencia:** {ciudad}.")
-        if es_zona_chagas: st.error("⚠️ **Alerta Epidemiológica:** Zona Endémica Chagas.")
-        if tiene_paraclinicos: st.info(f"**Fenotipo (Eco):** {fenotipo_msg}")
-    with r2:
-        st.markdown(f"**Signos Vitales:** PA {pas}/{pad} | FC {fc} | FR {fr} | T {temp_c}°C")
-        if sato2 < 90: st.error(f"🚨 **Hipoxemia:** SatO2 {sato2}%")
-        else: st.markdown(f"**SatO2:** {sato2}%")
-        if pam < 65: st.error(f"⚠️ **HIPOTENSIÓN/SHOCK:** PAM {pam:.0f} mmHg")
-        if tiene_paraclinicos and lactato >= 2.0: st.error(f"⚠️ **Hipoperfusión:** Lactato {lactato} mmol/L")
-    with r3:
-        st.markdown("**Hallazgos Positivos:**")
-        hallazgos = []
-        if "S3" in ruidos_agregados: hallazgos.append("R3 presente")
-        if "Estertores" in pulmones: hallazgos.append("Estertores")
-        if edema_ex != "Ausente": hallazgos.append(f"Edema {edema_ex}")
-        if ascitis: hallazgos.append("Ascitis")
-        if "Hepato" in abdomen_viscera: hallazgos.append(abdomen_viscera)
-        if "Ortopnea" in sintomas: hallazgos.append("Ortopnea")
-        if "Vómito" in sintomas or "Diarrea" in sintomas: hallazgos.append("Pérdidas GI")
-        if iy_presente == "Presente": hallazgos.append(f"IY ({iy_desc})")
-        st.markdown(", ".join(hallazgos) if hallazgos else "Sin hallazgos mayores.")
-
-# GENERAR PDF
-if st.button("📥 Descargar Resumen del Caso (PDF)"):
-    pdf = PDF()
-    pdf.add_page()
-    pdf.chapter_title("1. Datos del Paciente")
-    pdf.chapter_body(f"Edad: {edad} | Sexo: {sexo} | Ciudad: {ciudad} (Riesgo Chagas: {'SI' if es_zona_chagas else 'NO'})")
-    pdf.chapter_title("2. Perfil Hemodinámico")
-    pdf.chapter_body(f"PA: {pas}/{pad} (PAM {pam:.0f}) | FC: {fc} | SatO2: {sato2}%")
-    pdf.chapter_body(f"Cuadrante Stevenson: {cuadrante}")
-    pdf.chapter_body(f"PPP: {ppp:.1f}% | Perfusión: {frialdad}")
-    pdf.chapter_title("3. Hallazgos Clínicos")
-    pdf.chapter_body(f"Ruidos: {ruidos_agregados} | Pulmón: {pulmones}")
-    if "Hepato" in abdomen_viscera or ascitis: pdf.chapter_body(f"Abdomen: {abdomen_viscera} {'Ascitis' if ascitis else ''}")
-    if iy_presente == "Presente": pdf.chapter_body(f"Cuello: {iy_desc}")
-    if tiene_paraclinicos:
-        pdf.chapter_body(f"Fenotipo FEVI: {fenotipo_msg} | Lactato: {lactato}")
-    
-    pdf_output = pdf.output(dest='S').encode('latin-1', 'ignore') 
-    st.markdown(create_download_link(pdf_output, "Reporte_HemoSim"), unsafe_allow_html=True)
-
-# TABLERO HEMODINÁMICO
-st.markdown("### 📊 Hemodinamia Bedside")
-c_m1, c_m2, c_m3, c_m4 = st.columns(4)
-c_m1.metric("PAM", f"{pam:.0f} mmHg")
-c_m1.caption("Presión de perfusión. < 65 mmHg define Shock.")
-c_m2.metric("P. Pulso", f"{pp} mmHg")
-c_m2.caption("PAS-PAD. Refleja volumen sistólico.")
-c_m3.metric("PPP", f"{ppp:.1f}%", delta="Bajo" if ppp<25 else "OK", delta_color="inverse")
-c_m3.caption("Si < 25%, alta probabilidad de IC < 2.2.")
-c_m4.metric("Perfil", cuadrante)
-if tiene_soplo: st.info(f"🩺 **Soplo:** {inferir_valvulopatia(foco, ciclo, patron, True)}")
+# Resumen, PDF y métricas: dependen sólo del caso (historia y valores derivados)
+@fragmento
+def tablero_hemodinamico(caso):
+    # RESUMEN
+    with st.expander("📋 **Ficha de Resumen Clínico**", expanded=True):
+        r1, r2, r3 = st.columns(3)
+        with r1:
+            st.markdown(f"**Paciente:** {caso.edad} años, {caso.sexo}.")
+            st.markdown(f"**Procedencia:** {caso.ciudad}.")
+            if caso.es_zona_chagas: st.error("⚠️ **Alerta Epidemiológica:** Zona Endémica Chagas.")
+            if caso.tiene_paraclinicos: st.info(f"**Fenotipo (Eco):** {caso.fenotipo_msg}")
+        with r2:
+            st.markdown(f"**Signos Vitales:** PA {caso.pas}/{caso.pad} | FC {caso.fc} | FR {caso.fr} | T {caso.temp_c}°C")
+            if caso.sato2 < 90: st.error(f"🚨 **Hipoxemia:** SatO2 {caso.sato2}%")
+            else: st.markdown(f"**SatO2:** {caso.sato2}%")
+            if caso.pam < 65: st.error(f"⚠️ **HIPOTENSIÓN/SHOCK:** PAM {caso.pam:.0f} mmHg")
+            if caso.tiene_paraclinicos and caso.lactato >= 2.0: st.error(f"⚠️ **Hipoperfusión:** Lactato {caso.lactato} mmol/L")
+        with r3:
+            st.markdown("**Hallazgos Positivos:**")
+            hallazgos = []
+            if "S3" in caso.ruidos_agregados: hallazgos.append("R3 presente")
+            if "Estertores" in caso.pulmones: hallazgos.append("Estertores")
+            if caso.edema_ex != "Ausente": hallazgos.append(f"Edema {caso.edema_ex}")
+            if caso.ascitis: hallazgos.append("Ascitis")
+            if "Hepato" in caso.abdomen_viscera: hallazgos.append(caso.abdomen_viscera)
+            if "Ortopnea" in caso.sintomas: hallazgos.append("Ortopnea")
+            if "Vómito" in caso.sintomas or "Diarrea" in caso.sintomas: hallazgos.append("Pérdidas GI")
+            if caso.iy_presente == "Presente": hallazgos.append(f"IY ({caso.iy_desc})")
+            st.markdown(", ".join(hallazgos) if hallazgos else "Sin hallazgos mayores.")
+
+    # GENERAR PDF (caché por hash del caso; se renderiza al hacer clic y se descarga como archivo)
+    st.download_button(
+        "📥 Descargar Resumen del Caso (PDF)", data=partial(cache_compartido.obtener, "reporte", caso.clave, partial(generar_reporte, caso.reporte())),
+        file_name="Reporte_HemoSim.pdf", mime="application/pdf", on_click="ignore",
+    )
+
+    # TABLERO HEMODINÁMICO
+    st.markdown("### 📊 Hemodinamia Bedside")
+    c_m1, c_m2, c_m3, c_m4 = st.columns(4)
+    c_m1.metric("PAM", f"{caso.pam:.0f} mmHg")
+    c_m1.caption("Presión de perfusión. < 65 mmHg define Shock.")
+    c_m2.metric("P. Pulso", f"{caso.pp} mmHg")
+    c_m2.caption("PAS-PAD. Refleja volumen sistólico.")
+    c_m3.metric("PPP", f"{caso.ppp:.1f}%", delta="Bajo" if caso.ppp<25 else "OK", delta_color="inverse")
+    c_m3.caption("Si < 25%, alta probabilidad de IC < 2.2.")
+    c_m4.metric("Perfil", caso.cuadrante)
+    if caso.tiene_soplo: st.info(f"🩺 **Soplo:** {inferir_valvulopatia(caso.foco, caso.ciclo, caso.patron, True)}")
+
+
+tablero_hemodinamico(caso)
 
 # TABS
-tabs = st.tabs(["📉 Stevenson", "💊 Terapéutica", "🏠 Egreso (HFrEF)", "⚖️ IC FEVI Preservada", "📚 Referencias"])
+nombres_tabs = ["📉 Stevenson", "💊 Terapéutica", "🏠 Egreso (HFrEF)", "⚖️ IC FEVI Preservada", "📚 Referencias"]
+tabs = st.tabs(nombres_tabs)
 
 # 1. GRÁFICO
-with tabs[0]:
+@fragmento
+def pestana_stevenson(caso):
+    pas, pad, pcp_sim, ic_sim, cuadrante = caso.pas, caso.pad, caso.pcp_sim, caso.ic_sim, caso.cuadrante
     c_g1, c_g2 = st.columns([3, 1])
     with c_g1:
-        fig = go.Figure()
-        fig.add_shape(type="rect", x0=0, y0=2.2, x1=18, y1=5, fillcolor="rgba(144, 238, 144, 0.2)", line_width=0)
-        fig.add_shape(type="rect", x0=18, y0=2.2, x1=40, y1=5, fillcolor="rgba(255, 218, 185, 0.4)", line_width=0)
-        fig.add_shape(type="rect", x0=0, y0=0, x1=18, y1=2.2, fillcolor="rgba(173, 216, 230, 0.3)", line_width=0)
-        fig.add_shape(type="rect", x0=18, y0=0, x1=40, y1=2.2, fillcolor="rgba(255, 182, 193, 0.4)", line_width=0)
-        fig.add_vline(x=18, line_dash="solid", line_color="gray")
-        fig.add_hline(y=2.2, line_dash="solid", line_color="gray")
-        
-        fig.add_annotation(x=9, y=4.5, text="<b>A: SECO / CALIENTE</b>", showarrow=False, font=dict(color="green"))
-        fig.add_annotation(x=29, y=4.5, text="<b>B: HÚMEDO / CALIENTE</b>", showarrow=False, font=dict(color="orange"))
-        fig.add_annotation(x=9, y=0.5, text="<b>L: SECO / FRÍO</b>", showarrow=False, font=dict(color="blue"))
-        fig.add_annotation(x=29, y=0.5, text="<b>C: HÚMEDO / FRÍO</b>", showarrow=False, font=dict(color="red"))
-
-        fig.add_trace(go.Scatter(x=[pcp_sim], y=[ic_sim], mode='markers+text', marker=dict(size=25, color='black', line=dict(width=2, color='white')), text=["<b>PACIENTE</b>"], textposition="top center"))
-        fig.update_layout(title="Cuadrante Forrester/Stevenson", xaxis_title="Congestión (PCP)", yaxis_title="Perfusión (IC)", height=500)
-        st.plotly_chart(fig, use_container_width=True)
+        grafico_stevenson = st.container()
+        with st.expander("👥 Superponer cohorte (CSV / JSON Lines)"):
+            archivo_cohorte = st.file_uploader("Casos calificados con el motor del simulador", type=["csv", "jsonl", "json"], key="archivo_cohorte")
+            estilo_densidad = st.radio("Cohortes grandes como:", ["Mapa de calor", "Contornos"], horizontal=True, key="estilo_densidad")
+        with st.expander("🎲 Modo incertidumbre (error de medición)"):
+            modo_incertidumbre = st.toggle("Propagar el error de medición del examen", key="modo_incertidumbre")
+            distribucion_error = st.radio("Distribución del error:", ["normal", "uniforme"], horizontal=True, key="distribucion_error")
+            st.caption("Normal: desviación estándar · Uniforme: ± semiamplitud")
+            ce1, ce2, ce3, ce4, ce5 = st.columns(5)
+            errores = {
+                "pas": ce1.number_input("PAS (mmHg)", 0.0, 30.0, ERRORES_MEDICION["pas"][1], 1.0, key="error_pas"),
+                "pad": ce2.number_input("PAD (mmHg)", 0.0, 30.0, ERRORES_MEDICION["pad"][1], 1.0, key="error_pad"),
+                "llenado": ce3.number_input("Llenado (s)", 0.0, 3.0, ERRORES_MEDICION["llenado"][1], 0.1, key="error_llenado"),
+                "col_venosa": ce4.number_input("Columna (cm)", 0.0, 5.0, ERRORES_MEDICION["col_venosa"][1], 0.5, key="error_col_venosa"),
+                "lactato": ce5.number_input("Lactato", 0.0, 2.0, ERRORES_MEDICION["lactato"][1], 0.1, key="error_lactato"),
+            }
+        with st.expander("🗺️ Mapa de sensibilidad (dos variables)"):
+            if st.toggle("Recorrer dos variables con el resto del caso fijo", key="modo_sensibilidad"):
+                mapa_sensibilidad_caso(caso)
+        # Plantilla cacheada por proceso: sólo se agrega el punto del paciente (y la cohorte, si hay)
+        if archivo_cohorte:
+            pcp_cohorte, ic_cohorte = calificar_cohorte(archivo_cohorte.getvalue(), archivo_cohorte.name, firma_reglas())
+            fig = figura_cohorte(pcp_cohorte, ic_cohorte, pcp_sim, ic_sim, estilo="heatmap" if estilo_densidad == "Mapa de calor" else "contour")
+        elif modo_incertidumbre:
+            fig = figura_stevenson(pcp_sim, ic_sim, TIPOS_COHORTE)
+        else:
+            # Figura compartida entre sesiones: no se modifica después de este punto
+            fig = cache_compartido.obtener("figura", caso.clave, lambda: figura_stevenson(pcp_sim, ic_sim))
+        if modo_incertidumbre:
+            # 100k lecturas perturbadas calificadas en un solo lote (una vez por caso y errores)
+            errores = {campo: (distribucion_error, escala) for campo, escala in errores.items()}
+            incertidumbre = cache_compartido.obtener(
+                "incertidumbre", (caso.clave, clave_canonica(errores)), lambda: simular(caso.motor(), caso.col_venosa, errores, muestra=PUNTOS_NUBE),
+            )
+            agregar_nube(fig, incertidumbre["pcp_sim"], incertidumbre["ic_sim"])
+        grafico_stevenson.plotly_chart(fig, use_container_width=True, key="fig_stevenson")
     with c_g2:
         st.markdown(f"**Estado: {cuadrante}**")
-        # MENSAJES DOCENTES DINÁMICOS
-        if cuadrante.startswith("B"): 
-            if pas >= 180 or pad >= 120:
-                st.warning("🔥 **Fenotipo Vascular (Crisis HTA):** Redistribución. **Vasodilatador** >> Diurético.")
-            else:
-                st.success("🫀 **Fenotipo Cardíaco:** Sobrecarga volumen. **Diuréticos** son clave.")
-        elif cuadrante.startswith("C"):
-            if pas < 90:
-                st.error("🚨 **Shock Cardiogénico:** **Vasopresor (Norepi)** inmediato.")
-            else:
-                st.warning("📉 **Bajo Gasto Normotenso:** **Inotrópicos** + Diuréticos.")
-        elif cuadrante.startswith("L"):
-            if pas < 90:
-                st.error("🩸 **Hipovolemia/Shock:** **Líquidos IV** con cautela -> Vasopresor.")
-            else:
-                st.info("💧 **Perfil Seco/Frío:** Evaluar **Líquidos IV** (Reto de fluidos).")
+        # MENSAJES DOCENTES DINÁMICOS (hemosim/datos/reglas/mensajes.json)
+        mensaje = mensaje_tratamiento(cuadrante, pas, pad)
+        if mensaje: getattr(st, mensaje.nivel)(mensaje.texto)
+        if modo_incertidumbre:
+            st.markdown("**Probabilidad por cuadrante:**")
+            for nombre_cuadrante, probabilidad in incertidumbre["probabilidades"].items():
+                st.progress(probabilidad, text=f"{nombre_cuadrante}: {probabilidad:.0%}")
+
+
+def mapa_sensibilidad_caso(caso):
+    cs1, cs2, cs3 = st.columns([2, 2, 1])
+    eje_x = cs1.selectbox("Eje X", list(EJES), index=list(EJES).index("pas"), format_func=lambda eje: EJES[eje][0], key="eje_x_sensibilidad")
+    ejes_y = [eje for eje in EJES if eje != eje_x]
+    eje_y = cs2.selectbox("Eje Y", ejes_y, index=ejes_y.index("lactato") if "lactato" in ejes_y else 0,
+                          format_func=lambda eje: EJES[eje][0], key="eje_y_sensibilidad")
+    resolucion = cs3.selectbox("Resolución", [50, 100, 200], index=2, key="resolucion_sensibilidad")
+    # La grilla depende sólo de las entradas fijas: mover el paciente sobre los ejes o volver a un par ya visto no recalcula
+    motor = caso.motor()
+    mapa = cache_compartido.obtener("sensibilidad", clave_mapa(motor, eje_x, eje_y, resolucion),
+                                    lambda: mapa_sensibilidad(motor, eje_x, eje_y, resolucion))
+    paciente = posicion(motor, eje_x), posicion(motor, eje_y)
+    st.plotly_chart(figura_sensibilidad(mapa, rotulos(eje_x, eje_y), paciente), use_container_width=True, key="fig_sensibilidad")
+    fuera = [f"{rotulo} en {'toda la grilla' if fraccion else 'ninguna celda'}" for rotulo, fraccion in fraccion_limites(mapa).items()
+             if fraccion in (0, 1)]
+    if fuera: st.caption("Límites que no cruzan el mapa: " + " · ".join(fuera))
+
+
+with tabs[0]:
+    cronometro.marcar(f"Pestaña {nombres_tabs[0]}")
+    pestana_stevenson(caso)
 
 # 2. SIMULACIÓN
-with tabs[1]:
+@fragmento
+def pestana_terapeutica(caso):
+    pcp_sim, ic_sim, pas, ritmo, neuro, sintomas = caso.pcp_sim, caso.ic_sim, caso.pas, caso.ritmo, caso.neuro, caso.sintomas
     st.markdown("### 🧪 Farmacología Aguda")
     st.info("Seleccione intervención para ver vector y **seguridad**.")
     
-    cx1, cx2, cx3, cx4, cx5, cx6 = st.columns(6)
-    dx, dy = 0, 0
-    sel_med = None
-    
-    with cx1:
-        if st.checkbox("Oxígeno / VNI"): 
-            dx=0; dy=0; sel_med="oxigeno" # O2 no mueve cuadrante
-    with cx2:
-        if st.checkbox("Furosemida"): dx-=8; dy+=0.1; sel_med="diureticos" 
-    with cx3:
-        if st.checkbox("Vasodilatador"): dx-=8; dy+=0.8; sel_med="vasodilatadores" 
-    with cx4:
-        if st.checkbox("Inotrópico"): dy+=1.5; dx-=2; sel_med="inotropicos" 
-    with cx5:
-        if st.checkbox("Vasopresor"): dy+=0.3; dx+=1; sel_med="vasopresores" 
-    with cx6:
-        # CORRECCIÓN VECTORIAL: LÍQUIDOS EN PERFIL L
-        # Aumentan Perfusión (Y) sustancialmente por Frank-Starling
-        # Aumentan Congestión (X) moderadamente (restauran volemia)
-        if st.checkbox("Líquidos IV"): dx+=4; dy+=1.5; sel_med="liquidos" 
-
-    if sel_med:
+    # Vector neto de cada intervención y su cinética: hemosim/terapia.py (INTERVENCIONES).
+    # O2 no mueve cuadrante; los líquidos en perfil L aumentan perfusión (Frank-Starling)
+    # y congestión moderadamente (restauran volemia).
+    seleccion = []
+    for columna, clave in zip(st.columns(6), INTERVENCIONES):
+        with columna:
+            if st.checkbox(INTERVENCIONES[clave]["nombre"], key=f"intervencion_{clave}"): seleccion.append(clave)
+    dx = sum(INTERVENCIONES[clave]["dx"] for clave in seleccion)
+    dy = sum(INTERVENCIONES[clave]["dy"] for clave in seleccion)
+
+    for sel_med in seleccion:
         info = meds_agudos[sel_med]
         st.markdown("---")
         k1, k2 = st.columns(2)
@@ -718,18 +756,57 @@ with tabs[1]:
         with k2:
             st.warning(f"**Adversos:** {info['adverso']}")
             st.error(f"**Monitoreo:**\n{info['monitor']}")
-        st.markdown("---")
-    
+    if seleccion: st.markdown("---")
+
+    with st.expander("⏱️ Trayectoria temporal (inicio y decaimiento de cada intervención)"):
+        simular_trayectoria = st.toggle("Simular trayectoria", key="simular_trayectoria")
+        horizonte_h = st.slider("Horizonte (h)", 1, 24, 6, key="horizonte_trayectoria")
+        regimen = []
+        for columna, clave in zip(st.columns(max(len(seleccion), 1)), seleccion):
+            with columna:
+                st.markdown(f"**{INTERVENCIONES[clave]['nombre']}**")
+                inicio = st.number_input("Inicio (min)", 0, 24 * 60, 0, 15, key=f"inicio_{clave}")
+                dosis = st.number_input("Dosis (× estándar)", 0.0, 3.0, 1.0, 0.25, key=f"dosis_{clave}")
+                regimen.append((clave, inicio, dosis, None))
+    # Se actualiza en su lugar: las descargas de "💾 Guardar" la leen al pulsarlas (ver guardar_caso)
+    st.session_state.setdefault("intervenciones_vigentes", [])[:] = [(clave, inicio, dosis) for clave, inicio, dosis, _ in regimen]
+
+    with st.expander("🧭 Explorador de combinaciones (64 combinaciones × dosis)"):
+        # En caché por paciente: cambiar de pestaña no recalcula
+        exploracion = explorar(float(pcp_sim), float(ic_sim), pas, ritmo, neuro, unir_sintomas(sintomas))
+        solo_seguras = st.checkbox("Sólo combinaciones sin alertas de seguridad", key="solo_seguras")
+        vista = exploracion[exploracion["segura"]] if solo_seguras else exploracion
+        st.dataframe(
+            vista.drop(columns=["n_intervenciones", "segura"]).head(25), use_container_width=True,
+            column_config={
+                "combinacion": "Combinación", "escala": st.column_config.NumberColumn("Dosis", format="×%.2f"),
+                "pcp_final": "PCP final", "ic_final": "IC final", "cuadrante": "Cuadrante",
+                "distancia_a": "Distancia a A", "alertas": st.column_config.TextColumn("⚠️ Alertas", width="large"),
+            },
+        )
+        st.caption(f"{len(exploracion)} variantes evaluadas · {int(exploracion['segura'].sum())} sin alertas")
+
     new_pcp, new_ic = pcp_sim + dx, ic_sim + dy
-    fig_s = go.Figure(fig)
-    if sel_med and sel_med != "oxigeno": 
-        fig_s.add_annotation(x=new_pcp, y=new_ic, ax=pcp_sim, ay=ic_sim, xref="x", yref="y", axref="x", ayref="y", arrowwidth=4, arrowhead=2, arrowcolor="purple")
-        fig_s.add_trace(go.Scatter(x=[new_pcp], y=[new_ic], mode='markers', marker=dict(size=20, color='purple', symbol='x'), name="Post-Rx"))
+    fig_s = figura_stevenson(pcp_sim, ic_sim)
+    if simular_trayectoria and regimen:
+        # En caché por (punto de partida, régimen): repetir un escenario es inmediato
+        regimen = tuple(regimen)
+        tiempos, pcp_t, ic_t = trayectoria(float(pcp_sim), float(ic_sim), regimen, horizonte_h * 60)
+        agregar_respuesta_dosis(fig_s, *respuesta_dosis(float(pcp_sim), float(ic_sim), regimen, ESCALAS_DOSIS, horizonte_h * 60), ESCALAS_DOSIS)
+        agregar_trayectoria(fig_s, tiempos, pcp_t, ic_t)
+    elif any(clave != "oxigeno" for clave in seleccion):
+        agregar_tratamiento(fig_s, pcp_sim, ic_sim, new_pcp, new_ic)
     
-    st.plotly_chart(fig_s, use_container_width=True)
+    st.plotly_chart(fig_s, use_container_width=True, key="fig_terapeutica")
+
+
+with tabs[1]:
+    cronometro.marcar(f"Pestaña {nombres_tabs[1]}")
+    pestana_terapeutica(caso)
 
 # 3. EGRESO
-with tabs[2]:
+@fragmento
+def pestana_egreso():
     st.header("🏠 Egreso en FEVI Reducida (HFrEF)")
     st.markdown("Esquema de Titulación GDMT y Monitoreo.")
     gdmt = [
@@ -741,7 +818,7 @@ with tabs[2]:
         {"Pilar": "ARM", "Fármaco": "Espironolactona", "Inicio": "12.5-25 mg/d", "Meta": "50 mg c/24h", "Monitoreo": "K+ (>5.0 suspender), Cr"},
         {"Pilar": "iSGLT2", "Fármaco": "Dapa/Empagliflozina", "Inicio": "10 mg/d", "Meta": "10 mg c/24h", "Monitoreo": "Higiene genital, Glucosa"},
     ]
-    st.dataframe(pd.DataFrame(gdmt), use_container_width=True)
+    st.dataframe(gdmt, use_container_width=True)
     c_ad1, c_ad2 = st.columns(2)
     with c_ad1:
         st.info("💉 **Hierro IV:** Si Ferritina <100 o IST <20%.")
@@ -750,8 +827,14 @@ with tabs[2]:
         st.warning("🛡️ **Vacunación:** Influenza + Neumococo.")
         st.error("📉 **Seguimiento:** Cita < 7 días.")
 
+
+with tabs[2]:
+    cronometro.marcar(f"Pestaña {nombres_tabs[2]}")
+    pestana_egreso()
+
 # 4. FEVI PRESERVADA
-with tabs[3]:
+@fragmento
+def pestana_fevi_preservada():
     st.header("⚖️ Insuficiencia Cardíaca con FEVI Preservada (HFpEF)")
     st.markdown("FEVI ≥ 50%. El manejo se basa en fenotipos y uso de iSGLT2.")
     col_hf1, col_hf2 = st.columns(2)
@@ -762,8 +845,14 @@ with tabs[3]:
         st.warning("🔎 **Manejo por Fenotipos**")
         st.markdown("* **HTA:** ARNI/Espironolactona.\n* **FA:** Control ritmo/frecuencia/Anticoagulación.\n* **Amiloidosis TTR:** Tafamidis.")
 
+
+with tabs[3]:
+    cronometro.marcar(f"Pestaña {nombres_tabs[3]}")
+    pestana_fevi_preservada()
+
 # 5. REFERENCIAS
-with tabs[4]:
+@fragmento
+def pestana_referencias():
     st.header("📚 Referencias Bibliográficas")
     
     st.subheader("📖 Texto Guía: Braunwald's Heart Disease (Edición 2026)")
@@ -799,8 +888,42 @@ with tabs[4]:
     * **[Univ. Washington - Physical Diagnosis](https://depts.washington.edu/physdx/heart/demo.html):** Galería académica de ruidos cardíacos y soplos.
     """)
 
+
+with tabs[4]:
+    cronometro.marcar(f"Pestaña {nombres_tabs[4]}")
+    pestana_referencias()
+
+cronometro.marcar("8. PANEL PRINCIPAL")
 st.markdown("---")
 st.caption("Desarrollado por: Javier Rodríguez Prada, MD | Enero 2026")
+cronometro.finalizar()
+
+# Panel de rendimiento: sólo usuarios listados en `admins` de los secrets
+if st.session_state.get("usuario") in st.secrets.get("admins", []):
+    with st.expander("⏱️ Rendimiento por sección (admin)"):
+        st.caption(f"{registro.reruns} reruns registrados en este proceso · p50/p95 sobre una ventana móvil por sección")
+        st.dataframe(registro.resumen(), hide_index=True, use_container_width=True,
+                     column_config={"p50_ms": st.column_config.NumberColumn("p50 (ms)", format="%.1f"),
+                                    "p95_ms": st.column_config.NumberColumn("p95 (ms)", format="%.1f"),
+                                    "media_ms": st.column_config.NumberColumn("Media (ms)", format="%.1f")})
+        st.download_button("📤 Exportar JSON Lines", data=registro.exportar_jsonl, file_name="hemosim_tiempos.jsonl",
+                           mime="application/jsonl", on_click="ignore")
+    with st.expander("🎓 Caché compartido entre sesiones (modo aula)"):
+        st.caption(f"Máximo {cache_compartido.maximo:,} entradas o {cache_compartido.maximo_bytes // 2**20} MB · vencen a los {cache_compartido.ttl_s // 60} min")
+        st.dataframe(cache_compartido.resumen(), hide_index=True, use_container_width=True,
+                     column_config={"tasa_aciertos": st.column_config.ProgressColumn("Tasa de aciertos", format="percent")})
+        st.caption(f"Ruidos sintetizados: {cache_sonidos.fallos} generados · {cache_sonidos.aciertos} servidos desde memoria")
+        if st.button("🗑️ Vaciar caché compartido"): cache_compartido.vaciar()
+    with st.expander("📐 Tablas de reglas clínicas"):
+        st.caption("hemosim/datos/reglas/*.json · un archivo modificado se recompila en el siguiente rerun")
+        for nombre, error in errores_reglas.items(): st.error(f"{nombre}.json no compila (se usa la versión anterior): {error}")
+        st.dataframe(tablas_reglas().resumen(), hide_index=True, use_container_width=True)
+    with st.expander("🧠 Memoria de esta sesión"):
+        total, filas = memoria_sesion(st.session_state.to_dict(), excluir=cache_compartido.valores())
+        st.caption(f"{total / 1024:.1f} KB retenidos entre reruns (sin el caché compartido entre sesiones)")
+        st.dataframe(filas, hide_index=True, use_container_width=True)
+
+st.session_state["corrida_terminada"] = st.session_state["corrida"]
 
 
 
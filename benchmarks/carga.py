@@ -0,0 +1,364 @@
+"""
+Prueba de carga de HemoSim con sesiones concurrentes (sin red).
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.carga --usuarios 1 5 10 20 --duracion 30 --salida carga.json
+
+Levanta servidor.py (app.py con la ruta de estáticos) con `streamlit run` en
+un puerto local y lo carga como lo haría un curso entero antes de un examen:
+
+- credenciales de prueba en un secrets.toml temporal (el login real de app.py);
+- cada usuario simulado se conecta por el websocket de Streamlit como un
+  navegador, inicia sesión y repite la mezcla de eventos `MEZCLA` (edición de
+  la barra lateral, widgets de las pestañas, descarga del PDF y carga de los
+  audios y videos de los expanders) con una pausa aleatoria entre eventos;
+- como el navegador, no vuelve a pedir lo que llegó como inmutable
+  (`Cache-Control: immutable` de la ruta de estáticos).
+
+Cambiar de pestaña o abrir un expander no llega al servidor (todo el
+contenido ya está en el navegador): lo que sí cuesta son los widgets de cada
+pestaña y los archivos multimedia que el navegador pide al abrirlos.
+
+Por cada escalón de usuarios informa percentiles de latencia por evento
+(desde el mensaje del navegador hasta el fin del rerun o de la descarga),
+tasa de errores, eventos por segundo, memoria residente del servidor y
+enlaces a servidores externos en la página (debe ser 0: el monitor de ritmo y
+los multimedia son locales).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+import uuid
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+from benchmarks.rendimiento import CREDENCIALES, entorno, estadisticas  # noqa: E402
+
+SERVIDOR = os.path.join(RAIZ, "servidor.py")
+TIEMPO_LIMITE = 120
+# Eventos y pesos relativos de la mezcla de cada usuario
+MEZCLA = {"barra_lateral": 5, "pestanas": 3, "multimedia": 2, "pdf": 1}
+# Widgets que edita cada tipo de evento (clave del widget en app.py)
+WIDGETS_BARRA = (
+    "edad", "sexo", "ritmo", "pas", "pad", "fc", "fr", "sato2", "iy_presente", "col_venosa", "rhy",
+    "ruidos_agregados", "tiene_soplo", "pulmones", "abdomen_viscera", "ascitis", "edema_ex", "pulsos",
+    "frialdad", "llenado", "neuro",
+)
+WIDGETS_PESTANAS = (
+    "intervencion_oxigeno", "intervencion_diureticos", "intervencion_vasodilatadores", "intervencion_inotropicos",
+    "intervencion_vasopresores", "intervencion_liquidos", "simular_trayectoria", "modo_incertidumbre", "solo_seguras",
+)
+ETIQUETA_PDF = "📥 Descargar Resumen del Caso (PDF)"
+# Estados de fin de rerun (ForwardMsg.ScriptFinishedStatus)
+FIN_EXITOSO, FIN_ERROR_COMPILACION, FIN_PARA_RERUN, FIN_FRAGMENTO = range(4)
+_URL_EXTERNA = re.compile(r"""(?:src|href)=["'](https?://(?!127\.0\.0\.1|localhost)[^"']+)""")
+
+
+# --- Servidor local ---
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def escribir_secrets(carpeta):
+    ruta = os.path.join(carpeta, "secrets.toml")
+    lineas = ["[credentials]", *(f'{campo} = "{valor}"' for campo, valor in CREDENCIALES.items())]
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write("\n".join(lineas) + "\n")
+    return ruta
+
+
+def iniciar_servidor(puerto, secrets):
+    """`streamlit run servidor.py` local; espera a que responda /_stcore/health."""
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", SERVIDOR, "--server.headless", "true", "--server.address", "127.0.0.1",
+         "--server.port", str(puerto), "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false",
+         "--secrets.files", secrets, "--logger.level", "error"],
+        cwd=RAIZ, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    limite = time.monotonic() + TIEMPO_LIMITE
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError(f"El servidor terminó al iniciar:\n{proceso.stderr.read()}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{puerto}/_stcore/health", timeout=1) as respuesta:
+                if respuesta.status == 200: return proceso
+        except OSError:
+            time.sleep(0.2)
+    proceso.kill()
+    raise RuntimeError("El servidor no respondió a tiempo")
+
+
+def memoria_residente_mb(pid):
+    """VmRSS del proceso (Linux); None si /proc no está disponible."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for linea in f:
+                if linea.startswith("VmRSS:"): return int(linea.split()[1]) / 1024
+    except OSError:
+        return None
+
+
+# --- Usuario simulado ---
+class Usuario:
+    """Una sesión del navegador: websocket de Streamlit, estado de widgets y página actual."""
+
+    def __init__(self, base, semilla):
+        self.base = base
+        self.azar = random.Random(semilla)
+        self.widgets = {}  # clave o etiqueta → (tipo, proto, fragment_id)
+        self.estados = {}  # id → WidgetState enviado (el navegador reenvía todos en cada rerun)
+        self.multimedia = {}  # URL → fragmento que la emitió
+        self.cache_navegador = set()  # URLs inmutables ya descargadas
+        self.externos = set()
+        self.excepciones = []
+        self.session_id = None
+        self.ws = None
+
+    async def conectar(self):
+        from websockets.asyncio.client import connect
+        self.ws = await connect(f"ws://{self.base.split('://')[1]}/_stcore/stream", subprotocols=["streamlit"],
+                                max_size=None, open_timeout=TIEMPO_LIMITE)
+
+    async def cerrar(self):
+        if self.ws is not None: await self.ws.close()
+
+    async def _recibir(self):
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        mensaje = ForwardMsg()
+        mensaje.ParseFromString(await asyncio.wait_for(self.ws.recv(), TIEMPO_LIMITE))
+        return mensaje
+
+    def _registrar(self, delta):
+        elemento = delta.new_element
+        tipo = elemento.WhichOneof("type")
+        proto = getattr(elemento, tipo)
+        if tipo in ("audio", "video") and proto.url: self.multimedia[proto.url] = delta.fragment_id
+        elif tipo == "exception": self.excepciones.append(proto.message)
+        texto = getattr(proto, "body", "") or getattr(proto, "src", "") or getattr(proto, "srcdoc", "")
+        if isinstance(texto, str): self.externos.update(_URL_EXTERNA.findall(texto))
+        identificador = getattr(proto, "id", "") if tipo != "markdown" else ""
+        if identificador:
+            clave = identificador.rsplit("-", 1)[-1]
+            self.widgets[proto.label if clave == "None" else clave] = (tipo, proto, delta.fragment_id)
+
+    async def rerun(self, cambios=(), fragment_id=""):
+        """Envía los widgets cambiados (y los anteriores) y espera el fin del rerun, incluidos los encadenados."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        mensaje = BackMsg()
+        mensaje.rerun_script.widget_states.widgets.extend([*self.estados.values(), *cambios])
+        mensaje.rerun_script.fragment_id = fragment_id
+        mensaje.rerun_script.context_info.url = self.base + "/"
+        for cambio in cambios:
+            if not cambio.HasField("trigger_value"): self.estados[cambio.id] = cambio
+        if not fragment_id:
+            self.widgets.clear()
+            self.multimedia.clear()
+        else:  # el rerun del fragmento libera los archivos que había emitido
+            self.multimedia = {url: f for url, f in self.multimedia.items() if f != fragment_id}
+        self.excepciones.clear()
+        await self.ws.send(mensaje.SerializeToString())
+        while True:
+            respuesta = await self._recibir()
+            tipo = respuesta.WhichOneof("type")
+            if tipo == "new_session": self.session_id = respuesta.new_session.initialize.session_id
+            elif tipo == "delta" and respuesta.delta.WhichOneof("type") == "new_element": self._registrar(respuesta.delta)
+            elif tipo == "script_finished":
+                if respuesta.script_finished == FIN_ERROR_COMPILACION: raise RuntimeError("Error de compilación de app.py")
+                if respuesta.script_finished == FIN_PARA_RERUN: continue
+                # Como el navegador, se olvida el estado de los widgets que ya no están en la página
+                if not fragment_id:
+                    presentes = {proto.id for _, proto, _ in self.widgets.values()}
+                    self.estados = {i: e for i, e in self.estados.items() if i in presentes}
+                # El rerun terminó completo: sólo entonces se informa la excepción (no quedan mensajes pendientes)
+                if self.excepciones: raise RuntimeError(f"La app lanzó una excepción: {self.excepciones[0]}")
+                return
+
+    async def iniciar_sesion(self):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        await self.rerun()
+        cambios = [WidgetState(id=self.widgets[campo][1].id, string_value=valor) for campo, valor in
+                   (("username", CREDENCIALES["username"]), ("password", CREDENCIALES["password"]))]
+        await self.rerun(cambios)
+        if "pas" not in self.widgets: raise RuntimeError("El login no mostró el simulador")
+
+    def _nuevo_valor(self, tipo, proto):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        estado = WidgetState(id=proto.id)
+        if tipo == "number_input":
+            minimo = proto.min if proto.has_min else proto.default - 50
+            maximo = proto.max if proto.has_max else proto.default + 50
+            valor = self.azar.uniform(minimo, maximo)
+            estado.double_value = round(valor) if proto.data_type == proto.INT else round(valor, 1)
+        elif tipo in ("selectbox", "radio"):
+            estado.string_value = self.azar.choice(proto.options)
+        elif tipo == "checkbox":
+            anterior = self.estados.get(proto.id)
+            estado.bool_value = not (anterior.bool_value if anterior else proto.default)
+        else:
+            raise ValueError(f"Widget no soportado en la mezcla: {tipo}")
+        return estado
+
+    async def editar(self, claves):
+        """Cambia un widget al azar entre `claves` (los que están en la página)."""
+        presentes = [clave for clave in claves if clave in self.widgets]
+        tipo, proto, fragment_id = self.widgets[self.azar.choice(presentes)]
+        await self.rerun([self._nuevo_valor(tipo, proto)], fragment_id)
+
+    def _descargar(self, url):
+        """Bytes recibidos por `url`; lo inmutable ya descargado sale de la caché del navegador (0 bytes)."""
+        if url in self.cache_navegador: return 0
+        with urllib.request.urlopen(self.base + url if url.startswith("/") else url, timeout=TIEMPO_LIMITE) as respuesta:
+            datos = respuesta.read()
+            if "immutable" in respuesta.headers.get("Cache-Control", ""): self.cache_navegador.add(url)
+        return len(datos)
+
+    async def multimedia_expanders(self):
+        """Lo que pide el navegador al abrir los expanders: cada audio y video de la página."""
+        return sum([await asyncio.to_thread(self._descargar, url) for url in sorted(self.multimedia)])
+
+    async def descargar_pdf(self):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        _, proto, _ = self.widgets[ETIQUETA_PDF]
+        if not proto.deferred_file_id: return await asyncio.to_thread(self._descargar, proto.url)
+        mensaje = BackMsg()
+        pedido = mensaje.backend_operation_request
+        pedido.request_id, pedido.session_id = uuid.uuid4().hex, self.session_id
+        pedido.deferred_file.file_id = proto.deferred_file_id
+        await self.ws.send(mensaje.SerializeToString())
+        while True:
+            respuesta = await self._recibir()
+            if respuesta.WhichOneof("type") != "backend_operation_response": continue
+            if respuesta.backend_operation_response.error_msg:
+                raise RuntimeError(f"PDF: {respuesta.backend_operation_response.error_msg}")
+            return await asyncio.to_thread(self._descargar, respuesta.backend_operation_response.deferred_file.url)
+
+    async def evento(self, nombre):
+        """Ejecuta un evento de la mezcla; devuelve los bytes descargados."""
+        if nombre == "barra_lateral": await self.editar(WIDGETS_BARRA)
+        elif nombre == "pestanas": await self.editar(WIDGETS_PESTANAS)
+        elif nombre == "multimedia": return await self.multimedia_expanders()
+        elif nombre == "pdf": return await self.descargar_pdf()
+        return 0
+
+
+async def simular_usuario(base, semilla, fin, pausa, resultado):
+    """Un usuario: login y eventos de la mezcla hasta `fin`; anota latencias y errores en `resultado`."""
+    usuario = Usuario(base, semilla)
+    nombres, pesos = zip(*MEZCLA.items())
+    try:
+        inicio = time.perf_counter()
+        await usuario.conectar()
+        await usuario.iniciar_sesion()
+        resultado["login"].append((time.perf_counter() - inicio) * 1000)
+        resultado["sesiones"] += 1
+        while time.monotonic() < fin:
+            await asyncio.sleep(usuario.azar.uniform(0, 2 * pausa))
+            nombre = usuario.azar.choices(nombres, pesos)[0]
+            inicio = time.perf_counter()
+            try:
+                resultado["bytes"] += await usuario.evento(nombre)
+            except Exception as error:  # noqa: BLE001 - se cuentan todos los fallos del evento
+                resultado["errores"].append(f"{nombre}: {error!r}")
+                if usuario.ws.state.name != "OPEN": return
+            else:
+                resultado["latencias"].setdefault(nombre, []).append((time.perf_counter() - inicio) * 1000)
+    except Exception as error:  # noqa: BLE001
+        resultado["errores"].append(f"login: {error!r}")
+    finally:
+        resultado["externos"].update(usuario.externos)
+        await usuario.cerrar()
+
+
+async def escalon(base, pid, usuarios, duracion, rampa, pausa, semilla):
+    """N usuarios concurrentes (entrando a lo largo de `rampa` s) durante `duracion` s."""
+    resultado = dict(login=[], latencias={}, errores=[], sesiones=0, bytes=0, externos=set())
+    memoria = [memoria_residente_mb(pid)]
+    inicio = time.monotonic()
+    fin = inicio + rampa + duracion
+
+    async def muestrear():
+        while time.monotonic() < fin:
+            await asyncio.sleep(0.5)
+            memoria.append(memoria_residente_mb(pid))
+
+    async def entrar(i):
+        await asyncio.sleep(rampa * i / usuarios)
+        await simular_usuario(base, semilla + i, fin, pausa, resultado)
+
+    await asyncio.gather(muestrear(), *(entrar(i) for i in range(usuarios)))
+    segundos = time.monotonic() - inicio
+    todas = [ms for muestras in resultado["latencias"].values() for ms in muestras]
+    eventos = len(todas) + len(resultado["errores"])
+    memoria = [mb for mb in memoria if mb is not None]
+    return dict(
+        usuarios=usuarios, sesiones=resultado["sesiones"], eventos=eventos, eventos_por_segundo=eventos / segundos,
+        errores=len(resultado["errores"]), tasa_errores=len(resultado["errores"]) / eventos if eventos else None,
+        ejemplos_errores=resultado["errores"][:5],
+        login_ms=estadisticas(resultado["login"]) if resultado["login"] else None,
+        latencia_ms=dict(total=estadisticas(todas) if todas else None,
+                         por_evento={nombre: estadisticas(m) for nombre, m in sorted(resultado["latencias"].items())}),
+        descargado_mb=resultado["bytes"] / 2**20,
+        memoria_servidor_mb=dict(inicial=memoria[0], max=max(memoria), final=memoria[-1]) if memoria else None,
+        enlaces_externos=sorted(resultado["externos"]),
+    )
+
+
+def _fila(e):
+    latencia = e["latencia_ms"]["total"] or dict(p50=float("nan"), p95=float("nan"), p99=float("nan"))
+    memoria = e["memoria_servidor_mb"] or dict(max=float("nan"))
+    return (f"{e['usuarios']:>8} {e['eventos_por_segundo']:>8.2f} {latencia['p50']:>8.0f} {latencia['p95']:>8.0f} "
+            f"{latencia['p99']:>8.0f} {100 * (e['tasa_errores'] or 0):>7.1f}% {memoria['max']:>9.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.carga", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--usuarios", type=int, nargs="+", default=[1, 5, 10, 20], help="Escalones de usuarios concurrentes.")
+    parser.add_argument("--duracion", type=float, default=30, help="Segundos de carga por escalón (después de la rampa).")
+    parser.add_argument("--rampa", type=float, default=5, help="Segundos en que van entrando los usuarios de cada escalón.")
+    parser.add_argument("--pausa", type=float, default=1.0, help="Pausa media (s) entre eventos de un usuario.")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", help="Archivo JSON donde guardar los resultados.")
+    args = parser.parse_args(argv)
+    logging.getLogger("websockets").setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        puerto = puerto_libre()
+        servidor = iniciar_servidor(puerto, escribir_secrets(carpeta))
+        try:
+            escalones = []
+            print(f"{'usuarios':>8} {'ev/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errores':>8} {'RSS MB':>9}", file=sys.stderr)
+            for usuarios in args.usuarios:
+                escalones.append(asyncio.run(escalon(f"http://127.0.0.1:{puerto}", servidor.pid, usuarios, args.duracion,
+                                                     args.rampa, args.pausa, args.semilla)))
+                print(_fila(escalones[-1]), file=sys.stderr)
+        finally:
+            servidor.terminate()
+            servidor.wait(TIEMPO_LIMITE)
+
+    informe = dict(fecha=time.strftime("%Y-%m-%dT%H:%M:%S%z"), entorno=entorno(), mezcla=MEZCLA,
+                   parametros=dict(duracion_s=args.duracion, rampa_s=args.rampa, pausa_s=args.pausa), escalones=escalones)
+    texto = json.dumps(informe, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+    return 1 if any(e["errores"] or e["enlaces_externos"] for e in escalones) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+"""
+Benchmark de latencia y throughput de HemoSim (sin red, sin navegador).
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.rendimiento --salida benchmarks/baseline.json
+    python -m benchmarks.rendimiento --comparar benchmarks/baseline.json
+
+Maneja app.py con el arnés de pruebas de Streamlit (`AppTest`) y credenciales
+de prueba en `st.secrets`, y mide:
+
+- arranque de la pantalla de acceso (antes del login) y qué dependencias
+  pesadas ya cargó;
+- arranque en frío: primer render completo en un intérprete nuevo;
+- latencia por rerun de un guion de interacciones (p50/p95/p99/máx);
+- sesiones por segundo en un solo núcleo (login + guion completo);
+- memoria que retiene cada sesión entre reruns (`st.session_state` más los
+  argumentos que Streamlit guarda para los reruns parciales, KB);
+- componentes por separado: cálculo, figuras, PDF, ruidos sintetizados,
+  monitor DII, mapa de sensibilidad y resolución de multimedia.
+
+Los resultados se guardan como JSON; `--comparar` falla (código 1) si alguna
+mediana empeora más que `--tolerancia` respecto a la línea base.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+from hemosim.tiempos import percentil  # noqa: E402
+
+APP = os.path.join(RAIZ, "app.py")
+CREDENCIALES = {"username": "benchmark", "password": "benchmark"}
+TIEMPO_LIMITE = 120
+# Diferencias absolutas por debajo de esto son ruido de medición y no cuentan como regresión
+PISO_RUIDO = {"arranque_login_s": 0.05, "arranque_frio_s": 0.05, "rerun_ms": 5.0, "memoria_sesion_kb": 0.5, "componentes_ms": 0.5}
+# Módulos que la pantalla de acceso no debería cargar
+MODULOS_PESADOS = ("numpy", "pandas", "fpdf", "pyarrow", "hemosim.calculos")
+
+# Guion de interacciones: (descripción, tipo de widget, etiqueta o clave, acción, valor)
+GUION = (
+    ("PAS en hipotensión", "number_input", "PAS (mmHg)", "set_value", 85),
+    ("IY presente", "radio", "Ingurgitación Yugular:", "set_value", "Presente"),
+    ("Furosemida", "checkbox", "Furosemida", "check", None),
+    ("Vasodilatador", "checkbox", "Vasodilatador", "check", None),
+    ("Modo incertidumbre", "toggle", "modo_incertidumbre", "set_value", True),
+    ("Trayectoria", "toggle", "simular_trayectoria", "set_value", True),
+    ("PAS normal", "number_input", "PAS (mmHg)", "set_value", 120),
+    ("IY ausente", "radio", "Ingurgitación Yugular:", "set_value", "Ausente"),
+)
+
+
+def estadisticas(muestras):
+    """n, p50, p95, p99, máx y media (en las mismas unidades que `muestras`)."""
+    orden = sorted(muestras)
+    return dict(n=len(orden), p50=percentil(orden, 50), p95=percentil(orden, 95), p99=percentil(orden, 99),
+                max=orden[-1], media=sum(orden) / len(orden))
+
+
+def _cronometrar(funcion, repeticiones):
+    muestras = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        muestras.append((time.perf_counter() - inicio) * 1000)
+    return estadisticas(muestras)
+
+
+# --- App completa (AppTest) ---
+def nueva_sesion():
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(APP, default_timeout=TIEMPO_LIMITE)
+    at.secrets["credentials"] = CREDENCIALES
+    return at
+
+
+def _verificar(at):
+    if at.exception:
+        raise RuntimeError(f"La app lanzó una excepción: {at.exception[0].message}")
+
+
+def iniciar_sesion(at):
+    at.run()
+    at.text_input(key="username").input(CREDENCIALES["username"])
+    at.text_input(key="password").input(CREDENCIALES["password"])
+    at.run()
+    _verificar(at)
+
+
+def _widget(at, tipo, etiqueta):
+    for w in getattr(at, tipo):
+        if w.label == etiqueta or getattr(w, "key", None) == etiqueta:
+            return w
+    raise LookupError(f"No se encontró {tipo} {etiqueta!r}")
+
+
+def ejecutar_guion(at, latencias=None):
+    for descripcion, tipo, etiqueta, accion, valor in GUION:
+        widget = _widget(at, tipo, etiqueta)
+        getattr(widget, accion)(*(() if valor is None else (valor,)))
+        inicio = time.perf_counter()
+        at.run()
+        if latencias is not None:
+            latencias.setdefault(descripcion, []).append((time.perf_counter() - inicio) * 1000)
+        _verificar(at)
+
+
+def medir_arranque_login(repeticiones):
+    """Segundos hasta la pantalla de acceso en un intérprete nuevo y módulos pesados ya cargados."""
+    codigo = (
+        "import json, sys, time; inicio = time.perf_counter()\n"
+        "from benchmarks.rendimiento import MODULOS_PESADOS, nueva_sesion\n"
+        "nueva_sesion().run(); duracion = time.perf_counter() - inicio\n"
+        "print(json.dumps([duracion, [m for m in MODULOS_PESADOS if m in sys.modules]]))\n"
+    )
+    muestras, cargados = [], set()
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True, check=True)
+        duracion, modulos = json.loads(salida.stdout.strip().splitlines()[-1])
+        muestras.append(duracion)
+        cargados.update(modulos)
+    return estadisticas(muestras), sorted(cargados)
+
+
+def medir_arranque_frio(repeticiones):
+    """Segundos hasta el primer render autenticado, cada uno en un intérprete nuevo."""
+    codigo = (
+        "import time; inicio = time.perf_counter()\n"
+        "from benchmarks.rendimiento import iniciar_sesion, nueva_sesion\n"
+        "iniciar_sesion(nueva_sesion()); print(time.perf_counter() - inicio)\n"
+    )
+    muestras = []
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True, check=True)
+        muestras.append(float(salida.stdout.strip().splitlines()[-1]))
+    return estadisticas(muestras)
+
+
+def medir_reruns(repeticiones):
+    """Latencias (ms) del guion, en total y por interacción, sobre sesiones ya calientes."""
+    latencias = {}
+    for _ in range(repeticiones):
+        at = nueva_sesion()
+        iniciar_sesion(at)
+        ejecutar_guion(at, latencias)
+    todas = [ms for muestras in latencias.values() for ms in muestras]
+    return dict(total=estadisticas(todas), por_interaccion={d: estadisticas(m) for d, m in latencias.items()})
+
+
+def medir_sesiones(sesiones):
+    """Sesiones completas (login + guion) por segundo en un solo proceso/núcleo."""
+    inicio = time.perf_counter()
+    for _ in range(sesiones):
+        at = nueva_sesion()
+        iniciar_sesion(at)
+        ejecutar_guion(at)
+    return sesiones / (time.perf_counter() - inicio)
+
+
+def medir_memoria(sesiones):
+    """
+    KB del estado de cada sesión y de los argumentos de sus fragmentos al
+    terminar el guion (hemosim/memoria.py). Streamlit retiene los argumentos de
+    cada llamada a un fragmento de la última corrida completa; app.py los avisa
+    a `RegistroTiempos.al_llamar_fragmento`.
+    """
+    from hemosim.memoria import memoria_sesion
+    from hemosim.tiempos import registro_tiempos
+    registro = registro_tiempos()
+    muestras = []
+    try:
+        for _ in range(sesiones):
+            llamadas = {}  # corrida → [(fragmento, args, kwargs)]
+            registro.al_llamar_fragmento = lambda corrida, *llamada: llamadas.setdefault(corrida, []).append(llamada)
+            at = nueva_sesion()
+            iniciar_sesion(at)
+            ejecutar_guion(at)
+            retenidos = llamadas[max(llamadas)] if llamadas else []
+            total, _ = memoria_sesion(dict(at.session_state.to_dict(), argumentos_fragmentos=retenidos))
+            muestras.append(total / 1024)
+    finally:
+        registro.al_llamar_fragmento = None
+    return estadisticas(muestras)
+
+
+# --- Componentes ---
+def medir_componentes(repeticiones):
+    import numpy as np
+    import plotly.io as pio
+
+    from hemosim.auscultacion import CacheSonidos, a_wav, sintetizar
+    from hemosim.calculos import CAMPOS, evaluar_caso, evaluar_casos
+    from hemosim.graficos import agregar_tratamiento, figura_stevenson
+    from hemosim.imagenes import NIVELES, DerivadasImagen
+    from hemosim.recursos import IndiceRecursos
+    from hemosim.reportes import CacheReportes, generar_reporte
+    from hemosim.ritmos import html_monitor
+    from hemosim.sensibilidad import mapa_sensibilidad
+
+    caso = dict(CAMPOS, sintomas="Ortopnea; Disnea reposo", iy_presente="Presente", pas=95, pad=70)
+    lote = {campo: np.repeat([valor], 10_000) for campo, valor in caso.items()}
+    reporte = dict(
+        edad=65, sexo="M", ciudad="Bogotá", es_zona_chagas=False, pas=95, pad=70, pam=78.3, fc=80, sato2=92,
+        cuadrante="B: Húmedo y Caliente", ppp=26.3, frialdad="Caliente", ruidos_agregados="R1-R2 Normales",
+        pulmones="Estertores", abdomen_viscera="Sin visceromegalias", ascitis=False, iy_presente="Presente",
+        iy_desc="Presente (PVC aprox 7.4 mmHg)", tiene_paraclinicos=False, fenotipo_msg="No determinado", lactato=1.0,
+    )
+    cache_reportes = CacheReportes()
+    cache_reportes.obtener(reporte)
+    cache_sonidos = CacheSonidos()
+    sonido = (110, "Fibrilación Auricular", "S3 (Galope Ventricular)", ("Sistólico", "Holosistólico"))
+    cache_sonidos.obtener(*sonido)
+
+    def figura():
+        fig = figura_stevenson(24, 2.0)
+        agregar_tratamiento(fig, 24, 2.0, 16, 2.1)
+        pio.to_json(fig, validate=False)
+
+    assets = os.path.join(RAIZ, "assets")
+    indice = IndiceRecursos(assets)
+    archivos = sorted(os.listdir(assets)) if os.path.isdir(assets) else []
+    imagenes = [a for a in archivos if a.lower().endswith((".jpg", ".jpeg", ".png"))]
+    derivadas = DerivadasImagen(indice, os.path.join(RAIZ, ".cache", "imagenes"))
+
+    componentes = {
+        "calculo_caso": _cronometrar(lambda: evaluar_caso(**caso), repeticiones),
+        "calculo_lote_10k": _cronometrar(lambda: evaluar_casos(lote), max(repeticiones // 10, 3)),
+        "figura_stevenson": _cronometrar(figura, repeticiones),
+        "pdf_render": _cronometrar(lambda: generar_reporte(reporte), max(repeticiones // 5, 3)),
+        "pdf_cache": _cronometrar(lambda: cache_reportes.obtener(reporte), repeticiones),
+        "sonido_sintesis": _cronometrar(lambda: a_wav(sintetizar(*sonido)), max(repeticiones // 5, 3)),
+        "monitor_dii": _cronometrar(lambda: html_monitor(110, "Fibrilación Auricular"), max(repeticiones // 5, 3)),
+        "mapa_sensibilidad_200": _cronometrar(lambda: mapa_sensibilidad(caso, "pas", "lactato"), max(repeticiones // 5, 3)),
+        "sonido_cache": _cronometrar(lambda: cache_sonidos.obtener(*sonido), repeticiones),
+        "multimedia_indice": _cronometrar(lambda: IndiceRecursos(assets), max(repeticiones // 10, 3)),
+        "multimedia_resolver": _cronometrar(lambda: [indice.resolver(a) for a in archivos], repeticiones),
+        "multimedia_leer": _cronometrar(lambda: [indice.leer(a) for a in archivos], repeticiones),
+    }
+    if imagenes:
+        componentes["imagen_miniatura"] = _cronometrar(
+            lambda: [derivadas.obtener(a, next(iter(NIVELES))) for a in imagenes], repeticiones)
+    return componentes
+
+
+def entorno():
+    import streamlit
+    return dict(python=platform.python_version(), plataforma=platform.platform(), cpus=os.cpu_count(),
+                streamlit=streamlit.__version__)
+
+
+def comparar(actual, base, tolerancia):
+    """Regresiones de mediana (p50) mayores que `tolerancia` (fracción) y que el piso de ruido, como texto."""
+    regresiones = []
+
+    def recorrer(a, b, ruta):
+        if isinstance(a, dict) and isinstance(b, dict):
+            if "p50" in a and "p50" in b:
+                piso = PISO_RUIDO.get(ruta.split(".")[0], 0)
+                if b["p50"] and a["p50"] > b["p50"] * (1 + tolerancia) and a["p50"] - b["p50"] > piso:
+                    regresiones.append(f"{ruta}: p50 {b['p50']:.3f} → {a['p50']:.3f}")
+                return
+            for clave in a.keys() & b.keys():
+                recorrer(a[clave], b[clave], f"{ruta}.{clave}" if ruta else clave)
+
+    recorrer(actual["resultados"], base["resultados"], "")
+    sesiones_actual = actual["resultados"].get("sesiones_por_segundo")
+    sesiones_base = base["resultados"].get("sesiones_por_segundo")
+    if sesiones_actual and sesiones_base and sesiones_actual < sesiones_base / (1 + tolerancia):
+        regresiones.append(f"sesiones_por_segundo: {sesiones_base:.2f} → {sesiones_actual:.2f}")
+    nuevos = set(actual["resultados"].get("modulos_pesados_login", ())) - set(base["resultados"].get("modulos_pesados_login", ()))
+    if nuevos:
+        regresiones.append(f"modulos_pesados_login: la pantalla de acceso ahora carga {', '.join(sorted(nuevos))}")
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.rendimiento", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--salida", help="Archivo JSON donde guardar los resultados (p. ej. benchmarks/baseline.json).")
+    parser.add_argument("--comparar", help="Línea base JSON contra la cual comparar.")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Empeoramiento aceptado de la mediana (0.25 = 25%%).")
+    parser.add_argument("--arranques", type=int, default=3, help="Arranques en frío (un intérprete nuevo cada uno).")
+    parser.add_argument("--sesiones", type=int, default=5, help="Sesiones para latencia por rerun y throughput.")
+    parser.add_argument("--repeticiones", type=int, default=200, help="Repeticiones por componente.")
+    args = parser.parse_args(argv)
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    resultados = {}
+    print("Pantalla de acceso...", file=sys.stderr)
+    resultados["arranque_login_s"], resultados["modulos_pesados_login"] = medir_arranque_login(args.arranques)
+    print("Arranque en frío...", file=sys.stderr)
+    resultados["arranque_frio_s"] = medir_arranque_frio(args.arranques)
+    print("Latencia por rerun...", file=sys.stderr)
+    resultados["rerun_ms"] = medir_reruns(args.sesiones)
+    print("Sesiones por segundo...", file=sys.stderr)
+    resultados["sesiones_por_segundo"] = medir_sesiones(args.sesiones)
+    print("Memoria por sesión...", file=sys.stderr)
+    resultados["memoria_sesion_kb"] = medir_memoria(args.sesiones)
+    print("Componentes...", file=sys.stderr)
+    resultados["componentes_ms"] = medir_componentes(args.repeticiones)
+
+    informe = dict(fecha=time.strftime("%Y-%m-%dT%H:%M:%S%z"), entorno=entorno(), resultados=resultados)
+    texto = json.dumps(informe, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            regresiones = comparar(informe, json.load(f), args.tolerancia)
+        for regresion in regresiones:
+            print(f"REGRESIÓN {regresion}", file=sys.stderr)
+        return 1 if regresiones else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,6 @@
+"""
+HemoSim: lógica clínica importable del simulador.
+
+`app.py` sólo dibuja la interfaz; los cálculos viven aquí para poder
+usarlos también en lote (cohortes de casos docentes) sin Streamlit.
+"""
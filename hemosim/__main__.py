@@ -0,0 +1,5 @@
+import sys
+
+from hemosim.lote import main
+
+sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Ruidos cardiacos sintetizados con NumPy.
+
+Las grabaciones de assets/ suenan a la frecuencia con que se grabaron. Aquí
+S1, S2, S3, S4 y los soplos del selector "Patrón" (Diamante, Holosistólico,
+Decrescendo, Click, Retumbo) se generan a la FC del caso y con la regularidad
+de su ritmo: la FA tiene RR irregulares y sólo el ritmo sinusal tiene S4.
+
+Los parámetros se cuantizan (`cuantizar`): la misma clave produce siempre el
+mismo WAV, que `CacheSonidos` genera una vez por proceso y guarda en un LRU
+acotado por bytes para todas las sesiones.
+"""
+import io
+import threading
+import wave
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+FRECUENCIA_MUESTREO = 8_000  # Hz: los ruidos y soplos están por debajo de 600 Hz
+DURACION_S = 6.0
+PASO_FC = 5  # lpm
+FC_MINIMA, FC_MAXIMA = 30, 180
+LIMITE_CACHE_BYTES = 32 * 1024 * 1024
+
+# Coeficiente de variación del RR de cada ritmo
+VARIACION_RR = {"Sinusal": 0.03, "Fibrilación Auricular": 0.25, "Flutter Atrial": 0.02, "Marcapasos": 0.0}
+# Ritmos con contracción auricular efectiva (S4, refuerzo presistólico del retumbo)
+CON_AURICULA = ("Sinusal",)
+# (frecuencia Hz, duración s, amplitud) de cada ruido
+TONOS = {"S1": (50, 0.10, 1.0), "S2": (70, 0.08, 0.8), "S3": (30, 0.06, 0.5), "S4": (25, 0.06, 0.45), "Click": (160, 0.02, 0.6)}
+# Banda (Hz) del ruido de cada patrón de soplo
+BANDAS = {"Diamante": (90, 350), "Holosistólico": (120, 450), "Decrescendo": (150, 500), "Click": (120, 400), "Retumbo": (30, 100)}
+
+
+def cuantizar(fc, ritmo, ruidos, soplo=None):
+    """Clave del sonido: FC en pasos de `PASO_FC`, ritmo, ruidos y soplo (ciclo, patrón) o None."""
+    fc = int(np.clip(round(fc / PASO_FC) * PASO_FC, FC_MINIMA, FC_MAXIMA))
+    ritmo = ritmo if ritmo in VARIACION_RR else "Sinusal"
+    if ritmo not in CON_AURICULA and "S4" in ruidos:
+        ruidos = "S3 (Galope Ventricular)" if "S3" in ruidos else "R1-R2 Normales"
+    return fc, ritmo, ruidos, tuple(soplo) if soplo else None
+
+
+def latidos(fc, ritmo, duracion, azar):
+    """Instantes (s) de cada S1: RR medio 60/fc con la variación del ritmo."""
+    rr_medio = 60 / fc
+    rr = rr_medio * (1 + VARIACION_RR[ritmo] * azar.standard_normal(int(duracion / rr_medio) + 8))
+    inicios = 0.15 + np.concatenate(([0], np.cumsum(np.clip(rr, 0.5 * rr_medio, 1.8 * rr_medio))))
+    return inicios[inicios < duracion]
+
+
+def _tono(frecuencia, duracion):
+    """Oscilación amortiguada con ventana de Hann (un ruido cardiaco)."""
+    t = np.arange(int(duracion * FRECUENCIA_MUESTREO)) / FRECUENCIA_MUESTREO
+    return np.sin(2 * np.pi * frecuencia * t) * np.hanning(len(t)) * np.exp(-3 * t / duracion)
+
+
+def _sumar(senal, inicio, forma, amplitud=1.0):
+    i = int(inicio * FRECUENCIA_MUESTREO)
+    if i < 0 or i >= len(senal): return
+    n = min(len(forma), len(senal) - i)
+    senal[i:i + n] += amplitud * forma[:n]
+
+
+def _ruido_banda(n, banda, azar):
+    """Ruido blanco filtrado a `banda` (Hz) en el dominio de la frecuencia."""
+    espectro = np.fft.rfft(azar.standard_normal(n))
+    frecuencias = np.fft.rfftfreq(n, 1 / FRECUENCIA_MUESTREO)
+    espectro[(frecuencias < banda[0]) | (frecuencias > banda[1])] = 0
+    ruido = np.fft.irfft(espectro, n)
+    return ruido / (np.abs(ruido).max() or 1)
+
+
+def _envolvente_soplo(envolvente, inicio, fin, patron, presistolico):
+    """Suma en `envolvente` la forma del soplo entre `inicio` y `fin` (s)."""
+    i, j = int(inicio * FRECUENCIA_MUESTREO), min(int(fin * FRECUENCIA_MUESTREO), len(envolvente))
+    if j <= i: return
+    x = np.linspace(0, 1, j - i, endpoint=False)
+    if patron == "Diamante": forma = np.interp(x, [0, 0.4, 1], [0, 1, 0])
+    elif patron == "Holosistólico": forma = np.interp(x, [0, 0.05, 0.95, 1], [0, 1, 1, 0])
+    elif patron == "Decrescendo": forma = np.interp(x, [0, 0.05, 0.7, 1], [0, 1, 0, 0])
+    elif patron == "Click": forma = np.interp(x, [0, 0.55, 0.6, 1], [0, 0, 0.5, 0.8])  # soplo telesistólico tras el click
+    else:  # Retumbo: mesodiastólico, con refuerzo presistólico si la aurícula se contrae
+        forma = np.interp(x, [0, 0.25, 0.35, 0.7, 0.8, 1], [0, 0, 0.8, 0.5, 0.5, 1 if presistolico else 0.4])
+    envolvente[i:j] = np.maximum(envolvente[i:j], forma)
+
+
+def sintetizar(fc, ritmo, ruidos, soplo=None, duracion=DURACION_S):
+    """Señal (float32, -1..1) de los ruidos cardiacos; `soplo` es (ciclo, patrón) o None."""
+    clave = cuantizar(fc, ritmo, ruidos, soplo)
+    fc, ritmo, ruidos, soplo = clave
+    azar = np.random.default_rng(zlib.crc32(repr(clave).encode("utf-8")))
+    senal = np.zeros(int(duracion * FRECUENCIA_MUESTREO))
+    envolvente = np.zeros_like(senal)
+    tonos = {nombre: (_tono(f, d), a) for nombre, (f, d, a) in TONOS.items()}
+    inicios = latidos(fc, ritmo, duracion, azar)
+    auricula = ritmo in CON_AURICULA
+
+    for k, s1 in enumerate(inicios):
+        rr = inicios[k + 1] - s1 if k + 1 < len(inicios) else 60 / fc
+        s2 = s1 + min(0.3 * np.sqrt(rr), 0.45 * rr)  # la sístole se acorta menos que la diástole con la FC
+        for nombre, instante in (("S1", s1), ("S2", s2)):
+            _sumar(senal, instante, *tonos[nombre])
+        if "S3" in ruidos: _sumar(senal, s2 + min(0.15, 0.4 * (s1 + rr - s2)), *tonos["S3"])
+        if "S4" in ruidos: _sumar(senal, s1 + rr - 0.09, *tonos["S4"])
+        if soplo:
+            ciclo, patron = soplo
+            if patron == "Click": _sumar(senal, s1 + 0.55 * (s2 - s1), *tonos["Click"])
+            if ciclo == "Diastólico": _envolvente_soplo(envolvente, s2 + 0.03, s1 + rr - 0.02, patron, auricula)
+            else: _envolvente_soplo(envolvente, s1 + 0.05, s2 - 0.02, patron, auricula)
+
+    if soplo:
+        senal += 0.35 * envolvente * _ruido_banda(len(senal), BANDAS[soplo[1]], azar)
+    senal += 0.01 * azar.standard_normal(len(senal))  # fondo del estetoscopio
+    return (0.9 * senal / np.abs(senal).max()).astype(np.float32)
+
+
+def a_wav(senal):
+    """Bytes WAV (PCM 16 bits, mono) de una señal -1..1."""
+    salida = io.BytesIO()
+    with wave.open(salida, "wb") as archivo:
+        archivo.setnchannels(1)
+        archivo.setsampwidth(2)
+        archivo.setframerate(FRECUENCIA_MUESTREO)
+        archivo.writeframes((np.clip(senal, -1, 1) * 32767).astype("<i2").tobytes())
+    return salida.getvalue()
+
+
+class CacheSonidos:
+    """Caché LRU compartido por todas las sesiones: clave cuantizada → bytes WAV."""
+
+    def __init__(self, limite_bytes=LIMITE_CACHE_BYTES):
+        self.limite_bytes = limite_bytes
+        self.aciertos = 0
+        self.fallos = 0
+        self._sonidos = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def obtener(self, fc, ritmo, ruidos, soplo=None):
+        clave = cuantizar(fc, ritmo, ruidos, soplo)
+        with self._lock:
+            if clave in self._sonidos:
+                self._sonidos.move_to_end(clave)
+                self.aciertos += 1
+                return self._sonidos[clave]
+        sonido = a_wav(sintetizar(*clave))
+        with self._lock:
+            self.fallos += 1
+            if clave not in self._sonidos:
+                self._sonidos[clave] = sonido
+                self._bytes += len(sonido)
+                while self._bytes > self.limite_bytes:
+                    _, viejo = self._sonidos.popitem(last=False)
+                    self._bytes -= len(viejo)
+        return sonido
@@ -0,0 +1,159 @@
+"""
+Motor vectorizado de la sección "7. CÁLCULOS Y LOGICA".
+
+Recibe columnas (arreglos NumPy, listas o un DataFrame) con las variables de
+la historia clínica y devuelve todas las columnas derivadas en una sola pasada.
+El panel de Streamlit llama a este mismo motor con un lote de un caso, así el
+resultado individual y el de cohorte no pueden divergir. Los pesos de los
+scores y los umbrales de péptidos vienen de las tablas de hemosim/reglas.py.
+"""
+import numpy as np
+
+from hemosim.reglas import tabla
+
+# Campos de entrada y su valor cuando no se reportan (los mismos de la barra lateral)
+CAMPOS = {
+    "edad": 65,
+    "sintomas": "",
+    "pas": 120,
+    "pad": 80,
+    "iy_presente": "Ausente",
+    "rhy": False,
+    "ruidos_agregados": "R1-R2 Normales",
+    "pulmones": "Murmullo Vesicular",
+    "abdomen_viscera": "Sin visceromegalias",
+    "ascitis": False,
+    "edema_ex": "Ausente",
+    "pulsos": "Normales",
+    "frialdad": "Caliente",
+    "llenado": 2,
+    "neuro": "Alerta",
+    "tiene_paraclinicos": False,
+    "lactato": 1.0,
+    "rx_patron": "Normal",
+    "tipo_peptido": "BNP",
+    "valor_peptido": 0,
+}
+
+CAMPOS_TEXTO = {"sintomas", "iy_presente", "ruidos_agregados", "pulmones", "abdomen_viscera",
+                "edema_ex", "pulsos", "frialdad", "neuro", "rx_patron", "tipo_peptido"}
+CAMPOS_BOOL = {"rhy", "ascitis", "tiene_paraclinicos"}
+
+# Los síntomas (multiselect) viajan como un solo texto: "Ortopnea; Disnea reposo"
+SEPARADOR_SINTOMAS = "; "
+
+CUADRANTE_A = "A: Seco y Caliente"
+CUADRANTE_B = "B: Húmedo y Caliente"
+CUADRANTE_C = "C: Húmedo y Frío"
+CUADRANTE_L = "L: Seco y Frío"
+
+# Límites del eje X (PCP simulada) y cortes de Stevenson
+PCP_BASE, PCP_MIN, PCP_MAX = 12, 5, 38
+CORTE_PCP, CORTE_IC = 18, 2.2
+
+_VERDADEROS = ["1", "true", "si", "sí", "yes", "x"]
+
+
+def unir_sintomas(sintomas):
+    """Convierte la lista del multiselect en el texto que usa el motor."""
+    if isinstance(sintomas, str): return sintomas
+    return SEPARADOR_SINTOMAS.join(sintomas)
+
+
+def _largo(casos):
+    if hasattr(casos, "columns"): return len(casos)
+    largos = [len(casos[campo]) for campo in CAMPOS if campo in casos and np.ndim(casos[campo]) > 0]
+    if largos: return max(largos)
+    if any(campo in casos for campo in CAMPOS): return 1
+    raise ValueError("No se recibió ningún campo de la historia clínica.")
+
+
+def _categorias(valores):
+    """Factoriza una columna de texto en (categorías únicas, códigos por caso)."""
+    if hasattr(valores, "categories"):  # pandas.Categorical: los códigos ya existen
+        return np.asarray(valores.categories).astype(str), np.asarray(valores.codes)
+    if hasattr(valores, "factorize"):
+        codigos, unicos = valores.factorize(use_na_sentinel=False)
+        return np.asarray(unicos).astype(str), codigos
+    unicos, codigos = np.unique(np.asarray(valores).astype(str), return_inverse=True)
+    return unicos, codigos
+
+
+def _columna(casos, campo, n):
+    valores = casos[campo] if campo in casos else CAMPOS[campo]
+    if np.ndim(valores) == 0:
+        # Escalar (o campo ausente): el mismo valor para todo el lote
+        if campo in CAMPOS_TEXTO:
+            return np.array([str(valores)]), np.zeros(n, dtype=np.intp)
+        valores = np.full(n, valores)
+    if campo in CAMPOS_TEXTO:
+        return _categorias(valores)
+    valores = np.asarray(valores)
+    if campo in CAMPOS_BOOL:
+        if valores.dtype.kind in "USO":
+            unicos, codigos = _categorias(valores)
+            return np.isin(np.char.lower(np.char.strip(unicos)), _VERDADEROS)[codigos]
+        return valores.astype(bool)
+    if valores.dtype.kind not in "biuf":
+        valores = valores.astype(float)
+    return valores
+
+
+def evaluar_casos(casos):
+    """
+    Calcula PAM, PP, PPP, scores, PCP/IC simulados y cuadrante para un lote.
+
+    `casos` es un dict de columnas o un DataFrame; los campos ausentes toman
+    el valor de `CAMPOS` y un escalar se repite en todo el lote. Devuelve un
+    dict de arreglos (o un DataFrame con el mismo índice si la entrada era un
+    DataFrame).
+    """
+    n = _largo(casos)
+    # Columnas de texto como (categorías, códigos): las reglas se evalúan una vez por categoría
+    c = {campo: _columna(casos, campo, n) for campo in CAMPOS}
+    pas, pad, edad = c["pas"], c["pad"], c["edad"]
+    paraclinicos = c["tiene_paraclinicos"]
+
+    pam = pad + (pas - pad)/3
+    pp = pas - pad
+    ppp = np.divide(pp, pas, out=np.zeros(n), where=pas > 0) * 100
+
+    # Pesos y umbrales en datos/reglas/*.json (hemosim/reglas.py), evaluados sobre el lote
+    columnas = dict(c, pam=pam, pp=pp, ppp=ppp)
+    peptido_positivo = columnas["peptido_positivo"] = tabla("peptidos").positivo(
+        c["tipo_peptido"], c["valor_peptido"], edad, paraclinicos)
+
+    # Score Congestión (Eje X)
+    score_congest = tabla("congestion").evaluar(columnas, n)
+    pcp_sim = np.clip(PCP_BASE + score_congest, PCP_MIN, PCP_MAX)
+
+    # Score Perfusión (Eje Y): las reglas se aplican en el orden de la tabla
+    score_perf = tabla("perfusion").evaluar(columnas, n)
+
+    ic_sim = np.maximum(1.0, score_perf)
+
+    # Clasificación Stevenson
+    humedo, caliente = pcp_sim > CORTE_PCP, ic_sim > CORTE_IC
+    cuadrante = np.select([humedo & caliente, humedo, ~caliente],
+                          [CUADRANTE_B, CUADRANTE_C, CUADRANTE_L], CUADRANTE_A)
+
+    resultado = {
+        "pam": pam, "pp": pp, "ppp": ppp,
+        "score_congest": score_congest, "peptido_positivo": peptido_positivo, "pcp_sim": pcp_sim,
+        "score_perf": score_perf, "ic_sim": ic_sim, "cuadrante": cuadrante,
+    }
+    if hasattr(casos, "columns"):
+        import pandas as pd
+        return pd.DataFrame(resultado, index=casos.index)
+    return resultado
+
+
+def evaluar_caso(**campos):
+    """Evalúa un solo paciente (lote de uno) y devuelve escalares de Python."""
+    desconocidos = set(campos) - set(CAMPOS)
+    if desconocidos:
+        raise TypeError(f"Campos desconocidos: {', '.join(sorted(desconocidos))}")
+    if "sintomas" in campos:
+        campos["sintomas"] = unir_sintomas(campos["sintomas"])
+    lote = evaluar_casos({campo: [valor] for campo, valor in campos.items()})
+    return {columna: valores[0].item() for columna, valores in lote.items()}
@@ -0,0 +1,49 @@
+"""
+Registro compacto del caso de una sesión.
+
+`Caso` guarda en `__slots__` los datos de la historia clínica (barra lateral) y
+los valores derivados del motor, sin `__dict__` por instancia: es lo único del
+caso que la sesión retiene entre reruns y lo que reciben los fragmentos de
+app.py. Los resultados pesados (figuras, incertidumbre, PDF) no viven aquí:
+se piden al caché compartido con `clave`.
+"""
+from hemosim.calculos import CAMPOS
+from hemosim.reportes import CAMPOS_REPORTE
+
+# Widgets de la barra lateral, en orden de aparición
+CAMPOS_HISTORIA = (
+    "edad", "sexo", "ciudad", "es_zona_chagas", "sintomas", "antecedentes", "ritmo",
+    "pas", "pad", "fc", "fr", "sato2", "temp_c", "iy_presente", "iy_desc", "col_venosa", "rhy",
+    "ruidos_agregados", "tiene_soplo", "foco", "ciclo", "patron", "pulmones", "abdomen_viscera", "ascitis",
+    "edema_ex", "pulsos", "frialdad", "llenado", "neuro",
+    "tiene_paraclinicos", "lactato", "rx_patron", "tipo_peptido", "valor_peptido", "fevi",
+)
+CAMPOS_DERIVADOS = ("pam", "pp", "ppp", "score_congest", "score_perf", "pcp_sim", "ic_sim", "cuadrante", "fenotipo_msg")
+
+
+def _compacto(valor):
+    # Las listas de los multiselect se guardan como tuplas (inmutables y más pequeñas)
+    return tuple(valor) if isinstance(valor, list) else valor
+
+
+class Caso:
+    __slots__ = ("clave",) + CAMPOS_HISTORIA + CAMPOS_DERIVADOS
+
+    def __init__(self, clave, **valores):
+        self.clave = clave
+        for campo in CAMPOS_HISTORIA + CAMPOS_DERIVADOS:
+            setattr(self, campo, _compacto(valores[campo]))
+
+    def datos(self, campos):
+        return {campo: getattr(self, campo) for campo in campos}
+
+    def motor(self):
+        """Entradas del motor de hemosim/calculos.py."""
+        return self.datos(CAMPOS)
+
+    def reporte(self):
+        """Datos del reporte PDF."""
+        return self.datos(CAMPOS_REPORTE)
+
+    def __repr__(self):
+        return f"Caso({self.edad} años, {self.sexo}, {self.cuadrante})"
@@ -0,0 +1,33 @@
+"""
+Reglas clínicas escalares (sección "5. LÓGICA CLÍNICA" de app.py).
+
+Se comparten entre la interfaz de Streamlit y el modo por lotes. Los textos y
+cortes vienen de las tablas de hemosim/reglas.py.
+"""
+from hemosim.reglas import tabla
+
+
+def inferir_valvulopatia(foco, ciclo, patron, localizacion_soplo):
+    """Hipótesis del soplo según foco y ciclo (datos/reglas/valvulopatias.json)."""
+    return tabla("valvulopatias").inferir(foco, ciclo, localizacion_soplo)
+
+
+def calcular_fenotipo_fevi(fevi):
+    """Fenotipo por FEVI (datos/reglas/fenotipo_fevi.json)."""
+    return str(tabla("fenotipo_fevi").evaluar(fevi))
+
+
+def mensaje_tratamiento(cuadrante, pas, pad):
+    """Mensaje docente del cuadrante (datos/reglas/mensajes.json): `Mensaje(nivel, texto)` o None."""
+    return tabla("mensajes").mensaje(cuadrante, pas=pas, pad=pad)
+
+
+def estimar_pvc(col_venosa):
+    """PVC por método de Lewis: columna sobre el ángulo de Louis + 5 cm. Devuelve (cmH2O, mmHg)."""
+    pvc_cmh2o = col_venosa + 5
+    return pvc_cmh2o, pvc_cmh2o * 0.735
+
+
+def describir_iy(iy_presente, col_venosa):
+    if iy_presente != "Presente": return "Ausente"
+    return f"Presente (PVC aprox {estimar_pvc(col_venosa)[1]:.1f} mmHg)"
@@ -0,0 +1,35 @@
+"""
+Cohortes de casos calificados para revisar sobre el cuadrante Forrester/Stevenson.
+
+El archivo se califica por bloques con el motor vectorizado y sólo se conservan
+las coordenadas (PCP simulada, IC simulado) de cada caso. La lectura por
+bloques (pandas) se importa al calificar el primer archivo.
+"""
+import numpy as np
+
+from hemosim.calculos import CAMPOS, CORTE_IC, CORTE_PCP, evaluar_casos
+
+CUADRANTES = ("A", "B", "C", "L")
+
+
+def puntuar_cohorte(origen, formato="csv", tamano_bloque=None):
+    """(pcp_sim, ic_sim) de todos los casos de un archivo CSV/JSON Lines (ruta o archivo abierto)."""
+    from hemosim.lote import TAMANO_BLOQUE, completar_casos, leer_bloques
+    pcp, ic = [], []
+    tamano_bloque = tamano_bloque or TAMANO_BLOQUE
+    for bloque in leer_bloques(origen, formato, tamano_bloque):
+        resultado = evaluar_casos(completar_casos(bloque)[list(CAMPOS)])
+        pcp.append(resultado["pcp_sim"].to_numpy(dtype=float))
+        ic.append(resultado["ic_sim"].to_numpy(dtype=float))
+    if not pcp:
+        return np.empty(0), np.empty(0)
+    return np.concatenate(pcp), np.concatenate(ic)
+
+
+def contar_cuadrantes(pcp, ic):
+    """Casos por cuadrante con los mismos cortes del motor (PCP 18, IC 2.2)."""
+    humedo = np.asarray(pcp) > CORTE_PCP
+    frio = ~(np.asarray(ic) > CORTE_IC)
+    # Código 0=A, 1=B, 2=L, 3=C
+    conteo = np.bincount(humedo.astype(np.int64) + 2 * frio, minlength=4)
+    return {"A": int(conteo[0]), "B": int(conteo[1]), "C": int(conteo[3]), "L": int(conteo[2])}
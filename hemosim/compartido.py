@@ -0,0 +1,127 @@
+"""
+Caché de resultados compartido entre sesiones (modo aula).
+
+En clase, decenas de estudiantes cargan el mismo caso docente. Los datos de la
+historia se canonicalizan en una clave inmutable (`clave_canonica`, o su
+resumen de 16 bytes `huella`) y los resultados derivados del caso (cálculo,
+figuras, incertidumbre, PDF) se guardan una sola vez por proceso bajo
+(tipo, clave). Las entradas vencen a los `TTL_S`
+segundos y, por encima de `MAXIMO_ENTRADAS` o de `MAXIMO_BYTES` (tamaño
+profundo de los valores, `hemosim.memoria`), se desaloja la menos usada. Si
+varias sesiones piden a la vez un resultado que falta, sólo la primera lo
+calcula y las demás esperan su valor.
+
+Los valores se comparten entre sesiones: no modificarlos.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from hemosim.memoria import tamano_profundo
+
+MAXIMO_ENTRADAS = 4_096
+MAXIMO_BYTES = 256 * 1024 * 1024
+TTL_S = 2 * 60 * 60  # una jornada de clase
+
+
+def _inmutable(valor):
+    if isinstance(valor, dict): return clave_canonica(valor)
+    if isinstance(valor, (list, tuple)): return tuple(_inmutable(v) for v in valor)
+    if isinstance(valor, (set, frozenset)): return tuple(sorted(_inmutable(v) for v in valor))
+    if isinstance(valor, np.generic): return valor.item()
+    return valor
+
+
+def clave_canonica(datos):
+    """Clave inmutable y hashable de un dict (independiente del orden de las claves)."""
+    return tuple(sorted((campo, _inmutable(valor)) for campo, valor in datos.items()))
+
+
+def huella(datos):
+    """Clave compacta de un dict (16 bytes): resumen BLAKE2b de su clave canónica."""
+    return hashlib.blake2b(repr(clave_canonica(datos)).encode("utf-8"), digest_size=16).digest()
+
+
+class CacheCompartido:
+    """LRU acotado en entradas y bytes, con vencimiento por tiempo, contadores por tipo y cálculo único por clave."""
+
+    def __init__(self, maximo=MAXIMO_ENTRADAS, ttl_s=TTL_S, reloj=time.monotonic, maximo_bytes=MAXIMO_BYTES):
+        self.maximo = maximo
+        self.maximo_bytes = maximo_bytes
+        self.ttl_s = ttl_s
+        self._reloj = reloj
+        self._entradas = OrderedDict()  # (tipo, clave) → (vence, valor, bytes)
+        self._bytes = 0
+        self._en_curso = {}             # (tipo, clave) → threading.Event
+        self._contadores = {}           # tipo → dict(aciertos, fallos, vencidos, desalojados)
+        self._lock = threading.Lock()
+
+    def _contar(self, tipo, contador):
+        conteo = self._contadores.setdefault(tipo, dict(aciertos=0, fallos=0, vencidos=0, desalojados=0))
+        conteo[contador] += 1
+
+    def obtener(self, tipo, clave, calcular):
+        """Valor de (tipo, clave); si falta o venció, `calcular()` lo produce y queda guardado."""
+        llave = (tipo, clave)
+        while True:
+            with self._lock:
+                entrada = self._entradas.get(llave)
+                if entrada is not None:
+                    if entrada[0] > self._reloj():
+                        self._entradas.move_to_end(llave)
+                        self._contar(tipo, "aciertos")
+                        return entrada[1]
+                    self._bytes -= self._entradas.pop(llave)[2]
+                    self._contar(tipo, "vencidos")
+                evento = self._en_curso.get(llave)
+                if evento is None:
+                    self._en_curso[llave] = threading.Event()
+                    self._contar(tipo, "fallos")
+                    break
+            # Otra sesión lo está calculando: se espera y se vuelve a buscar
+            evento.wait()
+
+        try:
+            valor = calcular()
+            tamano = tamano_profundo(valor)
+            with self._lock:
+                self._entradas[llave] = (self._reloj() + self.ttl_s, valor, tamano)
+                self._bytes += tamano
+                # Un valor más grande que todo el límite termina desalojado también: se devuelve sin guardarlo
+                while len(self._entradas) > self.maximo or self._bytes > self.maximo_bytes:
+                    (tipo_desalojado, _), (_, _, liberados) = self._entradas.popitem(last=False)
+                    self._bytes -= liberados
+                    self._contar(tipo_desalojado, "desalojados")
+            return valor
+        finally:
+            with self._lock:
+                self._en_curso.pop(llave).set()
+
+    def valores(self):
+        """Valores guardados (para no contarlos como memoria de cada sesión)."""
+        with self._lock:
+            return [valor for _, valor, _ in self._entradas.values()]
+
+    def vaciar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._contadores.clear()
+            self._bytes = 0
+
+    def resumen(self):
+        """Una fila por tipo de resultado: entradas vigentes, sus bytes, contadores y tasa de aciertos."""
+        with self._lock:
+            entradas, tamanos = {}, {}
+            for (tipo, _), (_, _, tamano) in self._entradas.items():
+                entradas[tipo] = entradas.get(tipo, 0) + 1
+                tamanos[tipo] = tamanos.get(tipo, 0) + tamano
+            contadores = {tipo: dict(conteo) for tipo, conteo in self._contadores.items()}
+        filas = []
+        for tipo, conteo in contadores.items():
+            pedidos = conteo["aciertos"] + conteo["fallos"]
+            filas.append(dict(tipo=tipo, entradas=entradas.get(tipo, 0), bytes=tamanos.get(tipo, 0), **conteo,
+                              tasa_aciertos=conteo["aciertos"] / pedidos if pedidos else None))
+        return filas
@@ -0,0 +1,107 @@
+"""
+Archivos de assets/ servidos por una ruta propia, con Range y caché del navegador.
+
+`Manifiesto` recorre assets/ al iniciar y resume el contenido de cada archivo
+(BLAKE2b): la URL `/estaticos/<hash>/<nombre>` cambia sólo si cambia el
+archivo, así que se sirve como inmutable (`Cache-Control` de un año) con el
+hash como ETag fuerte. `rutas_estaticos` devuelve las rutas Starlette que
+montan `servidor.py` (`st.App`):
+
+- GET/HEAD con 200, 206 (Range, incluido If-Range) o 304 (If-None-Match);
+- `/estaticos/manifiesto.json`: nombre → URL, sin caché.
+
+Con `streamlit run app.py` la ruta no existe (`manifiesto_montado()` es None)
+y app.py sigue enviando los bytes por la sesión.
+"""
+import hashlib
+import mimetypes
+import os
+from collections import namedtuple
+from urllib.parse import quote
+
+from hemosim.texto import normalizar
+
+PREFIJO = "/estaticos"
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+_BLOQUE = 1024 * 1024
+
+Entrada = namedtuple("Entrada", "ruta url etag mime bytes")
+_montado = None
+
+
+def resumen_archivo(ruta):
+    """Hash de contenido (16 hex, BLAKE2b) leyendo el archivo por bloques."""
+    resumen = hashlib.blake2b(digest_size=8)
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(_BLOQUE), b""):
+            resumen.update(bloque)
+    return resumen.hexdigest()
+
+
+class Manifiesto:
+    def __init__(self, directorio):
+        self.directorio = directorio
+        self._por_nombre = {}  # nombre normalizado (sin tildes) → Entrada
+        self._por_url = {}
+        if os.path.isdir(directorio):
+            for archivo in sorted(os.scandir(directorio), key=lambda e: e.name):
+                if not archivo.is_file(): continue
+                etag = resumen_archivo(archivo.path)
+                camino = f"{PREFIJO}/{etag}/{archivo.name}"
+                entrada = Entrada(archivo.path, quote(camino), f'"{etag}"',
+                                  mimetypes.guess_type(archivo.name)[0] or "application/octet-stream", archivo.stat().st_size)
+                self._por_nombre[normalizar(archivo.name)] = entrada
+                self._por_url[camino] = entrada  # la ruta llega decodificada
+
+    def __len__(self):
+        return len(self._por_nombre)
+
+    def buscar(self, ruta):
+        """Entrada de `ruta` (con o sin tildes, p. ej. "assets/Roncus.mp4"), o None."""
+        return self._por_nombre.get(normalizar(os.path.basename(ruta)))
+
+    def para(self, recursos):
+        """Clave de recurso → Entrada (URL con hash, tipo MIME) de los recursos locales del manifiesto."""
+        entradas = {}
+        for clave, ruta in recursos.items():
+            entrada = None if ruta.startswith("http") else self.buscar(ruta)
+            if entrada: entradas[clave] = entrada
+        return entradas
+
+    def urls(self):
+        """Nombre del archivo → URL con hash."""
+        return {os.path.basename(entrada.ruta): entrada.url for entrada in self._por_nombre.values()}
+
+    def respuesta(self, camino, cabeceras):
+        """Respuesta Starlette para el camino pedido (Range y HEAD los resuelve FileResponse)."""
+        from starlette.responses import FileResponse, Response
+        entrada = self._por_url.get(camino)
+        if entrada is None: return Response("Archivo no encontrado", status_code=404)
+        propias = {"ETag": entrada.etag, "Cache-Control": CACHE_INMUTABLE}
+        pedidas = [etag.strip() for etag in cabeceras.get("if-none-match", "").split(",")]
+        if entrada.etag in pedidas or "*" in pedidas: return Response(status_code=304, headers=propias)
+        return FileResponse(entrada.ruta, media_type=entrada.mime, headers=propias)
+
+
+def rutas_estaticos(manifiesto):
+    """Rutas de `manifiesto` para `st.App(routes=...)`; también lo deja disponible para app.py."""
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+    global _montado
+
+    async def archivo(request):
+        return manifiesto.respuesta(request.url.path, request.headers)
+
+    async def indice(request):
+        return JSONResponse(manifiesto.urls(), headers={"Cache-Control": "no-cache"})
+
+    _montado = manifiesto
+    return [
+        Route(f"{PREFIJO}/manifiesto.json", indice, methods=["GET"]),
+        Route(PREFIJO + "/{etag}/{nombre:path}", archivo, methods=["GET", "HEAD"]),
+    ]
+
+
+def manifiesto_montado():
+    """Manifiesto de la ruta de estáticos si el servidor la montó (servidor.py), o None."""
+    return _montado
@@ -0,0 +1,108 @@
+"""
+Explorador exhaustivo de combinaciones de intervenciones.
+
+Las seis intervenciones de la pestaña "💊 Terapéutica" forman 64 combinaciones;
+cada una se evalúa además a varias escalas de dosis, todas en una sola llamada
+a `trayectorias_dosis`. El resultado se ordena por distancia al cuadrante A y
+marca las combinaciones con alertas de seguridad, cuyo texto sale de los
+efectos adversos de `MEDS_AGUDOS`. Queda en caché por paciente.
+"""
+import itertools
+import re
+from functools import lru_cache
+
+import numpy as np
+
+from hemosim.calculos import CORTE_IC, CORTE_PCP, CUADRANTE_A, CUADRANTE_B, CUADRANTE_C, CUADRANTE_L
+from hemosim.farmacologia import MEDS_AGUDOS
+from hemosim.terapia import ESCALAS_DOSIS, HORIZONTE_MIN, INTERVENCIONES, trayectorias_dosis
+
+CLAVES = tuple(INTERVENCIONES)
+# Escala de cada eje al medir la distancia al cuadrante A (rango del gráfico)
+ESCALA_PCP, ESCALA_IC = 40, 5
+SIN_INTERVENCION = "Sin intervención"
+
+
+def efecto_adverso(clave, termino):
+    """Fragmento de `MEDS_AGUDOS[clave]["adverso"]` que menciona `termino`."""
+    # Separa por comas que no estén dentro de paréntesis
+    for fragmento in re.split(r",\s*(?![^()]*\))", MEDS_AGUDOS[clave]["adverso"].rstrip(".")):
+        if termino.casefold() in fragmento.casefold(): return fragmento.strip()
+    raise KeyError(f"{clave}: ningún efecto adverso menciona {termino!r}")
+
+
+def _dosis(d, clave):
+    return d[:, CLAVES.index(clave)]
+
+
+# Alertas de seguridad: (condición vectorizada, intervención y término del efecto adverso).
+# La condición recibe el paciente (dict) y la matriz de dosis (combinaciones × CLAVES).
+_REGLAS_ALERTA = (
+    (lambda p, d: (_dosis(d, "liquidos") > 0) & (p["pcp"] > CORTE_PCP), "liquidos", "Edema Pulmonar"),
+    (lambda p, d: (_dosis(d, "diureticos") > 0) & ((p["pas"] < 90) | (p["pcp"] <= CORTE_PCP)), "diureticos", "Hipotensión"),
+    # A mayor dosis de vasodilatador, más margen de presión se exige
+    (lambda p, d: (_dosis(d, "vasodilatadores") > 0) & (p["pas"] < 90 + 20 * np.maximum(_dosis(d, "vasodilatadores") - 1, 0)),
+     "vasodilatadores", "Hipotensión severa"),
+    (lambda p, d: (_dosis(d, "inotropicos") > 0) & (p["ritmo"] in ("Fibrilación Auricular", "Flutter Atrial")),
+     "inotropicos", "Fibrilación auricular"),
+    (lambda p, d: (_dosis(d, "inotropicos") > 0) & (_dosis(d, "vasopresores") > 0), "vasopresores", "Arritmias"),
+    (lambda p, d: (_dosis(d, "vasopresores") > 0) & (_dosis(d, "inotropicos") == 0) & (p["ic"] <= CORTE_IC),
+     "vasopresores", "postcarga"),
+    (lambda p, d: (_dosis(d, "oxigeno") > 0) & ((p["neuro"] != "Alerta") | ("Vómito" in p["sintomas"])),
+     "oxigeno", "broncoaspiración"),
+)
+# El texto se resuelve al importar: si cambia MEDS_AGUDOS y un término deja de existir, falla aquí
+ALERTAS = tuple(
+    (condicion, f"{INTERVENCIONES[clave]['nombre']}: {efecto_adverso(clave, termino)}")
+    for condicion, clave, termino in _REGLAS_ALERTA
+)
+
+
+def _variantes(escalas):
+    """Matriz de dosis (combinaciones × CLAVES) y la escala de cada fila."""
+    filas, escala_fila = [], []
+    for mascara in itertools.product((0.0, 1.0), repeat=len(CLAVES)):
+        for escala in (escalas if any(mascara) else (1.0,)):
+            filas.append(np.array(mascara) * escala)
+            escala_fila.append(escala)
+    return np.array(filas), np.array(escala_fila)
+
+
+@lru_cache(maxsize=64)
+def explorar(pcp0, ic0, pas, ritmo="Sinusal", neuro="Alerta", sintomas="", escalas=ESCALAS_DOSIS, horizonte=HORIZONTE_MIN):
+    """
+    Todas las combinaciones y escalas de dosis para un paciente, de la más a la
+    menos cercana al cuadrante A. El DataFrame se comparte entre llamadas: no
+    modificarlo.
+    """
+    import pandas as pd
+    dosis, escala = _variantes(escalas)
+    regimen = tuple((clave, 0, 1.0, None) for clave in CLAVES)
+    _, pcp, ic = trayectorias_dosis(pcp0, ic0, regimen, dosis, horizonte)
+    pcp, ic = pcp[:, -1], ic[:, -1]
+
+    humedo, caliente = pcp > CORTE_PCP, ic > CORTE_IC
+    cuadrante = np.select([humedo & caliente, humedo, ~caliente], [CUADRANTE_B, CUADRANTE_C, CUADRANTE_L], CUADRANTE_A)
+    distancia = np.hypot(np.maximum(pcp - CORTE_PCP, 0) / ESCALA_PCP, np.maximum(CORTE_IC - ic, 0) / ESCALA_IC)
+
+    paciente = dict(pcp=pcp0, ic=ic0, pas=pas, ritmo=ritmo, neuro=neuro, sintomas=sintomas)
+    activas = np.column_stack([condicion(paciente, dosis) for condicion, _ in ALERTAS])
+    textos = [texto for _, texto in ALERTAS]
+
+    resultado = pd.DataFrame({
+        "combinacion": [" + ".join(INTERVENCIONES[c]["nombre"] for c, d in zip(CLAVES, fila) if d > 0) or SIN_INTERVENCION
+                        for fila in dosis],
+        "escala": escala,
+        "n_intervenciones": (dosis > 0).sum(axis=1),
+        "pcp_final": pcp.round(1),
+        "ic_final": ic.round(2),
+        "cuadrante": cuadrante,
+        "distancia_a": distancia.round(4),
+        "alertas": ["; ".join(t for t, activa in zip(textos, fila) if activa) for fila in activas],
+        "segura": ~activas.any(axis=1),
+    })
+    resultado = resultado.sort_values(
+        ["distancia_a", "segura", "n_intervenciones", "escala"], ascending=[True, False, True, True], kind="stable",
+    ).reset_index(drop=True)
+    resultado.index += 1
+    return resultado
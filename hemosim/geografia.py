@@ -0,0 +1,127 @@
+"""
+Municipios de Colombia y zonas endémicas de Chagas.
+
+Los datos viven en `datos/geografia.json` (un registro por municipio de la
+DIVIPOLA: nombre, departamento, código DANE y si es zona de Chagas) y se cargan
+una vez por proceso. Un nombre se repite entre departamentos ("Toledo" en
+Antioquia y en Norte de Santander), así que cada municipio se identifica por su
+etiqueta "Nombre (Departamento)".
+
+La búsqueda acepta texto sin tildes ("Caqueza" → "Cáqueza (Cundinamarca)") y
+combina un índice de prefijos (búsqueda binaria sobre nombres normalizados) con
+uno de trigramas para tolerar errores de digitación.
+"""
+import bisect
+import json
+import os
+from collections import Counter, namedtuple
+from functools import lru_cache
+
+from hemosim.texto import normalizar
+
+RUTA_DATOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "datos", "geografia.json")
+VERSION = 2
+LIMITE_RESULTADOS = 15
+# Fracción mínima de trigramas compartidos para aceptar una coincidencia aproximada
+SIMILITUD_MINIMA = 0.4
+
+
+def _trigramas(texto):
+    texto = f"  {texto} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+Municipio = namedtuple("Municipio", "nombre departamento codigo_dane chagas")
+
+
+def etiqueta(municipio):
+    return f"{municipio.nombre} ({municipio.departamento})"
+
+
+class Geografia:
+    def __init__(self, municipios):
+        self.municipios = tuple(sorted(municipios, key=lambda m: (normalizar(m.nombre), normalizar(m.departamento))))
+        self.etiquetas = tuple(etiqueta(m) for m in self.municipios)
+        self.zonas_chagas = frozenset(e for e, m in zip(self.etiquetas, self.municipios) if m.chagas)
+        self._por_clave = {}  # etiqueta o código DANE → municipio
+        self._por_nombre = {}  # nombre normalizado → municipios con ese nombre
+        for e, m in zip(self.etiquetas, self.municipios):
+            if e in self._por_clave or m.codigo_dane in self._por_clave:
+                raise ValueError(f"Municipio repetido: {e} ({m.codigo_dane})")
+            self._por_clave[e] = self._por_clave[m.codigo_dane] = m
+            self._por_nombre.setdefault(normalizar(m.nombre), []).append(m)
+        self._normalizados = [normalizar(m.nombre) for m in self.municipios]
+        self._etiquetas_normalizadas = [normalizar(e) for e in self.etiquetas]
+        # Índice de prefijos: (etiqueta normalizada, posición) ordenado; "toledo" encuentra los dos Toledo
+        self._prefijos = sorted((n, i) for i, n in enumerate(self._etiquetas_normalizadas))
+        # Índice de prefijos por palabra ("rosa" encuentra "Santa Rosa de Cabal")
+        self._palabras = sorted(
+            (palabra, i) for i, n in enumerate(self._normalizados) for palabra in set(n.split()[1:])
+        )
+        self._trigramas = {}
+        self._total_trigramas = []
+        for i, n in enumerate(self._normalizados):
+            trigramas = _trigramas(n)
+            self._total_trigramas.append(len(trigramas))
+            for t in trigramas:
+                self._trigramas.setdefault(t, []).append(i)
+
+    def municipio(self, texto):
+        """Municipio de una etiqueta, un código DANE o un nombre sin repetir (casos anteriores a las etiquetas); None si no hay uno solo."""
+        if texto in self._por_clave: return self._por_clave[texto]
+        mismos = self._por_nombre.get(normalizar(texto or ""), ())
+        return mismos[0] if len(mismos) == 1 else None
+
+    def etiqueta(self, texto):
+        municipio = self.municipio(texto)
+        return None if municipio is None else etiqueta(municipio)
+
+    def es_zona_chagas(self, municipio):
+        municipio = self.municipio(municipio)
+        return municipio is not None and municipio.chagas
+
+    @staticmethod
+    def _con_prefijo(indice, prefijo):
+        inicio = bisect.bisect_left(indice, (prefijo,))
+        for nombre, i in indice[inicio:]:
+            if not nombre.startswith(prefijo): break
+            yield i
+
+    def buscar(self, consulta, limite=LIMITE_RESULTADOS):
+        """Etiquetas de los municipios que coinciden con `consulta`, del más al menos relevante."""
+        consulta = " ".join(normalizar(consulta).split())
+        if not consulta: return []
+        orden = []
+        vistos = set()
+
+        def agregar(indices):
+            for i in indices:
+                if i not in vistos:
+                    vistos.add(i)
+                    orden.append(i)
+
+        # 1. Nombre que empieza por la consulta (exacto primero)  2. Alguna palabra que empieza por ella
+        agregar(sorted(
+            self._con_prefijo(self._prefijos, consulta),
+            key=lambda i: consulta not in (self._normalizados[i], self._etiquetas_normalizadas[i]),
+        ))
+        agregar(sorted(self._con_prefijo(self._palabras, consulta)))
+        # 3. Coincidencia aproximada por trigramas
+        if len(orden) < limite:
+            trigramas = _trigramas(consulta)
+            conteo = Counter(i for t in trigramas for i in self._trigramas.get(t, ()))
+            candidatos = [  # (−Jaccard, posición)
+                (-compartidos / (len(trigramas) + self._total_trigramas[i] - compartidos), i)
+                for i, compartidos in conteo.items() if i not in vistos
+            ]
+            agregar(i for similitud, i in sorted(candidatos) if -similitud >= SIMILITUD_MINIMA)
+        return [self.etiquetas[i] for i in orden[:limite]]
+
+
+@lru_cache(maxsize=None)
+def cargar_geografia(ruta=RUTA_DATOS):
+    """Carga (una vez por proceso) el archivo de geografía."""
+    with open(ruta, encoding="utf-8") as f:
+        datos = json.load(f)
+    if datos.get("version") != VERSION: raise ValueError(f"Versión de geografía no soportada: {datos.get('version')}")
+    return Geografia(Municipio(**registro) for registro in datos["municipios"])
@@ -0,0 +1,223 @@
+"""
+Figuras del cuadrante Forrester/Stevenson.
+
+La plantilla (cuadrantes, líneas de corte y rótulos) se construye y serializa
+una sola vez por proceso. En cada rerun sólo se agregan el punto del paciente y
+la flecha de tratamiento sobre una copia del JSON ya serializado. Streamlit
+igual valida el dict construyendo un `go.Figure` al mostrarlo; lo que se ahorra
+es la copia profunda de la plantilla de Plotly en cada figura y la parte del
+tema que no se usa (un JSON más chico hacia el navegador).
+
+Las cohortes se dibujan con WebGL (`scattergl`) mientras caben como puntos;
+por encima de `UMBRAL_PUNTOS` se agregan en el servidor en una grilla 2D y sólo
+viajan al navegador los conteos por celda.
+"""
+import json
+from functools import lru_cache
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from hemosim.calculos import CORTE_IC, CORTE_PCP
+from hemosim.cohorte import contar_cuadrantes
+
+# Tipos de traza cuyo estilo por defecto se conserva en la plantilla de Plotly;
+# el resto del tema (≈ la mitad del JSON) no se usa y no se envía al navegador.
+TIPOS_TRAZA = ("scatter",)
+TIPOS_COHORTE = ("scatter", "scattergl", "heatmap", "contour")
+# Más casos que esto se muestran como densidad en lugar de puntos individuales
+UMBRAL_PUNTOS = 20_000
+# Grilla de densidad: 1 mmHg de PCP × 0.1 L/min/m² de IC sobre el área del cuadrante
+BORDES_PCP = np.linspace(0, 40, 41)
+BORDES_IC = np.linspace(0, 5, 51)
+# Puntos de la nube de incertidumbre que se envían al navegador
+PUNTOS_NUBE = 3_000
+# Posición del conteo bajo el rótulo de cada cuadrante
+_POSICION_CONTEO = {"A": (9, 4.15), "B": (29, 4.15), "L": (9, 0.15), "C": (29, 0.15)}
+
+
+@lru_cache(maxsize=None)
+def _plantilla_json(tipos_traza=TIPOS_TRAZA):
+    fig = go.Figure()
+    fig.add_shape(type="rect", x0=0, y0=CORTE_IC, x1=CORTE_PCP, y1=5, fillcolor="rgba(144, 238, 144, 0.2)", line_width=0)
+    fig.add_shape(type="rect", x0=CORTE_PCP, y0=CORTE_IC, x1=40, y1=5, fillcolor="rgba(255, 218, 185, 0.4)", line_width=0)
+    fig.add_shape(type="rect", x0=0, y0=0, x1=CORTE_PCP, y1=CORTE_IC, fillcolor="rgba(173, 216, 230, 0.3)", line_width=0)
+    fig.add_shape(type="rect", x0=CORTE_PCP, y0=0, x1=40, y1=CORTE_IC, fillcolor="rgba(255, 182, 193, 0.4)", line_width=0)
+    fig.add_vline(x=CORTE_PCP, line_dash="solid", line_color="gray")
+    fig.add_hline(y=CORTE_IC, line_dash="solid", line_color="gray")
+
+    fig.add_annotation(x=9, y=4.5, text="<b>A: SECO / CALIENTE</b>", showarrow=False, font=dict(color="green"))
+    fig.add_annotation(x=29, y=4.5, text="<b>B: HÚMEDO / CALIENTE</b>", showarrow=False, font=dict(color="orange"))
+    fig.add_annotation(x=9, y=0.5, text="<b>L: SECO / FRÍO</b>", showarrow=False, font=dict(color="blue"))
+    fig.add_annotation(x=29, y=0.5, text="<b>C: HÚMEDO / FRÍO</b>", showarrow=False, font=dict(color="red"))
+    fig.update_layout(title="Cuadrante Forrester/Stevenson", xaxis_title="Congestión (PCP)", yaxis_title="Perfusión (IC)", height=500)
+
+    spec = fig.to_plotly_json()
+    tema = spec["layout"]["template"]
+    tema["data"] = {tipo: tema["data"][tipo] for tipo in tipos_traza if tipo in tema["data"]}
+    return pio.to_json(spec, validate=False)
+
+
+def figura_base(tipos_traza=TIPOS_TRAZA):
+    """Copia nueva (dict) de la plantilla cacheada, lista para agregar trazas; `st.plotly_chart` la valida como `go.Figure`."""
+    return json.loads(_plantilla_json(tuple(tipos_traza)))
+
+
+def _marcador_paciente(pcp_sim, ic_sim):
+    return dict(
+        type="scatter", x=[pcp_sim], y=[ic_sim], mode="markers+text",
+        marker=dict(size=25, color="black", line=dict(width=2, color="white")),
+        text=["<b>PACIENTE</b>"], textposition="top center",
+    )
+
+
+def figura_stevenson(pcp_sim, ic_sim, tipos_traza=TIPOS_TRAZA):
+    """Plantilla + punto del paciente."""
+    fig = figura_base(tipos_traza)
+    fig["data"].append(_marcador_paciente(pcp_sim, ic_sim))
+    return fig
+
+
+def densidad_cohorte(pcp, ic):
+    """Conteos por celda de la grilla (filas = IC, columnas = PCP); celdas vacías en None."""
+    conteo, _, _ = np.histogram2d(
+        np.clip(pcp, BORDES_PCP[0], BORDES_PCP[-1]), np.clip(ic, BORDES_IC[0], BORDES_IC[-1]),
+        bins=(BORDES_PCP, BORDES_IC),
+    )
+    return [[int(n) if n else None for n in fila] for fila in conteo.T]
+
+
+def figura_cohorte(pcp, ic, pcp_sim=None, ic_sim=None, umbral=UMBRAL_PUNTOS, estilo="heatmap"):
+    """Plantilla + cohorte (puntos WebGL o densidad) + conteo por cuadrante + paciente opcional.
+
+    `estilo` ("heatmap" o "contour") sólo aplica cuando la cohorte supera `umbral`.
+    """
+    pcp, ic = np.asarray(pcp, dtype=float), np.asarray(ic, dtype=float)
+    fig = figura_base(TIPOS_COHORTE)
+    if len(pcp) <= umbral:
+        fig["data"].append(dict(
+            type="scattergl", x=pcp, y=ic, mode="markers", name="Cohorte",
+            marker=dict(size=6, color="rgba(70, 70, 160, 0.35)"), hoverinfo="skip",
+        ))
+    else:
+        fig["data"].append(dict(
+            type=estilo, z=densidad_cohorte(pcp, ic), name="Cohorte",
+            x=((BORDES_PCP[:-1] + BORDES_PCP[1:]) / 2).tolist(), y=((BORDES_IC[:-1] + BORDES_IC[1:]) / 2).tolist(),
+            colorscale="Blues", opacity=0.75, colorbar=dict(title="Casos"),
+            hovertemplate="PCP %{x}<br>IC %{y:.2f}<br>%{z} casos<extra></extra>",
+        ))
+
+    total = max(len(pcp), 1)
+    anotaciones = fig["layout"].setdefault("annotations", [])
+    for cuadrante, n in contar_cuadrantes(pcp, ic).items():
+        x, y = _POSICION_CONTEO[cuadrante]
+        anotaciones.append(dict(x=x, y=y, text=f"n = {n:,} ({n / total:.0%})", showarrow=False))
+
+    if pcp_sim is not None:
+        fig["data"].append(_marcador_paciente(pcp_sim, ic_sim))
+    # Conserva el zoom del usuario entre reruns
+    fig["layout"]["uirevision"] = "cohorte"
+    return fig
+
+
+def agregar_tratamiento(fig, pcp_sim, ic_sim, new_pcp, new_ic):
+    """Flecha desde el paciente hasta el punto post-intervención."""
+    fig["layout"].setdefault("annotations", []).append(dict(
+        x=new_pcp, y=new_ic, ax=pcp_sim, ay=ic_sim, xref="x", yref="y", axref="x", ayref="y",
+        arrowwidth=4, arrowhead=2, arrowcolor="purple",
+    ))
+    fig["data"].append(dict(
+        type="scatter", x=[new_pcp], y=[new_ic], mode="markers",
+        marker=dict(size=20, color="purple", symbol="x"), name="Post-Rx",
+    ))
+    return fig
+
+
+def agregar_nube(fig, pcp, ic, puntos=PUNTOS_NUBE):
+    """Nube de muestras Monte Carlo alrededor del paciente (debajo del marcador).
+
+    El motor da valores discretos de PCP/IC: se envía una submuestra con un
+    pequeño desplazamiento aleatorio para que la densidad sea visible.
+    """
+    pcp, ic = np.asarray(pcp[:puntos], dtype=float), np.asarray(ic[:puntos], dtype=float)
+    rng = np.random.default_rng(0)
+    nube = dict(
+        type="scattergl", x=pcp + rng.uniform(-0.6, 0.6, len(pcp)), y=ic + rng.uniform(-0.08, 0.08, len(ic)),
+        mode="markers", name="Incertidumbre", marker=dict(size=4, color="rgba(128, 0, 128, 0.2)"), hoverinfo="skip",
+    )
+    # El marcador del paciente es la última traza: la nube queda debajo
+    fig["data"].insert(max(len(fig["data"]) - 1, 0), nube)
+    return fig
+
+
+def agregar_trayectoria(fig, tiempos, pcp, ic, cada_min=60):
+    """Recorrido temporal del tratamiento, con una marca por hora y el punto final."""
+    tiempos = np.asarray(tiempos)
+    marcas = (tiempos % cada_min == 0) | (tiempos == tiempos[-1])
+    fig["data"].append(dict(
+        type="scatter", x=np.asarray(pcp).tolist(), y=np.asarray(ic).tolist(), mode="lines", name="Trayectoria",
+        line=dict(color="purple", width=3), customdata=(tiempos / 60).tolist(),
+        hovertemplate="t = %{customdata:.1f} h<br>PCP %{x:.1f}<br>IC %{y:.2f}<extra></extra>",
+    ))
+    fig["data"].append(dict(
+        type="scatter", x=np.asarray(pcp)[marcas].tolist(), y=np.asarray(ic)[marcas].tolist(),
+        mode="markers+text", name="Horas", text=[f"{t / 60:g} h" for t in tiempos[marcas]],
+        textposition="bottom right", marker=dict(size=8, color="purple"), hoverinfo="skip", showlegend=False,
+    ))
+    fig["data"].append(dict(
+        type="scatter", x=[float(pcp[-1])], y=[float(ic[-1])], mode="markers",
+        marker=dict(size=20, color="purple", symbol="x"), name="Post-Rx",
+    ))
+    return fig
+
+
+def agregar_respuesta_dosis(fig, pcp, ic, escalas):
+    """Puntos finales del mismo régimen a distintas dosis (× estándar)."""
+    fig["data"].append(dict(
+        type="scatter", x=np.asarray(pcp).tolist(), y=np.asarray(ic).tolist(), mode="lines+markers+text",
+        name="Dosis-respuesta", text=[f"×{escala:g}" for escala in escalas], textposition="top left",
+        line=dict(color="gray", dash="dot"), marker=dict(size=7, color="gray"),
+    ))
+    return fig
+
+
+# Color de cada código de `hemosim.sensibilidad.CODIGOS` (A, B, L, C), los de la plantilla
+_COLORES_CUADRANTE = ("rgb(120, 200, 120)", "rgb(250, 180, 110)", "rgb(130, 180, 220)", "rgb(235, 120, 135)")
+_ESTILO_LIMITE = {"PAM < 65": dict(color="black", width=3), "PPP < 25": dict(color="purple", width=3, dash="dash")}
+
+
+def figura_sensibilidad(mapa, rotulos, paciente=None):
+    """Mapa del cuadrante sobre dos ejes (`hemosim.sensibilidad.mapa_sensibilidad`).
+
+    `rotulos` es {eje: (rótulo, opciones u None)}; los ejes de texto se dibujan
+    por índice con sus opciones como marcas. Los límites del mapa se trazan
+    sólo si cruzan la grilla. `paciente` es (x, y) o None.
+    """
+    ejes = {}
+    for nombre, eje in (("x", mapa["eje_x"]), ("y", mapa["eje_y"])):
+        rotulo, opciones = rotulos[eje]
+        valores = np.asarray(mapa[nombre])
+        ejes[nombre] = valores if opciones is None else np.arange(len(opciones))
+        ejes[nombre + "axis"] = dict(title=rotulo) if opciones is None else \
+            dict(title=rotulo, tickvals=list(range(len(opciones))), ticktext=list(opciones))
+    escala = [[limite, color] for i, color in enumerate(_COLORES_CUADRANTE) for limite in (i / 4, (i + 1) / 4)]
+    datos = [dict(
+        type="heatmap", x=ejes["x"], y=ejes["y"], z=mapa["codigo"], zmin=-0.5, zmax=3.5, colorscale=escala,
+        colorbar=dict(title="Cuadrante", tickvals=[0, 1, 2, 3], ticktext=["A", "B", "L", "C"]),
+        hovertemplate="%{x}<br>%{y}<extra></extra>",
+    )]
+    for rotulo, debajo in mapa["limites"].items():
+        if debajo.all() or not debajo.any(): continue
+        # Sólo viaja la máscara de celdas bajo el límite (int8): el borde es su contorno a 0.5
+        datos.append(dict(
+            type="contour", x=ejes["x"], y=ejes["y"], z=debajo.astype(np.int8), name=rotulo, showlegend=True, showscale=False,
+            contours=dict(start=0.5, end=0.5, size=1, coloring="none"), line=_ESTILO_LIMITE.get(rotulo, {}),
+            hoverinfo="skip",
+        ))
+    if paciente is not None and None not in paciente:
+        datos.append(_marcador_paciente(*paciente))
+    return dict(data=datos, layout=dict(
+        title="Sensibilidad del cuadrante de Stevenson", xaxis=ejes["xaxis"], yaxis=ejes["yaxis"], height=500,
+        legend=dict(orientation="h", y=-0.15), uirevision="sensibilidad",
+    ))
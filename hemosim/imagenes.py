@@ -0,0 +1,91 @@
+"""
+Derivadas de imagen por resolución para las Rx de tórax y el método de Lewis.
+
+La barra lateral muestra una miniatura y la resolución completa se pide bajo
+demanda. Cada derivada se genera una sola vez y se guarda en disco con el hash
+del contenido de la imagen original en el nombre, así sólo se regenera cuando
+cambia la fuente.
+"""
+import hashlib
+import io
+import logging
+import os
+import threading
+
+from PIL import Image, ImageOps
+
+# Ancho máximo (px) de cada nivel
+NIVELES = {
+    "miniatura": 480,
+    "completa": 1600,
+}
+CALIDAD_JPEG = 82
+
+log = logging.getLogger(__name__)
+
+
+def generar_derivada(datos, ancho):
+    """JPEG progresivo de ancho máximo `ancho`; si no resulta más liviano se deja el original."""
+    with Image.open(io.BytesIO(datos)) as original:
+        imagen = ImageOps.exif_transpose(original)
+        if imagen.width > ancho:
+            imagen = imagen.resize((ancho, round(imagen.height * ancho / imagen.width)), Image.LANCZOS)
+        if imagen.mode not in ("RGB", "L"):
+            imagen = imagen.convert("RGB")
+        salida = io.BytesIO()
+        imagen.save(salida, "JPEG", quality=CALIDAD_JPEG, optimize=True, progressive=True)
+    derivada = salida.getvalue()
+    return derivada if len(derivada) < len(datos) else datos
+
+
+class DerivadasImagen:
+    def __init__(self, indice, directorio_cache):
+        self.indice = indice
+        self.directorio_cache = directorio_cache
+        self._memoria = {}
+        self._huellas = {}
+        self._lock = threading.Lock()
+
+    def _huella(self, ruta, datos):
+        real = self.indice.resolver(ruta)
+        with self._lock:
+            huella = self._huellas.get(real)
+        if huella is None:
+            huella = hashlib.sha256(datos).hexdigest()[:20]
+            with self._lock:
+                self._huellas[real] = huella
+        return huella
+
+    def obtener(self, ruta, nivel="miniatura"):
+        """Bytes JPEG del nivel pedido, o None si la imagen no existe."""
+        archivo = self.indice.leer(ruta)
+        if archivo is None: return None
+        datos, _ = archivo
+        ancho = NIVELES[nivel]
+        huella = self._huella(ruta, datos)
+        with self._lock:
+            derivada = self._memoria.get((huella, ancho))
+        if derivada is not None:
+            return derivada
+
+        destino = os.path.join(self.directorio_cache, f"{huella}_{ancho}.jpg")
+        if os.path.exists(destino):
+            with open(destino, "rb") as f:
+                derivada = f.read()
+        else:
+            derivada = generar_derivada(datos, ancho)
+            self._guardar(destino, derivada)
+        with self._lock:
+            self._memoria[(huella, ancho)] = derivada
+        return derivada
+
+    def _guardar(self, destino, derivada):
+        try:
+            os.makedirs(self.directorio_cache, exist_ok=True)
+            temporal = f"{destino}.{os.getpid()}.tmp"
+            with open(temporal, "wb") as f:
+                f.write(derivada)
+            os.replace(temporal, destino)
+        except OSError as e:
+            # Disco de sólo lectura: la derivada queda sólo en memoria
+            log.warning("No se pudo guardar la derivada %s: %s", destino, e)
@@ -0,0 +1,82 @@
+"""
+Modo incertidumbre: propagación Monte Carlo del error de medición del examen.
+
+Las variables ruidosas de la cabecera (PAS/PAD, llenado capilar, altura de la
+columna venosa, lactato) se perturban según `ERRORES_MEDICION` y las muestras
+se califican en un solo lote con el motor vectorizado. El ruido estándar se
+genera una vez por proceso y se reutiliza en cada rerun (números aleatorios
+comunes): cada interacción sólo escala y desplaza el búfer, y las
+probabilidades no parpadean entre reruns que no cambian el caso.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from hemosim.calculos import evaluar_casos, unir_sintomas
+from hemosim.cohorte import contar_cuadrantes
+
+MUESTRAS = 100_000
+SEMILLA = 2024
+DISTRIBUCIONES = ("normal", "uniforme")
+# Error por variable: (distribución, escala). Normal: desviación estándar; uniforme: semiamplitud.
+ERRORES_MEDICION = {
+    "pas": ("normal", 8.0),         # mmHg
+    "pad": ("normal", 6.0),         # mmHg
+    "llenado": ("normal", 0.7),     # s
+    "col_venosa": ("normal", 1.5),  # cm sobre el ángulo de Louis
+    "lactato": ("normal", 0.2),     # mmol/L
+}
+VARIABLES = tuple(ERRORES_MEDICION)
+# Columna > 3 cm sobre el ángulo de Louis (PVC ≈ 8 cmH2O) se lee como IY presente
+UMBRAL_IY_CM = 3
+
+
+@lru_cache(maxsize=None)
+def _ruido(distribucion, n=MUESTRAS):
+    """Ruido estándar de solo lectura, una fila por variable de `VARIABLES`."""
+    rng = np.random.default_rng(SEMILLA + DISTRIBUCIONES.index(distribucion))
+    forma = (len(VARIABLES), n)
+    ruido = rng.standard_normal(forma) if distribucion == "normal" else rng.uniform(-1.0, 1.0, forma)
+    ruido.flags.writeable = False
+    return ruido
+
+
+def _perturbar(valor, campo, errores, n):
+    distribucion, escala = errores[campo]
+    if distribucion not in DISTRIBUCIONES:
+        raise ValueError(f"Distribución desconocida para {campo}: {distribucion}")
+    return np.maximum(valor + escala * _ruido(distribucion, n)[VARIABLES.index(campo)], 0)
+
+
+def muestrear(caso, col_venosa=None, errores=ERRORES_MEDICION, n=MUESTRAS):
+    """Columnas del motor con `n` lecturas perturbadas de `caso`; el resto de campos queda escalar."""
+    muestras = dict(caso)
+    if "sintomas" in muestras:
+        muestras["sintomas"] = unir_sintomas(muestras["sintomas"])
+    for campo in ("pas", "pad", "llenado", "lactato"):
+        if campo in errores:
+            muestras[campo] = _perturbar(muestras[campo], campo, errores, n)
+    if "pas" in errores or "pad" in errores:
+        muestras["pad"] = np.minimum(muestras["pad"], muestras["pas"])
+    if col_venosa is not None and "col_venosa" in errores and muestras.get("iy_presente") == "Presente":
+        import pandas as pd
+        presente = _perturbar(col_venosa, "col_venosa", errores, n) > UMBRAL_IY_CM
+        muestras["iy_presente"] = pd.Categorical.from_codes(presente.astype(np.int8), ["Ausente", "Presente"])
+    return muestras
+
+
+def simular(caso, col_venosa=None, errores=ERRORES_MEDICION, n=MUESTRAS, muestra=None):
+    """
+    PCP/IC simulados de cada muestra y probabilidad de cada cuadrante de
+    Stevenson. Con `muestra` sólo se devuelven (copiadas) las primeras
+    `muestra` lecturas, p. ej. las que dibuja la nube.
+    """
+    resultado = evaluar_casos(muestrear(caso, col_venosa, errores, n))
+    pcp, ic = resultado["pcp_sim"], resultado["ic_sim"]
+    conteo = contar_cuadrantes(pcp, ic)
+    total = len(pcp)
+    if muestra is not None: pcp, ic = pcp[:muestra].copy(), ic[:muestra].copy()
+    return {
+        "pcp_sim": pcp, "ic_sim": ic,
+        "probabilidades": {cuadrante: n_cuadrante / total for cuadrante, n_cuadrante in conteo.items()},
+    }
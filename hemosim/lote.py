@@ -0,0 +1,135 @@
+"""
+Modo por lotes sin interfaz: re-califica archivos de casos por bloques.
+
+Uso:
+    python -m hemosim casos.csv --salida resultados.csv
+    cat examenes.jsonl | python -m hemosim - --formato-entrada jsonl
+
+Lee CSV o JSON Lines (archivo o stdin) en bloques de tamaño fijo, evalúa cada
+bloque con el motor vectorizado y escribe el resultado apenas termina, de modo
+que la memoria no crece con el tamaño de la entrada. Las columnas de entrada
+usan los nombres de `hemosim.calculos.CAMPOS` más `fevi`, `tiene_soplo`,
+`foco`, `ciclo` y `patron`; las ausentes o vacías toman el valor por defecto.
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from hemosim.calculos import _VERDADEROS, CAMPOS, CAMPOS_BOOL, evaluar_casos, unir_sintomas
+from hemosim.reglas import tabla
+
+# Campos que no entran al motor pero sí al reporte (valores por defecto de la barra lateral)
+CAMPOS_EXTRA = {
+    "fevi": 55,
+    "tiene_soplo": False,
+    "foco": "Aórtico",
+    "ciclo": "Sistólico",
+    "patron": "Holosistólico",
+}
+
+FENOTIPO_NO_DETERMINADO = "No determinado (Requiere Eco)"
+TAMANO_BLOQUE = 10_000
+
+
+def completar_casos(bloque, extra=None):
+    """
+    Copia del bloque con campos ausentes o vacíos rellenados y booleanos normalizados.
+
+    Una columna booleana con celdas vacías llega como float: 1.0 cuenta como verdadero.
+
+    >>> bloque = pd.DataFrame({"rhy": [1, None], "ascitis": ["sí", "0"]})
+    >>> completar_casos(bloque)[["rhy", "ascitis"]].values.tolist()
+    [[True, True], [False, False]]
+    """
+    casos = bloque.copy()
+    for campo, defecto in {**CAMPOS, **CAMPOS_EXTRA, **(extra or {})}.items():
+        if campo not in casos:
+            casos[campo] = defecto
+        elif casos[campo].isna().any():
+            casos[campo] = casos[campo].where(casos[campo].notna(), defecto)
+    if casos["sintomas"].dtype == object:
+        casos["sintomas"] = casos["sintomas"].map(unir_sintomas)
+    for campo in CAMPOS_BOOL | {"tiene_soplo"}:
+        if casos[campo].dtype == bool: continue
+        numeros = pd.to_numeric(casos[campo], errors="coerce").fillna(0)
+        casos[campo] = numeros.ne(0) | casos[campo].astype(str).str.strip().str.lower().isin(_VERDADEROS)
+    return casos
+
+
+def derivar(casos):
+    """Columnas derivadas (motor, fenotipo FEVI y soplo) de casos ya completados."""
+    resultado = evaluar_casos(casos[list(CAMPOS)])
+    # Tablas de hemosim/reglas.py: cortes de FEVI sobre todo el bloque y un dict por (foco, ciclo)
+    fevi = pd.to_numeric(casos["fevi"], errors="coerce").to_numpy(dtype=float)
+    resultado["fenotipo"] = np.where(casos["tiene_paraclinicos"].to_numpy(), tabla("fenotipo_fevi").evaluar(fevi),
+                                     FENOTIPO_NO_DETERMINADO)
+    valvulopatias = tabla("valvulopatias")
+    resultado["soplo"] = [valvulopatias.inferir(f, c, s) for f, c, s in
+                          zip(casos["foco"].tolist(), casos["ciclo"].tolist(), casos["tiene_soplo"].tolist())]
+    return resultado
+
+
+def evaluar_bloque(bloque):
+    """Agrega las columnas derivadas a un bloque de casos tal como vino en la entrada."""
+    resultado = derivar(completar_casos(bloque))
+    return pd.concat([bloque.drop(columns=resultado.columns, errors="ignore"), resultado], axis=1)
+
+
+def leer_bloques(entrada, formato, tamano_bloque=TAMANO_BLOQUE):
+    """Itera el archivo (o stdin con "-") en DataFrames de `tamano_bloque` filas; una entrada vacía no da ninguno."""
+    origen = sys.stdin if entrada == "-" else entrada
+    if formato == "jsonl":
+        lector = pd.read_json(origen, lines=True, chunksize=tamano_bloque, dtype=False)
+    else:
+        try:
+            lector = pd.read_csv(origen, chunksize=tamano_bloque)
+        except pd.errors.EmptyDataError:  # ni siquiera encabezado: resultado vacío, como un JSON Lines vacío
+            return
+    with lector:
+        yield from lector
+
+
+def escribir_bloque(resultado, salida, formato, primero):
+    if formato == "jsonl":
+        texto = resultado.to_json(orient="records", lines=True, force_ascii=False)
+        if texto and not texto.endswith("\n"): texto += "\n"
+        salida.write(texto)
+    else:
+        resultado.to_csv(salida, header=primero, index=False)
+
+
+def formato_archivo(ruta, explicito=None):
+    if explicito: return explicito
+    return "jsonl" if ruta.endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m hemosim",
+        description="Calcula cuadrante Stevenson, PCP/IC simulados, fenotipo FEVI y soplo para un archivo de casos.",
+    )
+    parser.add_argument("entrada", nargs="?", default="-", help="CSV o JSON Lines (\"-\" para stdin).")
+    parser.add_argument("-o", "--salida", default="-", help="Archivo de salida (\"-\" para stdout).")
+    parser.add_argument("--formato-entrada", choices=["csv", "jsonl"])
+    parser.add_argument("--formato-salida", choices=["csv", "jsonl"])
+    parser.add_argument("--tamano-bloque", type=int, default=TAMANO_BLOQUE,
+                        help="Filas por bloque (la memoria depende de esto, no del archivo).")
+    args = parser.parse_args(argv)
+    if args.tamano_bloque < 1:
+        parser.error("--tamano-bloque debe ser positivo")
+
+    formato_entrada = formato_archivo(args.entrada, args.formato_entrada)
+    if args.formato_salida: formato_salida = args.formato_salida
+    elif args.salida != "-": formato_salida = formato_archivo(args.salida)
+    else: formato_salida = formato_entrada
+
+    salida = sys.stdout if args.salida == "-" else open(args.salida, "w", encoding="utf-8", newline="")
+    try:
+        for i, bloque in enumerate(leer_bloques(args.entrada, formato_entrada, args.tamano_bloque)):
+            escribir_bloque(evaluar_bloque(bloque), salida, formato_salida, primero=(i == 0))
+            salida.flush()
+    finally:
+        if salida is not sys.stdout: salida.close()
+    return 0
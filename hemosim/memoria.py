@@ -0,0 +1,51 @@
+"""
+Memoria retenida por una sesión de la app.
+
+`tamano_profundo` recorre un objeto y todo lo que referencia (contenedores,
+`__dict__`, `__slots__`, la base de las vistas de NumPy) y suma `sys.getsizeof`
+contando cada objeto una vez. Los objetos de `excluir` (p. ej. los valores del
+caché compartido entre sesiones) no se cuentan: la sesión sólo guarda una
+referencia a ellos.
+"""
+import sys
+import types
+
+import numpy as np
+
+# Se cuentan, pero no se recorren: su contenido es del proceso, no de la sesión
+_NO_RECORRER = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def _referencias(objeto):
+    if isinstance(objeto, dict):
+        yield from objeto.keys()
+        yield from objeto.values()
+    elif isinstance(objeto, (list, tuple, set, frozenset)):
+        yield from objeto
+    elif isinstance(objeto, np.ndarray):
+        if objeto.base is not None: yield objeto.base
+    else:
+        if hasattr(objeto, "__dict__"): yield objeto.__dict__
+        for clase in type(objeto).__mro__:
+            for campo in getattr(clase, "__slots__", ()):
+                if hasattr(objeto, campo): yield getattr(objeto, campo)
+
+
+def tamano_profundo(objeto, excluir=()):
+    """Bytes de `objeto` y de lo que referencia, contando cada objeto una vez."""
+    vistos = {id(o) for o in excluir}
+    pendientes, total = [objeto], 0
+    while pendientes:
+        actual = pendientes.pop()
+        if id(actual) in vistos: continue
+        vistos.add(id(actual))
+        total += sys.getsizeof(actual)
+        if not isinstance(actual, _NO_RECORRER):
+            pendientes.extend(_referencias(actual))
+    return total
+
+
+def memoria_sesion(estado, excluir=()):
+    """Total en bytes del estado de una sesión y una fila por clave, de la más a la menos pesada."""
+    filas = [dict(clave=str(clave), bytes=tamano_profundo(valor, excluir)) for clave, valor in estado.items()]
+    return tamano_profundo(estado, excluir), sorted(filas, key=lambda fila: -fila["bytes"])
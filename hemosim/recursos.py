@@ -0,0 +1,76 @@
+"""
+Índice en memoria de los archivos multimedia de `assets/`.
+
+Se construye una vez por proceso. Las búsquedas ignoran tildes y mayúsculas
+(NFKD + casefold), así "Regurgitación aórtica.mp3" encuentra el archivo aunque
+en disco se llame "Regurgitacion aortica.mp3". Los bytes se leen del disco una
+sola vez y quedan en un caché LRU acotado por tamaño total.
+"""
+import logging
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+
+from hemosim.texto import normalizar
+
+LIMITE_CACHE_BYTES = 64 * 1024 * 1024
+
+log = logging.getLogger(__name__)
+
+
+class IndiceRecursos:
+    def __init__(self, directorio, limite_bytes=LIMITE_CACHE_BYTES):
+        self.directorio = directorio
+        self.limite_bytes = limite_bytes
+        self._rutas = {}
+        if os.path.isdir(directorio):
+            for entrada in os.scandir(directorio):
+                if entrada.is_file():
+                    self._rutas[normalizar(entrada.name)] = entrada.path
+        self._cache = OrderedDict()
+        self._bytes_en_cache = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._rutas)
+
+    def resolver(self, ruta):
+        """Ruta real en disco para `ruta` (con o sin tildes), o None si no existe."""
+        return self._rutas.get(normalizar(os.path.basename(ruta)))
+
+    def leer(self, ruta):
+        """(bytes, tipo MIME) del archivo, o None. El disco se lee sólo en el primer acceso."""
+        real = self.resolver(ruta)
+        if real is None: return None
+        with self._lock:
+            if real in self._cache:
+                self._cache.move_to_end(real)
+                return self._cache[real]
+
+        with open(real, "rb") as f:
+            datos = f.read()
+        archivo = (datos, mimetypes.guess_type(real)[0] or "application/octet-stream")
+
+        with self._lock:
+            if real not in self._cache and len(datos) <= self.limite_bytes:
+                self._cache[real] = archivo
+                self._bytes_en_cache += len(datos)
+                while self._bytes_en_cache > self.limite_bytes:
+                    _, (viejo, _) = self._cache.popitem(last=False)
+                    self._bytes_en_cache -= len(viejo)
+        return archivo
+
+    def faltantes(self, recursos, claves_usadas=()):
+        """Claves usadas que no están en `recursos`, o cuyo archivo local no aparece en el índice."""
+        sin_resolver = [clave for clave in claves_usadas if clave not in recursos]
+        for clave, ruta in recursos.items():
+            if not ruta.startswith("http") and self.resolver(ruta) is None:
+                sin_resolver.append(clave)
+        return sin_resolver
+
+    def reportar(self, recursos, claves_usadas=()):
+        sin_resolver = self.faltantes(recursos, claves_usadas)
+        if sin_resolver:
+            log.warning("Recursos multimedia sin resolver: %s", ", ".join(sin_resolver))
+        return sin_resolver
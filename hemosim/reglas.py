@@ -0,0 +1,237 @@
+"""
+Tablas de reglas clínicas: pesos, umbrales y mensajes editables sin tocar código.
+
+Cada archivo de `datos/reglas/` es una tabla declarativa que se compila una
+vez al cargarla:
+
+- congestion / perfusion: base + reglas (campo, condición, puntos). Las
+  condiciones de texto se resuelven una vez por categoría (memo LRU de
+  `MAXIMO_CATEGORIAS` textos por condición) y se expanden por código; las numéricas son comparaciones vectorizadas.
+- peptidos: umbral de cada péptido, estratificado por edad (np.select).
+- fenotipo_fevi: cortes de FEVI (np.searchsorted) → fenotipo.
+- valvulopatias: (foco, ciclo) → hipótesis diagnóstica.
+- mensajes: cuadrante → mensajes docentes en orden; gana el primero que cumple.
+
+`recargar()` compara la fecha de modificación de cada archivo y recompila
+sólo las tablas que cambiaron, sin reiniciar el servidor; si una tabla nueva
+no compila, queda la anterior. `firma()` resume el contenido de todas: entra
+en las claves de caché para que un cambio de reglas no sirva resultados viejos.
+"""
+import hashlib
+import json
+import operator
+import os
+import threading
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+DIRECTORIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "datos", "reglas")
+VERSION = 1
+OPERADORES = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+TIPOS_CONDICION = ("igual", "distinto", "contiene", "condicion")
+NIVELES = ("success", "info", "warning", "error")
+# Textos distintos memoizados por condición (síntomas libres de una cohorte subida no crecen sin límite)
+MAXIMO_CATEGORIAS = 4_096
+# Columnas que el motor calcula antes de puntuar y que las reglas pueden usar
+DERIVADOS = ("pam", "pp", "ppp", "peptido_positivo")
+
+Mensaje = namedtuple("Mensaje", "nivel texto")
+
+
+def _campos_motor():
+    from hemosim.calculos import CAMPOS
+    return set(CAMPOS) | set(DERIVADOS)
+
+
+class Condicion:
+    """Condición de una regla sobre un campo: igual / distinto / contiene (texto o booleano) o [operador, umbral]."""
+
+    def __init__(self, campo, regla):
+        tipos = [tipo for tipo in TIPOS_CONDICION if tipo in regla]
+        if len(tipos) != 1:
+            raise ValueError(f"Regla sobre {campo}: se espera una sola condición ({', '.join(TIPOS_CONDICION)})")
+        self.campo, self.tipo = campo, tipos[0]
+        if self.tipo == "condicion":
+            simbolo, self.umbral = regla["condicion"]
+            if simbolo not in OPERADORES: raise ValueError(f"Regla sobre {campo}: operador desconocido {simbolo!r}")
+            self.operador = OPERADORES[simbolo]
+        else:
+            self.valores = tuple(regla[self.tipo])
+        self._categorias = lru_cache(maxsize=MAXIMO_CATEGORIAS)(self._texto)  # texto → resultado
+
+    def _texto(self, texto):
+        if self.tipo == "igual": return texto in self.valores
+        if self.tipo == "distinto": return texto not in self.valores
+        return any(valor in texto for valor in self.valores)
+
+    def valor(self, valor):
+        """Resultado para un solo valor (texto, booleano o número)."""
+        if self.tipo == "condicion": return bool(self.operador(valor, self.umbral))
+        if not isinstance(valor, str): return self._texto_booleano(valor)
+        return self._categorias(valor)
+
+    def _texto_booleano(self, valor):
+        if self.tipo == "contiene": raise TypeError(f"Regla sobre {self.campo}: 'contiene' sólo aplica a texto")
+        return (valor in self.valores) == (self.tipo == "igual")
+
+    def evaluar(self, columna):
+        """Máscara del lote; las columnas de texto llegan como (categorías, códigos)."""
+        if self.tipo == "condicion": return self.operador(columna, self.umbral)
+        if isinstance(columna, tuple):
+            unicos, codigos = columna
+            return np.fromiter((self.valor(u) for u in unicos.tolist()), bool, len(unicos))[codigos]
+        if self.tipo == "contiene": raise TypeError(f"Regla sobre {self.campo}: 'contiene' sólo aplica a texto")
+        cumple = columna == self.valores[0]
+        for valor in self.valores[1:]: cumple = cumple | (columna == valor)
+        return cumple if self.tipo == "igual" else ~cumple
+
+
+class Puntaje:
+    """Base + suma de los puntos de cada regla que se cumple, en el orden de la tabla."""
+
+    def __init__(self, datos):
+        campos = _campos_motor()
+        self.base = datos["base"]
+        self.reglas = []
+        for regla in datos["reglas"]:
+            if regla["campo"] not in campos: raise ValueError(f"Campo desconocido en la regla: {regla['campo']}")
+            self.reglas.append((Condicion(regla["campo"], regla), regla["puntos"], bool(regla.get("con_paraclinicos"))))
+        self.tipo = np.int64 if all(isinstance(p, int) for p in [self.base] + [p for _, p, _ in self.reglas]) else float
+
+    def evaluar(self, columnas, n):
+        """Puntaje de un lote; `columnas` son las de `hemosim.calculos` más `DERIVADOS`."""
+        total = np.full(n, self.base, dtype=self.tipo)
+        for condicion, puntos, con_paraclinicos in self.reglas:
+            cumple = condicion.evaluar(columnas[condicion.campo])
+            if con_paraclinicos: cumple = cumple & columnas["tiene_paraclinicos"]
+            total += cumple * puntos  # sumar 0 (o 0.0) donde no se cumple deja el valor exacto
+        return total
+
+
+class Peptidos:
+    """Péptido natriurético positivo: valor por encima del umbral de su tipo (y banda de edad)."""
+
+    def __init__(self, datos):
+        self.tipos = []
+        for tipo, bandas in datos["umbrales"].items():
+            edades = [Condicion("edad", {"condicion": banda["edad"]}) if "edad" in banda else None for banda in bandas]
+            self.tipos.append((Condicion("tipo_peptido", {"igual": [tipo]}), edades, [banda["umbral"] for banda in bandas]))
+
+    def positivo(self, tipo, valor, edad, paraclinicos):
+        positivo = np.zeros(len(valor), dtype=bool)
+        for es_tipo, edades, umbrales in self.tipos:
+            # Primera banda que cumple; sin ninguna (p. ej. edad vacía) no hay umbral
+            condiciones = [np.ones(len(valor), dtype=bool) if c is None else c.evaluar(edad) for c in edades]
+            positivo |= es_tipo.evaluar(tipo) & (valor > np.select(condiciones, umbrales, np.inf))
+        return paraclinicos & positivo
+
+
+class FenotipoFevi:
+    def __init__(self, datos):
+        self.cortes = np.asarray(datos["cortes"], dtype=float)
+        self.fenotipos = np.asarray(datos["fenotipos"], dtype=object)
+        if len(self.fenotipos) != len(self.cortes) + 1 or np.any(np.diff(self.cortes) <= 0):
+            raise ValueError("fenotipo_fevi: se esperan cortes crecientes y un fenotipo más que cortes")
+
+    def evaluar(self, fevi):
+        """Fenotipo de cada FEVI (un corte pertenece a la banda de arriba)."""
+        return self.fenotipos[np.searchsorted(self.cortes, fevi, side="right")]
+
+
+class Valvulopatias:
+    def __init__(self, datos):
+        self.sin_soplo, self.defecto = datos["sin_soplo"], datos["defecto"]
+        self.hipotesis = {(regla["foco"], regla["ciclo"]): regla["texto"] for regla in datos["reglas"]}
+
+    def inferir(self, foco, ciclo, tiene_soplo=True):
+        if not tiene_soplo: return self.sin_soplo
+        return self.hipotesis.get((foco, ciclo), self.defecto)
+
+
+class Mensajes:
+    def __init__(self, datos):
+        self.por_cuadrante = {}
+        for regla in datos["reglas"]:
+            if regla["nivel"] not in NIVELES: raise ValueError(f"Nivel de mensaje desconocido: {regla['nivel']}")
+            alguna = tuple(Condicion(campo, {"condicion": [simbolo, umbral]}) for campo, simbolo, umbral in regla.get("si", ()))
+            self.por_cuadrante.setdefault(regla["cuadrante"], []).append((alguna, Mensaje(regla["nivel"], regla["texto"])))
+
+    def mensaje(self, cuadrante, **valores):
+        """Primer mensaje del cuadrante (letra inicial) con alguna condición cumplida o sin condiciones; None si no hay."""
+        for alguna, mensaje in self.por_cuadrante.get(cuadrante[:1], ()):
+            if not alguna or any(c.valor(valores[c.campo]) for c in alguna): return mensaje
+        return None
+
+
+COMPILADORES = {
+    "congestion": Puntaje, "perfusion": Puntaje, "peptidos": Peptidos,
+    "fenotipo_fevi": FenotipoFevi, "valvulopatias": Valvulopatias, "mensajes": Mensajes,
+}
+
+
+class Tablas:
+    """Tablas compiladas de un directorio; se recompilan por separado cuando cambia su archivo."""
+
+    def __init__(self, directorio=DIRECTORIO):
+        self.directorio = directorio
+        self._tablas = {}  # nombre → (marca de modificación, resumen, tabla compilada)
+        self._lock = threading.Lock()
+        for nombre in COMPILADORES:
+            self._tablas[nombre] = self._compilar(nombre)
+        self._firma = self._resumir()
+
+    def _compilar(self, nombre):
+        ruta = os.path.join(self.directorio, f"{nombre}.json")
+        marca = os.stat(ruta).st_mtime_ns
+        with open(ruta, "rb") as f:
+            contenido = f.read()
+        datos = json.loads(contenido)
+        if datos.get("version") != VERSION: raise ValueError(f"{nombre}: versión de tabla no soportada: {datos.get('version')}")
+        return marca, hashlib.blake2b(contenido, digest_size=8).hexdigest(), COMPILADORES[nombre](datos)
+
+    def _resumir(self):
+        return hashlib.blake2b("".join(resumen for _, resumen, _ in self._tablas.values()).encode("ascii"), digest_size=8).hexdigest()
+
+    def __getitem__(self, nombre):
+        return self._tablas[nombre][2]
+
+    def firma(self):
+        return self._firma
+
+    def recargar(self):
+        """Recompila las tablas cuyo archivo cambió: {nombre: None si compiló o el error (queda la anterior)}."""
+        cambios = {}
+        with self._lock:
+            for nombre, (marca, _, _) in list(self._tablas.items()):
+                try:
+                    if os.stat(os.path.join(self.directorio, f"{nombre}.json")).st_mtime_ns == marca: continue
+                    self._tablas[nombre] = self._compilar(nombre)
+                    cambios[nombre] = None
+                except (OSError, ValueError, KeyError, TypeError) as error:
+                    cambios[nombre] = f"{type(error).__name__}: {error}"
+            if any(error is None for error in cambios.values()): self._firma = self._resumir()
+        return cambios
+
+    def resumen(self):
+        """Una fila por tabla: nombre y resumen del contenido compilado."""
+        return [dict(tabla=nombre, resumen=resumen) for nombre, (_, resumen, _) in self._tablas.items()]
+
+
+@lru_cache(maxsize=None)
+def tablas(directorio=DIRECTORIO):
+    """Tablas de `directorio`, compiladas una vez por proceso."""
+    return Tablas(directorio)
+
+
+def tabla(nombre):
+    return tablas()[nombre]
+
+
+def recargar():
+    return tablas().recargar()
+
+
+def firma():
+    return tablas().firma()
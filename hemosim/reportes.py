@@ -0,0 +1,113 @@
+"""
+Reporte PDF del caso clínico (sección "3. GENERADOR PDF" de app.py).
+
+Los reportes se guardan en un caché direccionado por contenido: la clave es el
+hash de los datos del caso que aparecen en el reporte, así casos idénticos
+comparten un único PDF ya renderizado. `fpdf` se importa al renderizar el
+primer reporte, no al importar este módulo.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+# Datos del caso que se imprimen en el reporte (y que forman su clave)
+CAMPOS_REPORTE = (
+    "edad", "sexo", "ciudad", "es_zona_chagas",
+    "pas", "pad", "pam", "fc", "sato2", "cuadrante", "ppp", "frialdad",
+    "ruidos_agregados", "pulmones", "abdomen_viscera", "ascitis", "iy_presente", "iy_desc",
+    "tiene_paraclinicos", "fenotipo_msg", "lactato",
+)
+MAXIMO_REPORTES = 256
+# La fuente Arial de FPDF sólo cubre latin-1
+_SUSTITUCIONES = {"≥": ">=", "≤": "<="}
+
+
+def _latin1(texto):
+    for original, sustituto in _SUSTITUCIONES.items():
+        texto = texto.replace(original, sustituto)
+    return texto.encode('latin-1', 'replace').decode('latin-1')
+
+
+@lru_cache(maxsize=None)
+def clase_pdf():
+    """Clase PDF del reporte (importa fpdf en el primer uso)."""
+    from fpdf import FPDF
+
+    class PDF(FPDF):
+        def header(self):
+            self.set_font('Arial', 'B', 14)
+            self.cell(0, 10, 'HemoSim - Reporte de Caso Clínico', 0, 1, 'C')
+            self.ln(5)
+
+        def chapter_title(self, title):
+            self.set_font('Arial', 'B', 12)
+            self.set_fill_color(200, 220, 255)
+            self.cell(0, 6, _latin1(title), 0, 1, 'L', 1)
+            self.ln(4)
+
+        def chapter_body(self, body):
+            self.set_font('Arial', '', 10)
+            self.multi_cell(0, 5, _latin1(body))
+            self.ln()
+
+    return PDF
+
+
+def escribir_caso(pdf, caso):
+    """Capítulos del resumen del caso sobre la página actual de `pdf`."""
+    c = caso
+    pdf.chapter_title("1. Datos del Paciente")
+    pdf.chapter_body(f"Edad: {c['edad']} | Sexo: {c['sexo']} | Ciudad: {c['ciudad']} (Riesgo Chagas: {'SI' if c['es_zona_chagas'] else 'NO'})")
+    pdf.chapter_title("2. Perfil Hemodinámico")
+    pdf.chapter_body(f"PA: {c['pas']}/{c['pad']} (PAM {c['pam']:.0f}) | FC: {c['fc']} | SatO2: {c['sato2']}%")
+    pdf.chapter_body(f"Cuadrante Stevenson: {c['cuadrante']}")
+    pdf.chapter_body(f"PPP: {c['ppp']:.1f}% | Perfusión: {c['frialdad']}")
+    pdf.chapter_title("3. Hallazgos Clínicos")
+    pdf.chapter_body(f"Ruidos: {c['ruidos_agregados']} | Pulmón: {c['pulmones']}")
+    if "Hepato" in c['abdomen_viscera'] or c['ascitis']: pdf.chapter_body(f"Abdomen: {c['abdomen_viscera']} {'Ascitis' if c['ascitis'] else ''}")
+    if c['iy_presente'] == "Presente": pdf.chapter_body(f"Cuello: {c['iy_desc']}")
+    if c['tiene_paraclinicos']:
+        pdf.chapter_body(f"Fenotipo FEVI: {c['fenotipo_msg']} | Lactato: {c['lactato']}")
+
+
+def generar_reporte(caso):
+    """Bytes del PDF de un caso."""
+    pdf = clase_pdf()()
+    pdf.add_page()
+    escribir_caso(pdf, caso)
+    return pdf.output(dest='S').encode('latin-1', 'ignore')
+
+
+def clave_caso(caso):
+    """Hash estable de los datos del reporte (independiente del orden de las claves)."""
+    datos = {campo: caso[campo] for campo in CAMPOS_REPORTE}
+    canonico = json.dumps(datos, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonico.encode("utf-8")).hexdigest()
+
+
+class CacheReportes:
+    """Caché LRU compartido por todas las sesiones: hash del caso → bytes del PDF."""
+
+    def __init__(self, maximo=MAXIMO_REPORTES):
+        self.maximo = maximo
+        self.aciertos = 0
+        self.fallos = 0
+        self._reportes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, caso):
+        clave = clave_caso(caso)
+        with self._lock:
+            if clave in self._reportes:
+                self._reportes.move_to_end(clave)
+                self.aciertos += 1
+                return self._reportes[clave]
+        reporte = generar_reporte(caso)
+        with self._lock:
+            self.fallos += 1
+            self._reportes[clave] = reporte
+            while len(self._reportes) > self.maximo:
+                self._reportes.popitem(last=False)
+        return reporte
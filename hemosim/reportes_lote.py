@@ -0,0 +1,177 @@
+"""
+Generación masiva de reportes PDF para una cohorte de casos.
+
+Uso:
+    python -m hemosim.reportes_lote cohorte.csv --zip reportes.zip
+    python -m hemosim.reportes_lote cohorte.jsonl --combinado cohorte.pdf
+
+Con `--zip` cada caso produce su propio PDF; el renderizado se reparte en un
+pool de procesos y los reportes terminados se escriben al ZIP en disco apenas
+llegan, con un número acotado de tareas en vuelo (la memoria no crece con el
+tamaño de la cohorte). Con `--combinado` se arma un solo PDF con un capítulo
+por caso: FPDF lo mantiene entero en memoria hasta escribirlo y el tiempo crece
+más que linealmente, así que admite hasta `MAXIMO_COMBINADO` casos (más allá,
+`--zip`). La entrada usa las mismas columnas que `python -m hemosim`, más
+`sexo`, `ciudad`, `fc`, `sato2`, `col_venosa` e `id` (nombre del archivo); un
+`id` repetido recibe un sufijo (`_2`, `_3`...) para no pisar su reporte.
+"""
+import argparse
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from hemosim.clinica import describir_iy
+from hemosim.geografia import cargar_geografia
+from hemosim.lote import TAMANO_BLOQUE, completar_casos, derivar, formato_archivo, leer_bloques
+from hemosim.reportes import CacheReportes, clase_pdf, escribir_caso
+
+# Campos del reporte que no usa el motor (valores por defecto de la barra lateral)
+CAMPOS_PACIENTE = {
+    "sexo": "M",
+    "ciudad": "--- Seleccione ---",
+    "fc": 80,
+    "sato2": 92,
+    "col_venosa": 5,
+}
+CASOS_POR_TAREA = 50
+# Escribir el PDF combinado tarda ~40 s con 6 000 casos y ~4 min con 12 000 (FPDF concatena todo en un solo texto)
+MAXIMO_COMBINADO = 5_000
+
+
+def casos_reporte(bloque):
+    """Itera (nombre, datos del reporte) para cada fila de un bloque de entrada."""
+    casos = completar_casos(bloque, CAMPOS_PACIENTE)
+    resultado = derivar(casos)
+    geografia = cargar_geografia()
+    ids = casos["id"] if "id" in casos else casos.index + 1
+    for id_caso, c, r in zip(ids.tolist(), casos.to_dict("records"), resultado.to_dict("records")):
+        yield f"Reporte_HemoSim_{id_caso}", dict(
+            edad=c["edad"], sexo=c["sexo"], ciudad=c["ciudad"], es_zona_chagas=geografia.es_zona_chagas(c["ciudad"]),
+            pas=c["pas"], pad=c["pad"], pam=r["pam"], fc=c["fc"], sato2=c["sato2"],
+            cuadrante=r["cuadrante"], ppp=r["ppp"], frialdad=c["frialdad"],
+            ruidos_agregados=c["ruidos_agregados"], pulmones=c["pulmones"], abdomen_viscera=c["abdomen_viscera"],
+            ascitis=c["ascitis"], iy_presente=c["iy_presente"], iy_desc=describir_iy(c["iy_presente"], c["col_venosa"]),
+            tiene_paraclinicos=c["tiene_paraclinicos"], fenotipo_msg=r["fenotipo"], lactato=c["lactato"],
+        )
+
+
+def _casos(bloques):
+    """(nombre, caso) de todos los bloques con nombres únicos: un id repetido recibe un sufijo."""
+    usados, siguiente = set(), {}
+    for bloque in bloques:
+        for nombre, caso in casos_reporte(bloque):
+            unico = nombre
+            while unico in usados:
+                siguiente[nombre] = siguiente.get(nombre, 1) + 1
+                unico = f"{nombre}_{siguiente[nombre]}"
+            usados.add(unico)
+            yield unico, caso
+
+
+def _tareas(bloques, casos_por_tarea):
+    tarea = []
+    for caso in _casos(bloques):
+        tarea.append(caso)
+        if len(tarea) == casos_por_tarea:
+            yield tarea
+            tarea = []
+    if tarea:
+        yield tarea
+
+
+# Cada proceso del pool conserva su propio caché: casos repetidos se renderizan una vez
+_cache_proceso = None
+
+
+def _renderizar(tarea):
+    global _cache_proceso
+    if _cache_proceso is None:
+        _cache_proceso = CacheReportes()
+    return [(nombre, _cache_proceso.obtener(caso)) for nombre, caso in tarea]
+
+
+def _reportar_progreso(hechos, inicio):
+    transcurrido = max(time.perf_counter() - inicio, 1e-9)
+    print(f"\r{hechos} reportes ({hechos / transcurrido:.0f}/s)", end="", file=sys.stderr, flush=True)
+
+
+def generar_zip(bloques, destino, procesos=None, casos_por_tarea=CASOS_POR_TAREA, progreso=_reportar_progreso):
+    """Renderiza un PDF por caso en paralelo y los agrega a `destino` a medida que terminan."""
+    procesos = procesos or os.cpu_count() or 1
+    inicio = time.perf_counter()
+    hechos = 0
+    with zipfile.ZipFile(destino, "w", zipfile.ZIP_DEFLATED) as archivo_zip, \
+            ProcessPoolExecutor(max_workers=procesos) as pool:
+
+        def escribir(terminados):
+            nonlocal hechos
+            for futuro in terminados:
+                for nombre, reporte in futuro.result():
+                    archivo_zip.writestr(f"{nombre}.pdf", reporte)
+                    hechos += 1
+            if progreso: progreso(hechos, inicio)
+
+        pendientes = set()
+        for tarea in _tareas(bloques, casos_por_tarea):
+            pendientes.add(pool.submit(_renderizar, tarea))
+            # Tareas en vuelo acotadas: la memoria no depende del tamaño de la cohorte
+            if len(pendientes) >= 2 * procesos:
+                terminados, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                escribir(terminados)
+        escribir(wait(pendientes).done)
+    return hechos
+
+
+def generar_combinado(bloques, destino, progreso=_reportar_progreso, maximo=MAXIMO_COMBINADO):
+    """
+    Un solo PDF con un capítulo (página nueva) por caso. Falla con ValueError,
+    sin escribir `destino`, si la cohorte pasa de `maximo` casos.
+    """
+    inicio = time.perf_counter()
+    pdf = clase_pdf()()
+    hechos = 0
+    for nombre, caso in _casos(bloques):
+        if hechos == maximo:
+            raise ValueError(f"El PDF combinado admite hasta {maximo} casos; para cohortes más grandes use --zip")
+        pdf.add_page()
+        pdf.chapter_title(nombre.replace("_", " "))
+        escribir_caso(pdf, caso)
+        hechos += 1
+        if progreso and hechos % CASOS_POR_TAREA == 0: progreso(hechos, inicio)
+    if progreso: progreso(hechos, inicio)
+    pdf.output(destino, 'F')
+    return hechos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m hemosim.reportes_lote",
+        description="Genera los reportes PDF de una cohorte de casos.",
+    )
+    parser.add_argument("entrada", nargs="?", default="-", help="CSV o JSON Lines (\"-\" para stdin).")
+    salida = parser.add_mutually_exclusive_group(required=True)
+    salida.add_argument("--zip", help="ZIP con un PDF por caso.")
+    salida.add_argument("--combinado", help=f"Un solo PDF con un capítulo por caso (hasta {MAXIMO_COMBINADO} casos; "
+                                            "se arma en memoria: para más, --zip).")
+    parser.add_argument("--formato-entrada", choices=["csv", "jsonl"])
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos del pool (por defecto, uno por CPU).")
+    parser.add_argument("--tamano-bloque", type=int, default=TAMANO_BLOQUE)
+    args = parser.parse_args(argv)
+
+    bloques = leer_bloques(args.entrada, formato_archivo(args.entrada, args.formato_entrada), args.tamano_bloque)
+    if args.zip:
+        hechos = generar_zip(bloques, args.zip, procesos=args.procesos)
+    else:
+        try:
+            hechos = generar_combinado(bloques, args.combinado)
+        except ValueError as error:
+            print(file=sys.stderr)
+            parser.exit(1, f"{parser.prog}: error: {error}\n")
+    print(f"\n{hechos} reportes generados.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
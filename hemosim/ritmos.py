@@ -0,0 +1,156 @@
+"""
+Monitor de ritmo DII generado localmente (sin videos externos).
+
+`trazo` arma la derivación DII latido a latido con ondas gaussianas
+(P, Q, R, S, T) a la FC del caso:
+
+- Sinusal: P antes de cada QRS, RR casi constante.
+- Fibrilación Auricular: sin P, ondas f y RR irregulares.
+- Flutter Atrial: ondas F en serrucho a 300/min y conducción fija (2:1, 3:1...)
+  según la FC.
+- Marcapasos: espiga, QRS ancho y T discordante (estimulación ventricular).
+
+La señal dura un número entero de latidos (y de ondas f/F), así se repite sin
+saltos. `html_monitor` la cuantiza a 8 bits y la incrusta en una página con un
+canvas que la barre a 25 mm/s en el navegador: el servidor la genera una vez
+por (ritmo, FC cuantizada) y el trazo se actualiza sin reruns.
+"""
+import base64
+import zlib
+
+import numpy as np
+
+FRECUENCIA_MUESTREO = 250  # Hz
+DURACION_MINIMA_S = 8.0
+PASO_FC = 5  # lpm
+FC_MINIMA, FC_MAXIMA = 30, 200
+RITMOS = ("Sinusal", "Fibrilación Auricular", "Flutter Atrial", "Marcapasos")
+FRECUENCIA_FLUTTER = 5.0  # Hz: ondas F a 300/min
+MILIVOLTIOS = (-1.0, 2.0)  # rango vertical del monitor (cuantización a 8 bits)
+# (desplazamiento respecto a R en s, amplitud mV, ancho s) de cada onda del latido
+ONDAS = {
+    "P": (-0.16, 0.15, 0.025), "Q": (-0.025, -0.1, 0.01), "R": (0.0, 1.2, 0.012), "S": (0.025, -0.25, 0.01),
+    "T": (None, 0.3, 0.05),
+}
+ONDAS_MARCAPASOS = {"espiga": (-0.06, 1.5, 0.002), "R": (0.0, 0.9, 0.035), "S": (0.07, -0.5, 0.03), "T": (None, -0.35, 0.06)}
+
+
+def cuantizar(fc, ritmo):
+    """(FC en pasos de `PASO_FC`, ritmo): la clave del trazo."""
+    return int(np.clip(round(fc / PASO_FC) * PASO_FC, FC_MINIMA, FC_MAXIMA)), ritmo if ritmo in RITMOS else "Sinusal"
+
+
+def conduccion_flutter(fc):
+    """Ondas F por QRS (2:1 como mínimo) más cercana a la FC."""
+    return max(2, round(60 * FRECUENCIA_FLUTTER / fc))
+
+
+def _intervalos(fc, ritmo, azar):
+    """RR (s) de cada latido para cubrir `DURACION_MINIMA_S`."""
+    if ritmo == "Flutter Atrial":
+        rr = conduccion_flutter(fc) / FRECUENCIA_FLUTTER
+        return np.full(int(np.ceil(DURACION_MINIMA_S / rr)), rr)
+    rr_medio = 60 / fc
+    variacion = {"Sinusal": 0.02, "Fibrilación Auricular": 0.2, "Marcapasos": 0.0}[ritmo]
+    rr = rr_medio * (1 + variacion * azar.standard_normal(int(np.ceil(DURACION_MINIMA_S / rr_medio))))
+    return np.clip(rr, 0.5 * rr_medio, 1.8 * rr_medio)
+
+
+def trazo(fc, ritmo):
+    """(señal DII en mV a `FRECUENCIA_MUESTREO`, FC efectiva) de un número entero de latidos."""
+    fc, ritmo = clave = cuantizar(fc, ritmo)
+    azar = np.random.default_rng(zlib.crc32(repr(clave).encode("utf-8")))
+    intervalos = _intervalos(fc, ritmo, azar)
+    duracion = intervalos.sum()
+    if ritmo == "Flutter Atrial":
+        duracion = round(duracion * FRECUENCIA_FLUTTER) / FRECUENCIA_FLUTTER
+    t = np.arange(int(round(duracion * FRECUENCIA_MUESTREO))) / FRECUENCIA_MUESTREO
+    senal = np.zeros_like(t)
+    ondas = ONDAS_MARCAPASOS if ritmo == "Marcapasos" else ONDAS
+    # Cada R cae a 0.25 s del inicio de su intervalo: la P (o la espiga) entra en el mismo intervalo
+    picos = np.concatenate(([0], np.cumsum(intervalos[:-1]))) + 0.25
+    for pico, rr in zip(picos, intervalos):
+        for nombre, (desplazamiento, amplitud, ancho) in ondas.items():
+            if nombre == "P" and ritmo != "Sinusal": continue
+            if desplazamiento is None: desplazamiento = 0.3 * np.sqrt(rr)  # QT según Bazett
+            centro = pico + desplazamiento
+            # Distancia circular: las colas de la última T se continúan al inicio (la tira se repite)
+            distancia = (t - centro + duracion / 2) % duracion - duracion / 2
+            senal += amplitud * np.exp(-0.5 * (distancia / ancho) ** 2)
+    if ritmo == "Fibrilación Auricular":
+        # Ondas f: senos con un número entero de ciclos en la tira (periódicas)
+        for _ in range(3):
+            ciclos = round(azar.uniform(5, 7) * duracion)
+            senal += azar.uniform(0.03, 0.06) * np.sin(2 * np.pi * ciclos * t / duracion + azar.uniform(0, 2 * np.pi))
+    elif ritmo == "Flutter Atrial":
+        fase = (t * FRECUENCIA_FLUTTER) % 1
+        senal += -0.25 * np.where(fase < 0.8, fase / 0.8, (1 - fase) / 0.2) + 0.125  # rampa lenta, subida rápida
+    senal += 0.01 * azar.standard_normal(len(t))
+    fc_efectiva = 60 * FRECUENCIA_FLUTTER / conduccion_flutter(fc) if ritmo == "Flutter Atrial" else 60 * len(intervalos) / duracion
+    return senal, round(fc_efectiva)
+
+
+def _muestras(senal):
+    """Señal a bytes 0-255 en el rango `MILIVOLTIOS`, en base64."""
+    minimo, maximo = MILIVOLTIOS
+    niveles = np.clip((senal - minimo) / (maximo - minimo) * 255, 0, 255).round().astype(np.uint8)
+    return base64.b64encode(niveles.tobytes()).decode("ascii")
+
+
+def html_monitor(fc, ritmo, alto=200):
+    """Página autónoma (sin recursos externos) con el monitor de barrido del trazo."""
+    senal, fc_efectiva = trazo(fc, ritmo)
+    fc, ritmo = cuantizar(fc, ritmo)
+    conduccion = f" · conducción {conduccion_flutter(fc)}:1" if ritmo == "Flutter Atrial" else ""
+    return _PLANTILLA.replace("__DATOS__", _muestras(senal)).replace("__FS__", str(FRECUENCIA_MUESTREO)) \
+        .replace("__ALTO__", str(alto)).replace("__ETIQUETA__", f"DII · {ritmo}{conduccion}") \
+        .replace("__FC__", str(fc_efectiva))
+
+
+# Barrido a 25 mm/s con cuadrícula de 5 mm; el trazo se dibuja con requestAnimationFrame
+_PLANTILLA = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><style>
+body { margin: 0; background: #000; font-family: monospace; }
+#m { position: relative; border-radius: 10px; overflow: hidden; }
+canvas { display: block; width: 100%; height: __ALTO__px; }
+.e { position: absolute; top: 6px; color: #3f3; font-size: 13px; }
+</style></head><body><div id="m"><canvas id="c"></canvas>
+<span class="e" style="left:10px">__ETIQUETA__</span><span class="e" style="right:10px">FC __FC__ lpm</span></div>
+<script>
+const datos = Uint8Array.from(atob("__DATOS__"), c => c.charCodeAt(0)), fs = __FS__;
+const lienzo = document.getElementById("c"), ctx = lienzo.getContext("2d");
+let ancho, alto, pxPorS, x = 0, i = 0, previo = null, ultimo = null;
+function ajustar() {
+  ancho = lienzo.width = lienzo.clientWidth; alto = lienzo.height = lienzo.clientHeight;
+  pxPorS = alto / 3 * 2.5;  // 1 mV ≈ alto / 3; 25 mm/s ≈ 2.5 × (10 mm/mV)
+  ctx.fillStyle = "#000"; ctx.fillRect(0, 0, ancho, alto); x = 0; previo = null;
+}
+function y(v) { return alto - 8 - v / 255 * (alto - 24); }
+function rejilla(x0, x1) {
+  ctx.fillStyle = "#000"; ctx.fillRect(x0, 0, x1 - x0, alto);
+  ctx.strokeStyle = "#0a2a0a"; ctx.lineWidth = 1; ctx.beginPath();
+  const paso = pxPorS / 5;
+  for (let g = Math.ceil(x0 / paso) * paso; g < x1; g += paso) { ctx.moveTo(g, 0); ctx.lineTo(g, alto); }
+  ctx.stroke();
+}
+function cuadro(ahora) {
+  if (ultimo === null) ultimo = ahora;
+  const n = Math.min(Math.floor((ahora - ultimo) / 1000 * fs), fs);
+  if (n > 0) {
+    ultimo += n * 1000 / fs;
+    const dx = pxPorS / fs;
+    rejilla(x, Math.min(x + n * dx + 14, ancho));
+    ctx.strokeStyle = "#3f3"; ctx.lineWidth = 2; ctx.beginPath();
+    for (let k = 0; k < n; k++) {
+      const punto = [x, y(datos[i])];
+      if (previo) { ctx.moveTo(previo[0], previo[1]); ctx.lineTo(punto[0], punto[1]); }
+      previo = punto; i = (i + 1) % datos.length; x += dx;
+      if (x >= ancho) { x = 0; previo = null; rejilla(0, 14); }
+    }
+    ctx.stroke();
+  }
+  requestAnimationFrame(cuadro);
+}
+window.addEventListener("resize", ajustar); ajustar(); requestAnimationFrame(cuadro);
+</script></body></html>
+"""
@@ -0,0 +1,120 @@
+"""
+Mapa de sensibilidad: el cuadrante de Stevenson sobre una grilla de dos variables.
+
+Las demás entradas del motor quedan fijas en los valores del paciente y las
+dos elegidas recorren `EJES`: las numéricas a `resolucion` puntos entre sus
+límites, las de texto por todas sus opciones de la barra lateral. Las celdas
+(p. ej. 200 × 200 = 40 000) se califican en un solo lote de `evaluar_casos`.
+
+El mapa sólo depende de las entradas fijas, no de los valores del paciente en
+los ejes: `clave_mapa` permite reutilizarlo mientras se mueven esos dos
+valores y alternar entre pares de ejes sin recalcular.
+"""
+import numpy as np
+
+from hemosim.calculos import CAMPOS, CORTE_IC, CORTE_PCP, evaluar_casos, unir_sintomas
+from hemosim.compartido import huella
+from hemosim.reglas import firma
+
+RESOLUCION = 200
+# Variable → (rótulo, (mínimo, máximo) si es numérica u opciones si es de texto)
+EJES = {
+    "pas": ("PAS (mmHg)", (60, 220)),
+    "pad": ("PAD (mmHg)", (30, 130)),
+    "llenado": ("Llenado capilar (s)", (1.0, 6.0)),
+    "lactato": ("Lactato (mmol/L)", (0.5, 10.0)),
+    "valor_peptido": ("Péptido natriurético (pg/mL)", (0, 5000)),
+    "edad": ("Edad", (18, 100)),
+    "edema_ex": ("Edema", ("Ausente", "Maleolar", "Rodillas", "Muslos")),
+    "frialdad": ("Temp. distal", ("Caliente", "Fría/Húmeda")),
+    "pulsos": ("Pulsos", ("Normales", "Disminuidos", "Filiformes")),
+    "neuro": ("Estado de conciencia", ("Alerta", "Somnoliento", "Estuporoso")),
+    "pulmones": ("Auscultación pulmonar", ("Murmullo Vesicular", "Estertores basales", "Estertores >1/2", "Sibilancias", "Roncus")),
+    "iy_presente": ("Ingurgitación yugular", ("Ausente", "Presente")),
+    "ruidos_agregados": ("Ruidos", ("R1-R2 Normales", "S3 (Galope Ventricular)", "S4 (Galope Atrial)", "S3 + S4 (Suma)")),
+    "rx_patron": ("Patrón Rx", ("Normal", "Congestión Leve/Basal", "Edema Alveolar (4 Cuadrantes)")),
+}
+# Ejes que sólo cuentan con paraclínicos: al elegirlos el mapa los da por reportados
+PARACLINICOS = ("lactato", "valor_peptido", "rx_patron")
+# Límites hemodinámicos dibujados sobre el mapa: rótulo → (columna del motor, valor)
+LIMITES = {"PAM < 65": ("pam", 65), "PPP < 25": ("ppp", 25)}
+# Código de cuadrante de cada celda (el de `contar_cuadrantes`)
+CODIGOS = {"A": 0, "B": 1, "L": 2, "C": 3}
+
+
+def es_texto(eje):
+    return isinstance(EJES[eje][1][0], str)
+
+
+def valores_eje(eje, resolucion=RESOLUCION):
+    """Valores que recorre `eje`: `resolucion` puntos entre sus límites, o sus opciones."""
+    if es_texto(eje): return EJES[eje][1]
+    minimo, maximo = EJES[eje][1]
+    return np.linspace(minimo, maximo, resolucion)
+
+
+def fijos(motor, eje_x, eje_y):
+    """Entradas del motor que el mapa mantiene fijas (sin los dos ejes)."""
+    entradas = {campo: motor[campo] for campo in CAMPOS if campo not in (eje_x, eje_y)}
+    if "sintomas" in entradas: entradas["sintomas"] = unir_sintomas(entradas["sintomas"])
+    if {eje_x, eje_y} & set(PARACLINICOS): entradas["tiene_paraclinicos"] = True
+    return entradas
+
+
+def clave_mapa(motor, eje_x, eje_y, resolucion=RESOLUCION):
+    """(entradas fijas, par de ejes, resolución): la clave del mapa en el caché (con la versión de las reglas)."""
+    return huella(dict(fijos(motor, eje_x, eje_y), reglas=firma())), eje_x, eje_y, resolucion
+
+
+def _columna(eje, valores, codigos):
+    """Columna del motor para las celdas; las de texto como Categorical (sin factorizar 40k textos)."""
+    if es_texto(eje):
+        import pandas as pd
+        return pd.Categorical.from_codes(codigos, valores)
+    return valores[codigos]
+
+
+def mapa_sensibilidad(motor, eje_x, eje_y, resolucion=RESOLUCION):
+    """
+    Cuadrante de cada celda de la grilla (filas = eje Y, columnas = eje X) y
+    celdas bajo cada uno de `LIMITES`.
+
+    Devuelve un dict con los valores de cada eje, la matriz `codigo` (int8,
+    `CODIGOS`) y `limites` (rótulo → matriz booleana), de forma (len(y), len(x)).
+    """
+    if eje_x == eje_y: raise ValueError("Los ejes del mapa deben ser distintos")
+    x, y = valores_eje(eje_x, resolucion), valores_eje(eje_y, resolucion)
+    fila, columna = np.indices((len(y), len(x))).reshape(2, -1)
+    celdas = dict(fijos(motor, eje_x, eje_y))
+    celdas[eje_x] = _columna(eje_x, x, columna)
+    celdas[eje_y] = _columna(eje_y, y, fila)
+    # La PAD no puede superar la PAS de la celda
+    celdas["pad"] = np.minimum(celdas["pad"], celdas["pas"])
+
+    resultado = evaluar_casos(celdas)
+    humedo = resultado["pcp_sim"] > CORTE_PCP
+    frio = ~(resultado["ic_sim"] > CORTE_IC)
+    forma = (len(y), len(x))
+    return {
+        "eje_x": eje_x, "eje_y": eje_y, "x": x, "y": y,
+        "codigo": (humedo.astype(np.int8) + 2 * frio).reshape(forma),
+        "limites": {rotulo: (resultado[columna] < valor).reshape(forma) for rotulo, (columna, valor) in LIMITES.items()},
+    }
+
+
+def posicion(motor, eje):
+    """Coordenada del paciente en `eje` (índice de la opción en los ejes de texto)."""
+    valor = motor[eje]
+    if not es_texto(eje): return valor
+    opciones = EJES[eje][1]
+    return opciones.index(valor) if valor in opciones else None
+
+
+def fraccion_limites(mapa):
+    """Rótulo de cada límite → fracción de la grilla que lo cumple."""
+    return {rotulo: float(debajo.mean()) for rotulo, debajo in mapa["limites"].items()}
+
+
+def rotulos(*ejes):
+    """Eje → (rótulo, opciones de texto o None) para `hemosim.graficos.figura_sensibilidad`."""
+    return {eje: (EJES[eje][0], EJES[eje][1] if es_texto(eje) else None) for eje in ejes}
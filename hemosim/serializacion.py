@@ -0,0 +1,322 @@
+"""
+Codificación compacta de un caso completo para guardarlo, compartirlo y reproducirlo.
+
+Un caso son los widgets de la barra lateral (demografía, signos vitales,
+examen y paraclínicos) más las intervenciones seleccionadas en
+"💊 Terapéutica". Cada formato lleva número de versión: `CAMPOS[version]`
+fija el orden de los campos y una versión publicada no se modifica (un campo
+nuevo es una versión nueva).
+
+- Binario: byte de versión + valores etiquetados en el orden de la versión,
+  comprimidos con DEFLATE sobre un diccionario con las opciones de los widgets.
+  `a_texto` lo pasa a base64 URL-safe (≈ 150 caracteres) para el parámetro
+  `?caso=` de la URL.
+- JSON: {"version": 1, "caso": {...}}, legible y editable a mano.
+- Lotes: JSON Lines (un caso por línea) o binario `MAGIA_LOTE` + registros
+  con prefijo de longitud.
+
+Los campos que la barra lateral no muestra (p. ej. el foco del soplo sin
+soplo) se guardan como None: al cargar el caso el widget toma su valor por
+defecto. Los demás se validan contra `VALORES[version]` (tipo del widget y
+rango u opciones): un caso que la barra lateral no podría mostrar falla con
+ValueError al leerlo, no al dibujar la página.
+"""
+import base64
+import json
+import struct
+import zlib
+
+VERSION = 1
+CAMPOS = {
+    1: (
+        "ciudad", "edad", "sexo", "antecedentes", "sintomas", "ritmo",
+        "pas", "pad", "fc", "fr", "sato2", "temp_c",
+        "iy_presente", "col_venosa", "rhy", "ruidos_agregados", "tiene_soplo", "foco", "ciclo", "patron",
+        "pulmones", "abdomen_viscera", "ascitis", "edema_ex", "pulsos", "frialdad", "llenado", "neuro",
+        "tiene_paraclinicos", "fevi", "lactato", "rx_patron", "tipo_peptido", "valor_peptido",
+        "intervenciones",
+    ),
+}
+# Campos que sólo existen en la barra lateral si otro campo tiene cierto valor
+VISIBLE_SI = {
+    "col_venosa": ("iy_presente", "Presente"),
+    **{campo: ("tiene_soplo", True) for campo in ("foco", "ciclo", "patron")},
+    **{campo: ("tiene_paraclinicos", True) for campo in ("fevi", "lactato", "rx_patron", "tipo_peptido", "valor_peptido")},
+}
+_ANTECEDENTES = (
+    "Apnea del sueño", "Artritis reumatoide", "Cardiopatía congénita", "Diabetes Mellitus Tipo 2", "Dislipidemia",
+    "Enfermedad arterial oclusiva crónica", "Enfermedad carotidea", "Enfermedad cerebro-vascular (ACV)",
+    "Enfermedad coronaria", "ERC sin diálisis", "ERC en diálisis", "Hipertensión arterial",
+    "Insuficiencia cardiaca previa", "Lupus eritematoso sistémico", "Obesidad", "Tabaquismo", "VIH",
+)
+_SINTOMAS = (
+    "Disnea esfuerzo", "Disnea reposo", "Disnea Paroxística Nocturna", "Ortopnea", "Bendopnea", "Fatiga",
+    "Angina", "Edema MsIs (Refiere)", "Vómito", "Diarrea", "Sangrado",
+)
+_INTERVENCIONES = ("oxigeno", "diureticos", "vasodilatadores", "inotropicos", "vasopresores", "liquidos")
+# Valores admitidos de cada campo: (tipo, (mínimo, máximo) si es número, opciones si es texto o tupla, None si es libre).
+# Las tuplas son subconjuntos de sus opciones; las intervenciones, registros (clave, inicio_min, dosis).
+VALORES = {
+    1: {
+        "ciudad": (str, None),
+        "edad": (int, (18, 120)),
+        "sexo": (str, ("M", "F", "Otro")),
+        "antecedentes": (tuple, _ANTECEDENTES),
+        "sintomas": (tuple, _SINTOMAS),
+        "ritmo": (str, ("Sinusal", "Fibrilación Auricular", "Flutter Atrial", "Marcapasos")),
+        "pas": (int, (0, 300)), "pad": (int, (0, 250)), "fc": (int, (0, 300)), "fr": (int, (0, 80)),
+        "sato2": (int, (0, 100)), "temp_c": (float, (25.0, 45.0)),
+        "iy_presente": (str, ("Ausente", "Presente")),
+        "col_venosa": (int, (0, 20)),
+        "rhy": (bool, None),
+        "ruidos_agregados": (str, ("R1-R2 Normales", "S3 (Galope Ventricular)", "S4 (Galope Atrial)", "S3 + S4 (Suma)")),
+        "tiene_soplo": (bool, None),
+        "foco": (str, ("Aórtico", "Mitral", "Tricúspideo", "Pulmonar")),
+        "ciclo": (str, ("Sistólico", "Diastólico")),
+        "patron": (str, ("Diamante", "Holosistólico", "Decrescendo", "Click", "Retumbo")),
+        "pulmones": (str, ("Murmullo Vesicular", "Estertores basales", "Estertores >1/2", "Sibilancias", "Roncus")),
+        "abdomen_viscera": (str, ("Sin visceromegalias", "Hepatomegalia", "Esplenomegalia", "Hepatoesplenomegalia")),
+        "ascitis": (bool, None),
+        "edema_ex": (str, ("Ausente", "Maleolar", "Rodillas", "Muslos")),
+        "pulsos": (str, ("Normales", "Disminuidos", "Filiformes")),
+        "frialdad": (str, ("Caliente", "Fría/Húmeda")),
+        "llenado": (int, (0, 20)),
+        "neuro": (str, ("Alerta", "Somnoliento", "Estuporoso")),
+        "tiene_paraclinicos": (bool, None),
+        "fevi": (int, (0, 100)),
+        "lactato": (float, (0.0, 20.0)),
+        "rx_patron": (str, ("Normal", "Congestión Leve/Basal", "Edema Alveolar (4 Cuadrantes)")),
+        "tipo_peptido": (str, ("BNP", "NT-proBNP")),
+        "valor_peptido": (int, (0, 50000)),
+        "intervenciones": (tuple, ((str, _INTERVENCIONES), (int, (0, 24 * 60)), (float, (0.0, 3.0)))),
+    },
+}
+_NOMBRES_TIPO = {int: "un entero", float: "un número", str: "un texto", bool: "un booleano", tuple: "una lista"}
+# Diccionario DEFLATE de cada versión: las opciones de los widgets se comprimen a
+# referencias de pocos bits. Es parte del formato: no modificar el de una versión publicada.
+_DICCIONARIO = {
+    1: "|".join(_ANTECEDENTES + _SINTOMAS + (
+        "Sinusal", "Fibrilación Auricular", "Flutter Atrial", "Marcapasos", "Ausente", "Presente",
+        "R1-R2 Normales", "S3 (Galope Ventricular)", "S4 (Galope Atrial)", "S3 + S4 (Suma)",
+        "Aórtico", "Mitral", "Tricúspideo", "Pulmonar", "Sistólico", "Diastólico",
+        "Diamante", "Holosistólico", "Decrescendo", "Click", "Retumbo",
+        "Murmullo Vesicular", "Estertores basales", "Estertores >1/2", "Sibilancias", "Roncus",
+        "Sin visceromegalias", "Hepatomegalia", "Esplenomegalia", "Hepatoesplenomegalia",
+        "Maleolar", "Rodillas", "Muslos", "Normales", "Disminuidos", "Filiformes", "Caliente", "Fría/Húmeda",
+        "Alerta", "Somnoliento", "Estuporoso", "Normal", "Congestión Leve/Basal", "Edema Alveolar (4 Cuadrantes)",
+        "BNP", "NT-proBNP",
+    ) + _INTERVENCIONES).encode("utf-8"),
+}
+MAGIA_LOTE = b"HSCL"
+# Un caso ocupa unos cientos de bytes: más que esto al descomprimir es un archivo inválido
+MAXIMO_DESCOMPRIMIDO = 64 * 1024
+
+_NINGUNO, _FALSO, _VERDADERO, _ENTERO, _REAL, _TEXTO, _TUPLA = range(7)
+
+
+def normalizar(datos, version=VERSION):
+    """
+    Dict con los campos de `version` en orden: listas como tuplas, valores
+    validados contra `VALORES[version]` y campos ocultos en None.
+    """
+    if not isinstance(datos, dict): raise ValueError("Caso inválido")
+    desconocidos = set(datos) - set(CAMPOS[version])
+    if desconocidos:
+        raise ValueError(f"Campos desconocidos: {', '.join(sorted(desconocidos))}")
+    caso = {}
+    for campo in CAMPOS[version]:
+        valor = _tupla(datos.get(campo))
+        caso[campo] = None if valor is None else _validar(campo, valor, *VALORES[version][campo])
+    for campo, (condicion, valor) in VISIBLE_SI.items():
+        if caso[condicion] != valor: caso[campo] = None
+    return caso
+
+
+def _tupla(valor):
+    if isinstance(valor, (list, tuple)): return tuple(_tupla(v) for v in valor)
+    return valor
+
+
+def _validar(campo, valor, tipo, admitidos):
+    """`valor` con el tipo del widget (2 → 2.0, 65.0 → 65); ValueError si el tipo, el rango o la opción no corresponden."""
+    if tipo is float and type(valor) is int: valor = float(valor)
+    elif tipo is int and type(valor) is float and valor.is_integer(): valor = int(valor)
+    if type(valor) is not tipo: raise ValueError(f"{campo}: se espera {_NOMBRES_TIPO[tipo]}, no {valor!r}")
+    if tipo is tuple:
+        if admitidos and isinstance(admitidos[0], tuple):
+            registros = tuple(_validar_registro(campo, registro, admitidos) for registro in valor)
+            if len({registro[0] for registro in registros}) != len(registros): raise ValueError(f"{campo}: claves repetidas")
+            return registros
+        if len(set(valor)) != len(valor) or not set(valor) <= set(admitidos):
+            raise ValueError(f"{campo}: opciones inválidas {valor!r}")
+    elif tipo in (int, float):
+        minimo, maximo = admitidos
+        if not minimo <= valor <= maximo: raise ValueError(f"{campo}: {valor!r} fuera de [{minimo}, {maximo}]")
+    elif admitidos is not None and valor not in admitidos:
+        raise ValueError(f"{campo}: opción desconocida {valor!r}")
+    return valor
+
+
+def _validar_registro(campo, registro, columnas):
+    if type(registro) is not tuple or len(registro) != len(columnas):
+        raise ValueError(f"{campo}: se esperan registros de {len(columnas)} valores, no {registro!r}")
+    return tuple(_validar(campo, valor, *columna) for valor, columna in zip(registro, columnas))
+
+
+def desde_caso(caso, intervenciones=()):
+    """Datos codificables de un `hemosim.caso.Caso` y las intervenciones (clave, inicio_min, dosis)."""
+    datos = {campo: getattr(caso, campo) for campo in CAMPOS[VERSION] if campo != "intervenciones"}
+    return normalizar(dict(datos, intervenciones=intervenciones))
+
+
+# --- Binario ---
+def _varint(n, salida):
+    while True:
+        byte, n = n & 0x7F, n >> 7
+        salida.append(byte | (0x80 if n else 0))
+        if not n: return
+
+
+def _escribir(valor, salida):
+    if valor is None: salida.append(_NINGUNO)
+    elif isinstance(valor, bool): salida.append(_VERDADERO if valor else _FALSO)
+    elif isinstance(valor, int):
+        salida.append(_ENTERO)
+        _varint(valor * 2 if valor >= 0 else -valor * 2 - 1, salida)  # zigzag
+    elif isinstance(valor, float):
+        salida.append(_REAL)
+        salida += struct.pack("<d", valor)
+    elif isinstance(valor, str):
+        texto = valor.encode("utf-8")
+        salida.append(_TEXTO)
+        _varint(len(texto), salida)
+        salida += texto
+    elif isinstance(valor, tuple):
+        salida.append(_TUPLA)
+        _varint(len(valor), salida)
+        for elemento in valor: _escribir(elemento, salida)
+    else:
+        raise TypeError(f"Valor no codificable: {valor!r}")
+
+
+class _Lector:
+    def __init__(self, datos):
+        self.datos, self.pos = datos, 0
+
+    def byte(self):
+        if self.pos >= len(self.datos): raise ValueError("Caso truncado")
+        self.pos += 1
+        return self.datos[self.pos - 1]
+
+    def varint(self):
+        n = desplazamiento = 0
+        while True:
+            byte = self.byte()
+            n |= (byte & 0x7F) << desplazamiento
+            if not byte & 0x80: return n
+            desplazamiento += 7
+
+    def bytes(self, n):
+        if self.pos + n > len(self.datos): raise ValueError("Caso truncado")
+        self.pos += n
+        return self.datos[self.pos - n:self.pos]
+
+    def valor(self, anidado=0):
+        if anidado > 2: raise ValueError("Demasiados niveles de anidamiento")
+        etiqueta = self.byte()
+        if etiqueta == _NINGUNO: return None
+        if etiqueta == _FALSO: return False
+        if etiqueta == _VERDADERO: return True
+        if etiqueta == _ENTERO:
+            n = self.varint()
+            return n // 2 if n % 2 == 0 else -(n + 1) // 2
+        if etiqueta == _REAL: return struct.unpack("<d", self.bytes(8))[0]
+        if etiqueta == _TEXTO: return self.bytes(self.varint()).decode("utf-8")
+        if etiqueta == _TUPLA: return tuple(self.valor(anidado + 1) for _ in range(self.varint()))
+        raise ValueError(f"Etiqueta desconocida: {etiqueta}")
+
+
+def codificar(datos, version=VERSION):
+    """Bytes del caso: versión + valores etiquetados comprimidos."""
+    caso = normalizar(datos, version)
+    cuerpo = bytearray()
+    for campo in CAMPOS[version]:
+        _escribir(caso[campo], cuerpo)
+    compresor = zlib.compressobj(9, zlib.DEFLATED, -15, zdict=_DICCIONARIO[version])
+    return bytes([version]) + compresor.compress(bytes(cuerpo)) + compresor.flush()
+
+
+def decodificar(datos):
+    """Dict del caso a partir de `codificar`; falla con ValueError si la versión o los datos no son válidos."""
+    if not datos: raise ValueError("Caso vacío")
+    version = datos[0]
+    if version not in CAMPOS: raise ValueError(f"Versión de caso no soportada: {version}")
+    try:
+        descompresor = zlib.decompressobj(-15, zdict=_DICCIONARIO[version])
+        cuerpo = descompresor.decompress(datos[1:], MAXIMO_DESCOMPRIMIDO)
+    except zlib.error as error:
+        raise ValueError(f"Caso corrupto: {error}") from None
+    if descompresor.unconsumed_tail: raise ValueError("Caso demasiado grande")
+    lector = _Lector(cuerpo)
+    caso = {campo: lector.valor() for campo in CAMPOS[version]}
+    if lector.pos != len(lector.datos): raise ValueError("Datos sobrantes al final del caso")
+    return normalizar(caso, version)
+
+
+def a_texto(datos):
+    """Caso en base64 URL-safe sin relleno (parámetro `?caso=`)."""
+    return base64.urlsafe_b64encode(codificar(datos)).rstrip(b"=").decode("ascii")
+
+
+def desde_texto(texto):
+    texto = texto.strip()
+    try:
+        datos = base64.urlsafe_b64decode(texto + "=" * (-len(texto) % 4))
+    except ValueError:
+        raise ValueError("Código de caso inválido") from None
+    return decodificar(datos)
+
+
+# --- JSON ---
+def a_json(datos, version=VERSION):
+    return json.dumps(dict(version=version, caso=normalizar(datos, version)), ensure_ascii=False)
+
+
+def desde_json(texto):
+    objeto = json.loads(texto) if isinstance(texto, (str, bytes)) else texto
+    if not isinstance(objeto, dict) or not isinstance(objeto.get("caso"), dict): raise ValueError("Caso inválido")
+    version = objeto.get("version")
+    if version not in CAMPOS: raise ValueError(f"Versión de caso no soportada: {version}")
+    return normalizar(objeto["caso"], version)
+
+
+# --- Lotes ---
+def escribir_lote(casos, formato="jsonl"):
+    """Bytes de un archivo con muchos casos: "jsonl" o "binario"."""
+    if formato == "jsonl":
+        return "".join(a_json(caso) + "\n" for caso in casos).encode("utf-8")
+    salida = bytearray(MAGIA_LOTE)
+    for caso in casos:
+        registro = codificar(caso)
+        _varint(len(registro), salida)
+        salida += registro
+    return bytes(salida)
+
+
+def leer_lote(datos):
+    """Casos de un archivo: lote binario, JSON Lines / JSON, o códigos base64 (uno por línea)."""
+    if datos.startswith(MAGIA_LOTE):
+        lector, casos = _Lector(datos), []
+        lector.pos = len(MAGIA_LOTE)
+        while lector.pos < len(datos):
+            casos.append(decodificar(lector.bytes(lector.varint())))
+        return casos
+    lineas = [linea.strip() for linea in datos.decode("utf-8-sig").splitlines() if linea.strip()]
+    if lineas and lineas[0].startswith(("{", "[")):
+        texto = "\n".join(lineas)
+        try:
+            objeto = json.loads(texto)
+        except json.JSONDecodeError:
+            return [desde_json(linea) for linea in lineas]
+        return [desde_json(o) for o in objeto] if isinstance(objeto, list) else [desde_json(objeto)]
+    return [desde_texto(linea) for linea in lineas]
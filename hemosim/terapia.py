@@ -0,0 +1,92 @@
+"""
+Trayectorias de tratamiento en el plano Forrester/Stevenson.
+
+Cada intervención lleva (PCP, IC) hacia su efecto neto de la pestaña
+"💊 Terapéutica" con una cinética simple: subida exponencial mientras se
+administra y, al suspenderse, decaimiento exponencial hacia un efecto residual
+(el volumen que ya eliminó el diurético no vuelve). Los efectos de varias
+intervenciones se suman.
+
+Un régimen es una tupla de (intervención, inicio_min, dosis, duración_min), con
+la dosis relativa a la estándar (1.0) y duración None para usar la de
+`INTERVENCIONES` (None allí = hasta el final del horizonte). Una grilla de
+dosis completa se resuelve con un solo producto matricial y las trayectorias
+quedan en caché por (punto de partida, régimen).
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from hemosim.calculos import PCP_MAX, PCP_MIN
+
+# Efecto neto a dosis estándar (dx: PCP en mmHg, dy: IC) y cinética en minutos:
+# t_inicio / t_fin son constantes de tiempo de subida y de decaimiento.
+INTERVENCIONES = {
+    "oxigeno": dict(nombre="Oxígeno / VNI", dx=0, dy=0, t_inicio=5, duracion=None, t_fin=5, residual=0.0),
+    "diureticos": dict(nombre="Furosemida", dx=-8, dy=0.1, t_inicio=30, duracion=120, t_fin=60, residual=1.0),
+    "vasodilatadores": dict(nombre="Vasodilatador", dx=-8, dy=0.8, t_inicio=5, duracion=None, t_fin=10, residual=0.3),
+    "inotropicos": dict(nombre="Inotrópico", dx=-2, dy=1.5, t_inicio=10, duracion=None, t_fin=5, residual=0.0),
+    "vasopresores": dict(nombre="Vasopresor", dx=1, dy=0.3, t_inicio=2, duracion=None, t_fin=3, residual=0.0),
+    "liquidos": dict(nombre="Líquidos IV", dx=4, dy=1.5, t_inicio=15, duracion=30, t_fin=120, residual=0.5),
+}
+HORIZONTE_MIN = 360
+PASO_MIN = 5
+LIMITES_IC = (1.0, 5.0)
+ESCALAS_DOSIS = (0.25, 0.5, 0.75, 1.0, 1.5, 2.0)
+
+
+def cinetica(clave, inicio, duracion, tiempos):
+    """Fracción del efecto neto de una intervención en cada tiempo (0 antes de iniciarla)."""
+    p = INTERVENCIONES[clave]
+    if duracion is None: duracion = p["duracion"]
+    fin = np.inf if duracion is None else duracion
+    t = np.asarray(tiempos, dtype=float) - inicio
+    subida = 1 - np.exp(-np.clip(t, 0, fin) / p["t_inicio"])
+    suspendida = np.clip(t - fin, 0, None)
+    return subida * (p["residual"] + (1 - p["residual"]) * np.exp(-suspendida / p["t_fin"]))
+
+
+def _efectos(regimen, horizonte, paso):
+    """Tiempos y desplazamiento (PCP, IC) por unidad de dosis de cada intervención: (k, T)."""
+    tiempos = np.arange(0, horizonte + paso, paso, dtype=float)
+    fracciones = np.array([cinetica(clave, inicio, duracion, tiempos) for clave, inicio, _, duracion in regimen])
+    fracciones = fracciones.reshape(len(regimen), len(tiempos))
+    dx = np.array([INTERVENCIONES[clave]["dx"] for clave, *_ in regimen], dtype=float)
+    dy = np.array([INTERVENCIONES[clave]["dy"] for clave, *_ in regimen], dtype=float)
+    return tiempos, fracciones * dx[:, None], fracciones * dy[:, None]
+
+
+def trayectorias_dosis(pcp0, ic0, regimen, dosis, horizonte=HORIZONTE_MIN, paso=PASO_MIN):
+    """
+    Trayectorias de una grilla de dosis en una sola llamada.
+
+    `dosis` tiene forma (m, k): una fila por combinación y una columna por
+    intervención del régimen (las dosis del régimen se ignoran). Devuelve
+    (tiempos (T,), pcp (m, T), ic (m, T)).
+    """
+    tiempos, efecto_pcp, efecto_ic = _efectos(regimen, horizonte, paso)
+    dosis = np.atleast_2d(np.asarray(dosis, dtype=float))
+    pcp = np.clip(pcp0 + dosis @ efecto_pcp, PCP_MIN, PCP_MAX)
+    ic = np.clip(ic0 + dosis @ efecto_ic, *LIMITES_IC)
+    return tiempos, pcp, ic
+
+
+def _solo_lectura(arreglo):
+    arreglo.flags.writeable = False
+    return arreglo
+
+
+@lru_cache(maxsize=256)
+def trayectoria(pcp0, ic0, regimen, horizonte=HORIZONTE_MIN, paso=PASO_MIN):
+    """(tiempos, pcp, ic) del régimen a sus dosis; en caché por (punto de partida, régimen)."""
+    dosis = [[d for _, _, d, _ in regimen]]
+    tiempos, pcp, ic = trayectorias_dosis(pcp0, ic0, regimen, dosis, horizonte, paso)
+    return _solo_lectura(tiempos), _solo_lectura(pcp[0]), _solo_lectura(ic[0])
+
+
+@lru_cache(maxsize=256)
+def respuesta_dosis(pcp0, ic0, regimen, escalas=ESCALAS_DOSIS, horizonte=HORIZONTE_MIN, paso=PASO_MIN):
+    """Punto final (pcp, ic) del régimen con todas sus dosis multiplicadas por cada escala."""
+    base = np.array([d for _, _, d, _ in regimen], dtype=float)
+    _, pcp, ic = trayectorias_dosis(pcp0, ic0, regimen, np.outer(escalas, base), horizonte, paso)
+    return _solo_lectura(pcp[:, -1].copy()), _solo_lectura(ic[:, -1].copy())
@@ -0,0 +1,8 @@
+"""Utilidades de texto compartidas (búsquedas sin tildes)."""
+import unicodedata
+
+
+def normalizar(texto):
+    """Clave de búsqueda: sin tildes, sin distinción de mayúsculas (NFKD + casefold)."""
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c)).casefold()
@@ -0,0 +1,119 @@
+"""
+Tiempos por sección de app.py (1. CONFIGURACIÓN … 8. PANEL PRINCIPAL y cada pestaña).
+
+Cada rerun abre un `Cronometro` que toma tiempos por vuelta: `marcar(seccion)`
+cierra la sección anterior y abre la siguiente, así las secciones de app.py no
+se reindentan. Al terminar el rerun los tiempos pasan al `RegistroTiempos` del
+proceso, que guarda una ventana móvil por sección para p50/p95. Si existe la
+variable de entorno HEMOSIM_TIEMPOS_JSONL, cada `EXPORTAR_CADA` reruns se
+agrega una línea JSON por sección a ese archivo.
+
+Los reruns parciales de un fragmento (`st.fragment`) no pasan por el
+cronómetro: se miden con `medir(seccion)` y no cuentan como reruns. En las
+corridas completas app.py avisa con `registrar_fragmento` los argumentos de
+cada fragmento (los que Streamlit retiene para sus reruns parciales); los
+recibe `al_llamar_fragmento` si se asignó, p. ej. benchmarks/rendimiento.py.
+"""
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+
+VENTANA = 1_000
+EXPORTAR_CADA = 100
+TOTAL = "Total"
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano de una secuencia ya ordenada."""
+    if not valores: return None
+    return valores[max(0, math.ceil(p / 100 * len(valores)) - 1)]
+
+
+class Cronometro:
+    def __init__(self, registro):
+        self._registro = registro
+        self._tiempos = {}
+        self._seccion = None
+        self._inicio = self._vuelta = time.perf_counter()
+
+    def marcar(self, seccion):
+        """Cierra la sección en curso y empieza `seccion` (una sección repetida acumula)."""
+        ahora = time.perf_counter()
+        if self._seccion is not None:
+            self._tiempos[self._seccion] = self._tiempos.get(self._seccion, 0.0) + ahora - self._vuelta
+        self._seccion, self._vuelta = seccion, ahora
+
+    def finalizar(self):
+        self.marcar(None)
+        self._tiempos[TOTAL] = self._vuelta - self._inicio
+        self._registro.registrar(self._tiempos)
+        return self._tiempos
+
+
+class RegistroTiempos:
+    """Ventana móvil de duraciones (segundos) por sección, compartida por todas las sesiones."""
+
+    def __init__(self, ventana=VENTANA, ruta_jsonl=None, exportar_cada=EXPORTAR_CADA):
+        self.ruta_jsonl = ruta_jsonl
+        self.exportar_cada = exportar_cada
+        self.reruns = 0
+        self._ventana = ventana
+        self._secciones = {}
+        self._lock = threading.Lock()
+        self.al_llamar_fragmento = None  # (corrida, nombre, args, kwargs) → None
+
+    def iniciar(self):
+        return Cronometro(self)
+
+    def registrar(self, tiempos):
+        with self._lock:
+            for seccion, duracion in tiempos.items():
+                self._secciones.setdefault(seccion, deque(maxlen=self._ventana)).append(duracion)
+            if TOTAL not in tiempos: return
+            self.reruns += 1
+            exportar = self.ruta_jsonl and self.reruns % self.exportar_cada == 0
+        if exportar:
+            with open(self.ruta_jsonl, "a", encoding="utf-8") as f:
+                f.write(self.exportar_jsonl())
+
+    def registrar_fragmento(self, corrida, nombre, args, kwargs):
+        """Pasa a `al_llamar_fragmento` (si hay) los argumentos de `nombre` en la corrida completa `corrida`."""
+        if self.al_llamar_fragmento: self.al_llamar_fragmento(corrida, nombre, args, kwargs)
+
+    @contextmanager
+    def medir(self, seccion):
+        """Registra la duración del bloque como `seccion` (también si termina con una excepción, p. ej. st.rerun)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar({seccion: time.perf_counter() - inicio})
+
+    def resumen(self):
+        """Una fila por sección (en orden de aparición) con n, p50, p95 y media en ms."""
+        with self._lock:
+            secciones = {seccion: sorted(d) for seccion, d in self._secciones.items()}
+        return [
+            dict(seccion=seccion, n=len(d), p50_ms=percentil(d, 50) * 1000, p95_ms=percentil(d, 95) * 1000,
+                 media_ms=sum(d) / len(d) * 1000)
+            for seccion, d in secciones.items()
+        ]
+
+    def exportar_jsonl(self):
+        """Resumen actual como JSON Lines, con marca de tiempo y número de reruns."""
+        marca = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+        return "".join(
+            json.dumps(dict(fecha=marca, reruns=self.reruns, **fila), ensure_ascii=False) + "\n"
+            for fila in self.resumen()
+        )
+
+
+@lru_cache(maxsize=None)
+def registro_tiempos():
+    """Registro único del proceso."""
+    return RegistroTiempos(ruta_jsonl=os.environ.get("HEMOSIM_TIEMPOS_JSONL"))
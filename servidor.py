@@ -0,0 +1,16 @@
+"""
+Punto de entrada de producción: `streamlit run servidor.py`.
+
+Monta app.py con la ruta de estáticos de hemosim/estaticos.py: audios y
+videos de assets/ con Range, ETag por contenido y caché inmutable del
+navegador, en lugar de reenviarlos por cada sesión.
+"""
+import os
+
+import streamlit as st
+
+from hemosim.estaticos import Manifiesto, rutas_estaticos
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+app = st.App(os.path.join(RAIZ, "app.py"), routes=rutas_estaticos(Manifiesto(os.path.join(RAIZ, "assets"))))